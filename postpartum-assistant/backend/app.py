@@ -1,16 +1,41 @@
+import hashlib
+import logging
 import os
-import secrets
 import random
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
-from flask import Flask, request, jsonify, render_template, redirect, url_for, flash, session
-from flask_sqlalchemy import SQLAlchemy
+from types import SimpleNamespace
+
+import click
+from flask import (Blueprint, Flask, current_app, request, jsonify, render_template, redirect, url_for, flash, session,
+                   has_app_context, stream_with_context)
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_migrate import Migrate
-from werkzeug.security import generate_password_hash, check_password_hash
-from textblob import TextBlob
 from werkzeug.exceptions import NotFound
 from jinja2 import TemplateNotFound
+from sqlalchemy import event
+
+from cache import TTLCache
+import chat
+from config import Config
+from db_profiles import apply_profile, engine_options
+import export
+from importer import import_screenings
+from lexicon import load_lexicons
+import metrics
+from logging_setup import configure_logging, parse_levels
+from models import db, User, ScreeningSession, ScreeningResponse, Analysis
+from pagination import keyset_paginate
+from result_store import create_result_store
+import rollups
+from scoring import get_rule_set, rescore_sessions
+import search
+from sentiment_cache import SentimentCache, cache_key
+from sentiment_worker import SentimentPool, polarity as inline_polarity
+from template_registry import TemplateRegistry
+from write_behind import WriteBehindQueue
 
 # ====== EPDS QUESTIONS DATA ======
 EPDS_QUESTIONS = {
@@ -108,127 +133,110 @@ EPDS_QUESTIONS = {
 # ====== END EPDS DATA ======
   
 
-# Initialize Flask app with robust template path handling
 BASE_DIR = Path(__file__).parent.resolve()
 TEMPLATE_DIR = BASE_DIR / 'templates'
 
-# ====== ADD DEBUG PRINTS HERE ======
-print("=" * 50)
-print("DEBUG TEMPLATE PATHS:")
-print(f"1. BASE_DIR: {BASE_DIR}")
-print(f"2. TEMPLATE_DIR: {TEMPLATE_DIR}")
-print(f"3. Template folder exists: {TEMPLATE_DIR.exists()}")
-
-# Check for epds_form.html
-epds_path = TEMPLATE_DIR / 'resources' / 'epds_form.html'
-print(f"4. EPDS template path: {epds_path}")
-print(f"5. EPDS template exists: {epds_path.exists()}")
-
-# List files in templates/resources
-resources_dir = TEMPLATE_DIR / 'resources'
-if resources_dir.exists():
-    print(f"6. Files in resources folder:")
-    for file in resources_dir.glob('*'):
-        print(f"   - {file.name}")
-else:
-    print(f"6. Resources folder doesn't exist!")
-
-print("=" * 50)
-# ====== END DEBUG ======
-
-if not TEMPLATE_DIR.exists():
-    raise RuntimeError(f"Templates folder missing at {TEMPLATE_DIR}")
-
-app = Flask(__name__, template_folder=str(TEMPLATE_DIR))
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or secrets.token_hex(24)
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or 'sqlite:///app.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['TEMPLATES_AUTO_RELOAD'] = True
-
-
-
-# Initialize extensions
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
-login_manager = LoginManager(app)
-login_manager.login_view = 'login'
+logger = logging.getLogger('app')
+
+# Initialize extensions; create_app() binds them to an application
+migrate = Migrate()
+login_manager = LoginManager()
+login_manager.login_view = 'main.login'
 login_manager.login_message = 'Please log in to access this page.'
 login_manager.login_message_category = 'info'
 
-# Database models (unchanged from your original)
-class User(UserMixin, db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(50), unique=True, nullable=False)
-    email = db.Column(db.String(100), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
-    analyses = db.relationship('Analysis', backref='user', lazy=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+main = Blueprint('main', __name__)
 
-    with app.app_context():
-     db.create_all()
-
-    def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
-
-    def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
-
-# ========= ADD FROM HERE =========
-class ScreeningSession(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
-    total_score = db.Column(db.Integer)
-    result_category = db.Column(db.String(50))
-    q10_score = db.Column(db.Integer)  # NEW LINE ADDED HERE
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-class ScreeningResponse(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    session_id = db.Column(db.Integer, db.ForeignKey('screening_session.id'))
-    question_number = db.Column(db.Integer)
-    answer_value = db.Column(db.Integer)
-# ========= TO HERE =========
-
-class Analysis(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    text = db.Column(db.String(500), nullable=False)
-    sentiment = db.Column(db.String(20), nullable=False)
-    confidence = db.Column(db.Float, nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+def services():
+    """The current app's caches and helpers, built by init_services()"""
+    return current_app.extensions['services']
+
+class UserPrincipal(UserMixin):
+    """Detached, read-only view of a User for current_user
+
+    Carries only what requests read from current_user, so it can be cached
+    across requests without holding on to a database session.
+    """
+
+    def __init__(self, user):
+        self.id = user.id
+        self.username = user.username
+        self.email = user.email
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    user_cache = services().user_cache
+    if user_cache is not None:
+        principal = user_cache.get(user_id)
+        if principal is not None:
+            return principal
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    principal = UserPrincipal(user)
+    if user_cache is not None:
+        user_cache.set(user_id, principal)
+    return principal
+
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_cached_user(mapper, connection, target):
+    # Password changes, profile edits, deletes and (reused-id) registrations.
+    # Other worker processes keep their copy until USER_CACHE_TTL runs out.
+    if not has_app_context():
+        return
+    user_cache = services().user_cache
+    if user_cache is not None:
+        user_cache.invalidate(target.id)
 
 def determine_sentiment(text, polarity):
-    print(f"Determining sentiment for polarity: {polarity}")
     if polarity > 0.2:
         result = 'positive', polarity
     elif polarity < -0.2:
         result = 'negative', abs(polarity)
     else:
         result = 'neutral', 1.0 - abs(polarity)
-    print(f"Returning: {result}")
+    logger.debug('Determined sentiment', extra={'polarity': polarity, 'sentiment': result[0]})
     return result
 
-# Template verification system
-def verify_template(template_path):
-    """Ensure template exists with proper case sensitivity"""
-    full_path = TEMPLATE_DIR / template_path
+def text_polarity(text):
+    """TextBlob polarity for text, memoized on the normalized text"""
+    key = cache_key(text)
+    sentiment_cache, sentiment_pool = services().sentiment_cache, services().sentiment_pool
+    polarity = sentiment_cache.get(key)
+    if polarity is None:
+        if sentiment_pool is not None:
+            polarity = sentiment_pool.polarity(text)
+        else:
+            # Imported on first use so app startup does not load the NLP stack
+            from textblob import TextBlob
+            polarity = TextBlob(text).sentiment.polarity
+        sentiment_cache.set(key, polarity)
+    return polarity
+
+def score_sentiment(text):
+    """Return (sentiment, confidence) for text using the cached polarity"""
+    return determine_sentiment(text, text_polarity(text))
 
-    # Template verification system
+def warm_sentiment(sentiment_pool):
+    """Load TextBlob (or start the scoring pool) before the first request"""
+    try:
+        if sentiment_pool is not None:
+            sentiment_pool.polarity('warm up')
+        else:
+            inline_polarity('warm up')
+    except Exception:
+        logger.warning('Sentiment warm-up failed', exc_info=True)
+
+# Template verification system
 def verify_template(template_path):
     """Ensure template exists with proper case sensitivity"""
     full_path = TEMPLATE_DIR / template_path
     
-    # ====== ADD DEBUG PRINTS HERE ======
-    print(f"\n🔍 VERIFY_TEMPLATE: Looking for '{template_path}'")
-    print(f"   Full path: {full_path}")
-    print(f"   Full path exists: {full_path.exists()}")
-    
     if not full_path.exists():
-        print(f"   ❌ Template not found at main path!")
         # Try to find case-insensitive match (for Windows/Mac development)
         matches = []
         for f in TEMPLATE_DIR.glob('**/*'):
@@ -236,52 +244,107 @@ def verify_template(template_path):
                 matches.append(str(f.relative_to(TEMPLATE_DIR)))
         
         if matches:
-            print(f"   ✅ Found {len(matches)} case-insensitive match(es):")
-            for match in matches:
-                print(f"      - {match}")
+            logger.info('Template resolved by case-insensitive match',
+                        extra={'template': template_path, 'matches': matches})
             return str(matches[0])
         else:
-            print(f"   ❌❌ No matches found anywhere in {TEMPLATE_DIR}!")
+            logger.error('Template not found', extra={'template': template_path,
+                                                      'template_dir': str(TEMPLATE_DIR)})
             raise TemplateNotFound(template_path)
     
-    print(f"   ✅ Template found!")
+    logger.debug('Template found', extra={'template': template_path})
     return template_path
 
-@app.before_request
-def check_templates():
-    """Verify required templates exist on startup"""
-    required_templates = {
-        'auth/login.html': verify_template('auth/login.html'),
-        'auth/register.html': verify_template('auth/register.html'),
-        'analyze/form.html': verify_template('analyze/form.html'),
-        'analyze/results.html': verify_template('analyze/results.html'),
-        'history.html': verify_template('history.html'),
-        'dashboard.html': verify_template('dashboard.html'),
-        'errors/404.html': verify_template('errors/404.html'),
-        'errors/500.html': verify_template('errors/500.html'),
-        # ADD THIS LINE:
-        'resources/epds_form.html': verify_template('resources/epds_form.html')
-    }
-    app.config['VERIFIED_TEMPLATES'] = required_templates
+# Templates every deployment needs; resolved together by preload_templates()
+REQUIRED_TEMPLATES = (
+    'auth/login.html',
+    'auth/register.html',
+    'analyze/form.html',
+    'analyze/results.html',
+    'history.html',
+    'dashboard.html',
+    'errors/404.html',
+    'errors/500.html',
+    'resources/epds_form.html',
+)
+
+# Resource pages rendered through render_cached()
+CACHED_PAGE_TEMPLATES = (
+    'resources/self_care.html',
+    'resources/support_groups.html',
+    'resources/emergency_contacts.html',
+)
+
+def preload_templates():
+    """Verify required templates exist (raises TemplateNotFound)"""
+    services().template_registry.preload(REQUIRED_TEMPLATES)
+
+def precompile_templates(app):
+    """Resolve and compile the main templates up front
+
+    Only used with TEMPLATES_AUTO_RELOAD off: Jinja then never rechecks
+    them, so the first request to each page skips parsing and compiling.
+    """
+    registry = app.extensions['services'].template_registry
+    for template_name in REQUIRED_TEMPLATES + CACHED_PAGE_TEMPLATES:
+        try:
+            app.jinja_env.get_template(registry.resolve(template_name))
+        except TemplateNotFound:
+            logger.warning('Template not precompiled', extra={'template': template_name})
 
 def render_verified(template_name, **context):
     """Safe template renderer with verification"""
     try:
-        verified_path = app.config['VERIFIED_TEMPLATES'][template_name]
+        verified_path = services().template_registry.resolve(template_name)
         return render_template(verified_path, **context)
-    except KeyError:
-        raise NotFound(f"Template '{template_name}' not registered")
     except TemplateNotFound:
         raise NotFound(f"Template file missing: {template_name}")
 
-@app.route('/login', methods=['GET', 'POST'])
+def render_cached(template_name, **context):
+    """render_verified for pages whose output depends only on the viewer
+
+    The rendered page is cached per template and user, served with an
+    ETag and private Cache-Control, and If-None-Match is answered with
+    304. Context must not vary between requests, and the template must not
+    show flash messages (a cached hit would never consume them).
+    """
+    page_cache = services().page_cache
+    if page_cache is None:
+        return render_verified(template_name, **context)
+
+    # With auto reload on, Jinja hands back a new Template object once the
+    # file changes, which makes the cached copy stale
+    template = None
+    if current_app.config['TEMPLATES_AUTO_RELOAD']:
+        template = current_app.jinja_env.get_template(services().template_registry.resolve(template_name))
+
+    key = (template_name, current_user.get_id())
+    entry = page_cache.get(key)
+    if entry is None or entry[2] is not template:
+        body = render_verified(template_name, **context)
+        etag = hashlib.sha1(body.encode('utf-8')).hexdigest()
+        # Header values are fixed per entry, so build them once here
+        headers = {
+            'ETag': f'"{etag}"',
+            'Cache-Control': f"private, max-age={current_app.config['PAGE_CACHE_MAX_AGE']}",
+            'Vary': 'Cookie',
+        }
+        entry = (body, etag, template, headers)
+        page_cache.set(key, entry)
+
+    body, etag, _, headers = entry
+    if request.if_none_match.contains_weak(etag):
+        return current_app.response_class(status=304, headers=headers)
+    return current_app.response_class(body, headers=headers)
+
+@main.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
         # Get the next page from URL parameter
         next_page = request.args.get('next')
         if next_page:
             return redirect(next_page)
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
         
     if request.method == 'POST':
         username = request.form.get('username')
@@ -298,16 +361,16 @@ def login():
             # Redirect to next page or dashboard
             if next_page:
                 return redirect(next_page)
-            return redirect(url_for('dashboard'))
+            return redirect(url_for('main.dashboard'))
             
         flash('Invalid username or password', 'error')
     
     return render_verified('auth/login.html')
 
-@app.route('/register', methods=['GET', 'POST'])
+@main.route('/register', methods=['GET', 'POST'])
 def register():
     if current_user.is_authenticated:
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
         
     if request.method == 'POST':
         username = request.form.get('username')
@@ -316,11 +379,11 @@ def register():
         
         if User.query.filter_by(username=username).first():
             flash('Username already taken', 'error')
-            return redirect(url_for('register'))
+            return redirect(url_for('main.register'))
             
         if User.query.filter_by(email=email).first():
             flash('Email already registered', 'error')
-            return redirect(url_for('register'))
+            return redirect(url_for('main.register'))
             
         user = User(username=username, email=email)
         user.set_password(password)
@@ -328,35 +391,117 @@ def register():
         db.session.commit()
         
         flash('Registration successful! Please log in.', 'success')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
         
     return render_verified('auth/register.html')
 
-@app.route('/logout')
+@main.route('/logout')
 @login_required
 def logout():
+    user_cache = services().user_cache
+    if user_cache is not None:
+        user_cache.invalidate(current_user.id)
     logout_user()
     flash('You have been logged out.', 'info')
-    return redirect(url_for('login'))
+    return redirect(url_for('main.login'))
 
 # Main Application Routes (modified to use render_verified)
-@app.route('/')
+@main.route('/')
 def home():
-    return redirect(url_for('dashboard'))
+    return redirect(url_for('main.dashboard'))
+
+def store_analysis(user_id, text, sentiment, confidence, defer=None):
+    """Persist an analysis, through the write-behind queue when enabled
+
+    defer overrides ANALYSIS_WRITE_BEHIND for this row. Returns the new
+    row id, or None when the row was queued.
+    """
+    row = {
+        'user_id': user_id,
+        'text': text,
+        'sentiment': sentiment,
+        'confidence': confidence,
+        'timestamp': datetime.utcnow()
+    }
+    if defer is None:
+        defer = current_app.config['ANALYSIS_WRITE_BEHIND']
+    analysis_writer = services().analysis_writer
+    if defer and analysis_writer is not None and analysis_writer.put(user_id, row):
+        return None
 
-@app.route('/dashboard')
+    analysis = Analysis(**row)
+    db.session.add(analysis)
+    db.session.commit()
+    services().dashboard_cache.invalidate(user_id)
+    return analysis.id
+
+def write_analysis_batch(app, rows):
+    """Write-behind callback: commit queued analyses in one transaction"""
+    with app.app_context():
+        db.session.execute(db.insert(Analysis), rows)
+        # Bulk INSERTs skip the mapper events that keep the rollups current
+        rollups.record(db.session.connection(), (
+            rollups.analysis_delta(row['user_id'], row['timestamp'], row['sentiment'], row['confidence'])
+            for row in rows
+        ))
+        db.session.commit()
+    dashboard_cache = app.extensions['services'].dashboard_cache
+    for user_id in {row['user_id'] for row in rows}:
+        dashboard_cache.invalidate(user_id)
+
+def wait_for_own_writes():
+    """Read-your-writes: let the current user's queued analyses land first"""
+    analysis_writer = services().analysis_writer
+    if analysis_writer is not None:
+        analysis_writer.wait_for(current_user.id, current_app.config['WRITE_BEHIND_READ_TIMEOUT'])
+
+def dashboard_summary(user_id):
+    """Sentiment counts and recent analyses for a user's dashboard"""
+    dashboard_cache = services().dashboard_cache
+    summary = dashboard_cache.get(user_id)
+    if summary is not None:
+        return summary
+
+    # One GROUP BY instead of a COUNT query per sentiment
+    counts = dict(db.session.execute(
+        db.select(Analysis.sentiment, db.func.count(Analysis.id))
+        .where(Analysis.user_id == user_id)
+        .group_by(Analysis.sentiment)
+    ).all())
+
+    recent = Analysis.query.filter_by(user_id=user_id)\
+             .order_by(Analysis.timestamp.desc())\
+             .limit(5)\
+             .all()
+
+    summary = {
+        'total': sum(counts.values()),
+        'positive': counts.get('positive', 0),
+        'neutral': counts.get('neutral', 0),
+        'negative': counts.get('negative', 0),
+        # Plain dicts so cached rows are not tied to a finished DB session
+        'recent': [{
+            'id': analysis.id,
+            'text': analysis.text,
+            'sentiment': analysis.sentiment,
+            'confidence': analysis.confidence,
+            'timestamp': analysis.timestamp
+        } for analysis in recent]
+    }
+    dashboard_cache.set(user_id, summary)
+    return summary
+
+@main.route('/dashboard')
 @login_required
 def dashboard():
-    # Get analysis counts
-    total_analyses = Analysis.query.filter_by(user_id=current_user.id).count()
-    positive_count = Analysis.query.filter_by(user_id=current_user.id, sentiment='positive').count()
-    neutral_count = Analysis.query.filter_by(user_id=current_user.id, sentiment='neutral').count()
-    negative_count = Analysis.query.filter_by(user_id=current_user.id, sentiment='negative').count()
-
-    recent_analyses = Analysis.query.filter_by(user_id=current_user.id)\
-                     .order_by(Analysis.timestamp.desc())\
-                     .limit(5)\
-                     .all()
+    wait_for_own_writes()
+    summary = dashboard_summary(current_user.id)
+    total_analyses = summary['total']
+    positive_count = summary['positive']
+    neutral_count = summary['neutral']
+    negative_count = summary['negative']
+    recent_analyses = summary['recent']
+
     # Weekly stats (simplified)
     weekly_stats = {
         'positive': min(70, positive_count * 10),
@@ -382,55 +527,63 @@ def dashboard():
                          weekly_stats=weekly_stats,
                          daily_tip=daily_tip)
 
-@app.route('/analyze', methods=['GET', 'POST'])
+@main.route('/analyze', methods=['GET', 'POST'])
 @login_required
 def analyze_form():
     if request.method == 'POST':
         text = request.form.get('text')
         if not text or len(text.strip()) < 10:
             flash('Please enter valid text (minimum 10 characters)', 'error')
-            return redirect(url_for('analyze_form'))
+            return redirect(url_for('main.analyze_form'))
             
-        analysis = TextBlob(text)
-        sentiment, confidence = determine_sentiment(text, analysis.sentiment.polarity)
-        
-        print(f"=== DEBUG ===")
-        print(f"Input text: {text}")
-        print(f"TextBlob polarity: {analysis.sentiment.polarity}")
-        print(f"Determined sentiment: {sentiment}")
-        print(f"Confidence: {confidence}")
-        print(f"=============")
-        
-        
-        request_entry = Analysis(
-            text=text,
-            sentiment=sentiment,
-            confidence=confidence,
-            user_id=current_user.id
-        )
-        db.session.add(request_entry)
-        db.session.commit()
+        polarity = text_polarity(text)
+        sentiment, confidence = determine_sentiment(text, polarity)
         
-          # ADD THIS PRINT HERE (around line 195)
-        print(f"Stored in DB - Sentiment: '{request_entry.sentiment}', Confidence: {request_entry.confidence}")
+        logger.debug('Analyzed journal entry', extra={
+            'text': text,  # redacted by the logging filter
+            'polarity': polarity,
+            'sentiment': sentiment,
+            'confidence': confidence
+        })
+        
+        analysis_id = store_analysis(current_user.id, text, sentiment, confidence)
+        
+        logger.info('Stored analysis', extra={'analysis_id': analysis_id,
+                                               'sentiment': sentiment})
         
-        session['analysis_results'] = {
+        # Keep the payload server side; the session cookie only carries a token
+        session['analysis_results'] = services().result_store.put({
+            'user_id': current_user.id,
             'text': text,
             'sentiment': sentiment,
             'confidence': confidence,
             'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        return redirect(url_for('show_results'))
+        })
+        return redirect(url_for('main.show_results'))
         
     return render_verified('analyze/form.html')
+def load_result(session_key):
+    """Fetch the result payload whose token is stored under session_key
+
+    Returns None when there is no token, it expired, or it belongs to
+    another user.
+    """
+    token = session.get(session_key)
+    if not isinstance(token, str):
+        return None
+    result = services().result_store.get(token)
+    if not result or result.get('user_id') != current_user.id:
+        return None
+    return result
+
 # Replace entire show_results() function (Lines 217-240) with:
-@app.route('/results')
+@main.route('/results')
 @login_required
 def show_results():
-    results = session.get('analysis_results')
+    results = load_result('analysis_results')
     if not results:
         flash('No analysis results found', 'error')
-        return redirect(url_for('analyze_form'))
+        return redirect(url_for('main.analyze_form'))
     
     text = results.get('text', '')
     word_count = len(text.split())
@@ -453,56 +606,68 @@ def show_results():
         word_count=word_count
     )
 
-@app.route('/history')
+@main.route('/history')
 @login_required
 def history():
-    """Render the history page with paginated analysis data"""
+    """Render the history page with paginated analysis data
+
+    ?page=N keeps the numbered OFFSET pagination; otherwise the page is
+    found by keyset seek from the opaque ?after= cursor.
+    """
     try:
-        page = request.args.get('page', 1, type=int)
         per_page = 10
+        wait_for_own_writes()
         
         # Query analyses for current user with pagination
-        analyses = Analysis.query.filter_by(
-            user_id=current_user.id
-        ).order_by(
-            Analysis.timestamp.desc()  # Using timestamp since that's what your model has
-        ).paginate(page=page, per_page=per_page, error_out=False)
+        query = Analysis.query.filter_by(user_id=current_user.id)
+
+        if 'page' in request.args:
+            page = request.args.get('page', 1, type=int)
+            analyses = query.order_by(
+                Analysis.timestamp.desc()  # Using timestamp since that's what your model has
+            ).paginate(page=page, per_page=per_page, error_out=False)
+        else:
+            analyses = keyset_paginate(
+                query, Analysis.timestamp, Analysis.id,
+                after=request.args.get('after'), per_page=per_page
+            )
         
         return render_template('history.html', analyses=analyses)
         
     except Exception as e:
         flash('Error loading history: ' + str(e), 'error')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
 
 # ... your existing routes (analyze, results, history, etc.) ...
 
 # === ADD THE NEW RESOURCE ROUTES HERE ===
-@app.route('/self-care-guide')
+@main.route('/self-care-guide')
 @login_required
 def self_care_guide():
     """Self-care guide page"""
-    return render_verified('resources/self_care.html')
+    return render_cached('resources/self_care.html')
 
-@app.route('/support-groups')
+@main.route('/support-groups')
 @login_required
 def support_groups():
     """Support groups information page"""
-    return render_verified('resources/support_groups.html')
+    return render_cached('resources/support_groups.html')
+
+EMERGENCY_CONTACTS = (
+    {"name": "National Suicide Prevention Lifeline", "number": "988", "description": "24/7 free and confidential support"},
+    {"name": "Postpartum Support International", "number": "1-800-944-4773", "description": "Specialized postpartum support"},
+    {"name": "Crisis Text Line", "number": "Text HOME to 741741", "description": "24/7 crisis support via text"},
+    {"name": "Emergency Services", "number": "911", "description": "Immediate emergency assistance"},
+    {"name": "National Maternal Mental Health Hotline", "number": "1-833-943-5746", "description": "24/7 professional support"}
+)
 
-@app.route('/emergency-contacts')
+@main.route('/emergency-contacts')
 @login_required
 def emergency_contacts():
     """Emergency contacts page"""
-    emergency_contacts = [
-        {"name": "National Suicide Prevention Lifeline", "number": "988", "description": "24/7 free and confidential support"},
-        {"name": "Postpartum Support International", "number": "1-800-944-4773", "description": "Specialized postpartum support"},
-        {"name": "Crisis Text Line", "number": "Text HOME to 741741", "description": "24/7 crisis support via text"},
-        {"name": "Emergency Services", "number": "911", "description": "Immediate emergency assistance"},
-        {"name": "National Maternal Mental Health Hotline", "number": "1-833-943-5746", "description": "24/7 professional support"}
-    ]
-    return render_verified('resources/emergency_contacts.html', contacts=emergency_contacts)
+    return render_cached('resources/emergency_contacts.html', contacts=EMERGENCY_CONTACTS)
 
-@app.route('/api/analyze', methods=['POST'])  # Fixed typo: 'analyze' to 'analyze'
+@main.route('/api/analyze', methods=['POST'])  # Fixed typo: 'analyze' to 'analyze'
 @login_required
 def analyze_sentiment():
     try:
@@ -515,39 +680,166 @@ def analyze_sentiment():
         # Analyze sentiment (replace with your actual analysis logic)
         sentiment, confidence = analyze_text_sentiment(text)
         
-        # Save to database - Use your Analysis model (not SentimentAnalysis)
-        analysis = Analysis(
-            user_id=current_user.id,
-            text=text,
-            sentiment=sentiment,
-            confidence=confidence
-        )
-        db.session.add(analysis)
-        db.session.commit()
+        # id is None when the row went to the write-behind queue
+        analysis_id = store_analysis(current_user.id, text, sentiment, confidence)
         
         return jsonify({
             'sentiment': sentiment,
             'confidence': confidence,
-            'id': analysis.id
+            'id': analysis_id
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@main.route('/api/chat', methods=['POST'])
+@login_required
+def chat_turn():
+    """One chatbot turn: sentiment, reply and widget
+
+    Answers JSON, or server-sent events (turn, message per reply part,
+    done) when the client accepts text/event-stream. The turn is stored
+    as an Analysis through the write-behind queue unless CHAT_ASYNC_PERSIST
+    is off, so the reply does not wait for the commit and the turn's id is
+    null (history and dashboard reads still wait for the row).
+    """
+    data = request.get_json(silent=True) or {}
+    text = (data.get('text') or '').strip()
+    if not text:
+        return jsonify({'error': 'No text provided'}), 400
+    if len(text) > current_app.config['CHAT_MAX_LENGTH']:
+        return jsonify({'error': f"Messages are limited to {current_app.config['CHAT_MAX_LENGTH']} characters"}), 413
+
+    sentiment, confidence = score_sentiment(text)
+    parts, widget = chat.compose_reply(sentiment, EMERGENCY_CONTACTS)
+    turn = {
+        'id': store_analysis(current_user.id, text, sentiment, confidence,
+                             defer=current_app.config['CHAT_ASYNC_PERSIST']),
+        'sentiment': sentiment,
+        'confidence': round(confidence, 3),
+        'widget': widget
+    }
+
+    streaming = request.accept_mimetypes.best_match(['application/json', 'text/event-stream'])
+    if streaming != 'text/event-stream':
+        return jsonify({**turn, 'reply': ' '.join(parts)})
+
+    def events():
+        yield chat.sse_event('turn', turn)
+        for part in parts:
+            yield chat.sse_event('message', {'text': part})
+        yield chat.sse_event('done', {})
+
+    return current_app.response_class(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # stop nginx from buffering the stream
+    })
+
+@main.route('/api/analyze/batch', methods=['POST'])
+@login_required
+def analyze_sentiment_batch():
+    """Score a list of texts and store them in a single transaction"""
+    data = request.get_json(silent=True) or {}
+    texts = data.get('texts')
+
+    if not isinstance(texts, list) or not texts:
+        return jsonify({'error': 'No texts provided'}), 400
+
+    limit = current_app.config['ANALYZE_BATCH_LIMIT']
+    if len(texts) > limit:
+        return jsonify({'error': f'Too many texts (maximum {limit} per batch)'}), 413
+
+    # Score everything first so the database only sees one round of writes
+    results = []
+    rows = []
+    for index, text in enumerate(texts):
+        text = text.strip() if isinstance(text, str) else ''
+        if not text:
+            results.append({'index': index, 'error': 'No text provided'})
+            continue
+
+        sentiment, confidence = analyze_text_sentiment(text)
+        results.append({'index': index, 'sentiment': sentiment, 'confidence': confidence})
+        rows.append({
+            'user_id': current_user.id,
+            'text': text,
+            'sentiment': sentiment,
+            'confidence': confidence,
+            'timestamp': datetime.utcnow()
+        })
+
+    try:
+        if rows:
+            # One multi-row INSERT instead of one add()/commit() per text
+            ids = db.session.scalars(
+                db.insert(Analysis).returning(Analysis.id, sort_by_parameter_order=True),
+                rows
+            ).all()
+            # Bulk INSERTs skip the mapper events that keep the rollups current
+            rollups.record(db.session.connection(), (
+                rollups.analysis_delta(row['user_id'], row['timestamp'], row['sentiment'], row['confidence'])
+                for row in rows
+            ))
+            db.session.commit()
+            services().dashboard_cache.invalidate(current_user.id)
+
+            stored = (result for result in results if 'error' not in result)
+            for result, analysis_id in zip(stored, ids):
+                result['id'] = analysis_id
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({
+        'results': results,
+        'stored': len(rows),
+        'failed': len(results) - len(rows)
+    })
     
 
-@app.route('/api/history')
+@main.route('/api/history')
 @login_required
 def get_history():
+    """Analysis history as JSON
+
+    By default pages are fetched by keyset: follow `next_cursor` with
+    ?after=<cursor>, and pass ?count=1 if an exact `total` is needed.
+    ?page=N keeps the older numbered pagination with page counts.
+    """
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = 10
+        per_page = min(max(request.args.get('per_page', 10, type=int), 1), 100)
+        wait_for_own_writes()
         
         # Use Analysis model (not SentimentAnalysis)
-        analyses = Analysis.query.filter_by(
-            user_id=current_user.id
-        ).order_by(
-            Analysis.created_at.desc()  # Use created_at instead of timestamp
-        ).paginate(page=page, per_page=per_page)
+        query = Analysis.query.filter_by(user_id=current_user.id)
+
+        if 'page' in request.args:
+            page = request.args.get('page', 1, type=int)
+            analyses = query.order_by(
+                Analysis.timestamp.desc(), Analysis.id.desc()
+            ).paginate(page=page, per_page=per_page)
+            pagination = {
+                'has_next': analyses.has_next,
+                'has_prev': analyses.has_prev,
+                'page': page,
+                'total_pages': analyses.pages
+            }
+        else:
+            try:
+                analyses = keyset_paginate(
+                    query, Analysis.timestamp, Analysis.id,
+                    after=request.args.get('after'),
+                    per_page=per_page,
+                    count=request.args.get('count', type=int) == 1
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            pagination = {
+                'has_next': analyses.has_next,
+                'next_cursor': analyses.next_cursor
+            }
+            if analyses.total is not None:
+                pagination['total'] = analyses.total
         
         history = []
         for analysis in analyses.items:
@@ -558,25 +850,120 @@ def get_history():
             
             history.append({
                 'id': analysis.id,
-                'date': analysis.created_at.strftime('%Y-%m-%d %H:%M'),  # Use created_at
+                'date': analysis.timestamp.strftime('%Y-%m-%d %H:%M'),
                 'text_preview': text_preview,
                 'full_text': analysis.text,
                 'sentiment': analysis.sentiment,
                 'confidence': analysis.confidence
             })
         
-        return jsonify({
-            'history': history,
-            'has_next': analyses.has_next,
-            'has_prev': analyses.has_prev,
-            'page': page,
-            'total_pages': analyses.pages
-        })
+        return jsonify({'history': history, **pagination})
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500    
 
-@app.route('/screening-history')
+@main.route('/api/search')
+@login_required
+def search_entries():
+    """Full-text search over the current user's journal entries"""
+    query = request.args.get('q', '')
+    if not search.parse_terms(query):
+        return jsonify({'error': 'Query must contain at least one word'}), 400
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 50)
+
+    wait_for_own_writes()
+    backend, hits, has_more, truncated = search.search(current_user.id, query, limit=per_page,
+                                                       offset=(page - 1) * per_page)
+    return jsonify({
+        'query': query,
+        'backend': backend,
+        'page': page,
+        'has_next': has_more,
+        # Only the newest search.MAX_CANDIDATES matches were ranked; older ones follow by date
+        'truncated': truncated,
+        'results': hits
+    })
+
+@main.route('/api/export')
+@login_required
+def export_data():
+    """Stream the current user's analyses, screenings and support history
+
+    ?format=ndjson|csv (default ndjson), ?gzip=1 for a .gz file,
+    ?start=/?end= ISO dates (inclusive), ?resume=<type>:<id> to continue
+    after the last record a broken download received. See export.py.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in export.FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(export.FORMATS)}"}), 400
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+
+    try:
+        start = rollups.parse_date(request.args.get('start'), None)
+        end = rollups.parse_date(request.args.get('end'), None)
+    except ValueError:
+        return jsonify({'error': 'start and end must be YYYY-MM-DD dates'}), 400
+    start = datetime.combine(start, datetime.min.time()) if start else None
+    end = datetime.combine(end + timedelta(days=1), datetime.min.time()) if end else None
+
+    wait_for_own_writes()
+    try:
+        after = export.resume_position(current_user.id, request.args['resume']) if request.args.get('resume') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    filename = f'export-{datetime.utcnow():%Y%m%d}.{fmt}' + ('.gz' if compress else '')
+    body = export.export(current_user.id, fmt, compress, start, end, after,
+                         current_app.config['EXPORT_CHUNK_ROWS'])
+    return current_app.response_class(
+        stream_with_context(body),
+        mimetype='application/gzip' if compress else export.FORMATS[fmt],
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Cache-Control': 'no-store',
+            'X-Accel-Buffering': 'no'
+        })
+
+@main.route('/api/timeline')
+@login_required
+def timeline():
+    """Charting series from the per-user rollups
+
+    ?metrics=mood,epds,sleep,confidence,sentiment (default mood),
+    ?start=/?end= ISO dates (default: the last 90 days), ?points=N caps
+    the number of points per series (default 120, max 1000), and
+    ?bucket=day|week forces the granularity.
+    """
+    requested = [m for m in request.args.get('metrics', 'mood').split(',') if m]
+    unknown = [m for m in requested if m not in rollups.METRICS]
+    if not requested or unknown:
+        return jsonify({'error': f"Unknown metrics: {', '.join(unknown)}; choose from {', '.join(rollups.METRICS)}"}), 400
+
+    bucket = request.args.get('bucket')
+    if bucket not in (None, 'day', 'week'):
+        return jsonify({'error': 'bucket must be day or week'}), 400
+    points = max(1, min(request.args.get('points', 120, type=int), 1000))
+
+    try:
+        end = rollups.parse_date(request.args.get('end'), datetime.utcnow().date())
+        start = rollups.parse_date(request.args.get('start'), end - timedelta(days=89))
+    except ValueError:
+        return jsonify({'error': 'start and end must be YYYY-MM-DD dates'}), 400
+    if start > end:
+        return jsonify({'error': 'start is after end'}), 400
+
+    wait_for_own_writes()
+    bucket, step_days, data = rollups.series(current_user.id, requested, start, end, points=points, bucket=bucket)
+    return jsonify({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'bucket': bucket,
+        'step_days': step_days,
+        'series': data
+    })
+
+@main.route('/screening-history')
 @login_required
 def screening_history():
     """View past screening results"""
@@ -602,12 +989,9 @@ def screening_history():
 def analyze_text_sentiment(text):
     # Replace this with your actual sentiment analysis logic
     # This is a placeholder implementation
-    negative_words = ['hate', 'not feeling', 'sad', 'depressed', 'anxious', 'tired']
-    positive_words = ['happy', 'good', 'great', 'excited', 'joy', 'love']
-    
-    text_lower = text.lower()
-    negative_count = sum(1 for word in negative_words if word in text_lower)
-    positive_count = sum(1 for word in positive_words if word in text_lower)
+    lexicons = services().lexicons
+    negative_count = lexicons['negative'].score(text)
+    positive_count = lexicons['positive'].score(text)
     
     if negative_count > positive_count:
         return "Negative", 80.0
@@ -617,17 +1001,17 @@ def analyze_text_sentiment(text):
         return "Neutral", 70.0
 
 # === ERROR HANDLERS (KEEP THESE AFTER THE NEW ROUTES) ===
-@app.errorhandler(404)
+@main.app_errorhandler(404)
 def page_not_found(e):
     return render_verified('errors/404.html'), 404
 
-@app.errorhandler(500)
+@main.app_errorhandler(500)
 def internal_server_error(e):
     db.session.rollback()
     return render_verified('errors/500.html'), 500
 
 # API Endpoint (unchanged)
-@app.route('/api/analyze', methods=['POST'])
+@main.route('/api/analyze', methods=['POST'])
 @login_required
 def analyze():
     data = request.get_json()
@@ -635,8 +1019,7 @@ def analyze():
         return jsonify({'error': 'Missing text parameter'}), 400
         
     text = data['text']
-    analysis = TextBlob(text)
-    sentiment, confidence = determine_sentiment(text, analysis.sentiment.polarity)
+    sentiment, confidence = score_sentiment(text)
     
     return jsonify({
         'text': text,
@@ -645,13 +1028,36 @@ def analyze():
         'user_id': current_user.id
     })
 
-@app.route('/ppd-screening')  # or @app.route('/ppd-screening', methods=['GET', 'POST'])
+@main.route('/ppd-screening')  # or @main.route('/ppd-screening', methods=['GET', 'POST'])
 @login_required
 def ppd_screening():
     pass
     # Your current code here
 
-@app.route('/submit-screening', methods=['POST'])
+def save_screening(user_id, responses, total_score, result_category, q10_score, rule_set=None):
+    """Add a ScreeningSession and its answers to the current transaction
+
+    responses maps question number to answer value. The answers go in as
+    one multi-row INSERT rather than one ORM object per question.
+    rule_set is the version of the thresholds behind result_category.
+    """
+    session_record = ScreeningSession(
+        user_id=user_id,
+        total_score=total_score,
+        result_category=result_category,
+        q10_score=q10_score,
+        rule_set=rule_set
+    )
+    db.session.add(session_record)
+    db.session.flush()  # Get session ID
+
+    db.session.execute(db.insert(ScreeningResponse), [
+        {'session_id': session_record.id, 'question_number': q_num, 'answer_value': answer}
+        for q_num, answer in responses.items()
+    ])
+    return session_record
+
+@main.route('/submit-screening', methods=['POST'])
 @login_required
 def submit_screening():
     """Process EPDS questionnaire"""
@@ -664,66 +1070,46 @@ def submit_screening():
             answer = request.form.get(f'q{i}', type=int)
             if answer is None:
                 flash(f'Please answer question {i}', 'error')
-                return redirect(url_for('ppd_screening'))
+                return redirect(url_for('main.ppd_screening'))
             
             responses[i] = answer
             total_score += answer
         
         q10_score = responses[10]
         
-        # Determine result category
-        if q10_score >= 1:
-            result_category = 'psychosis_warning'
-        elif total_score >= 10:
-            result_category = 'ppd'
-        else:
-            result_category = 'baby_blues'
+        scoring_rules = services().scoring_rules
+        result_category = scoring_rules.categorize(total_score, q10_score)
         
         # Save to database
-        session_record = ScreeningSession(
-            user_id=current_user.id,
-            total_score=total_score,
-            result_category=result_category,
-            q10_score=q10_score
-        )
-        db.session.add(session_record)
-        db.session.flush()  # Get session ID
-        
-        # Save individual responses
-        for q_num, answer in responses.items():
-            response = ScreeningResponse(
-                session_id=session_record.id,
-                question_number=q_num,
-                answer_value=answer
-            )
-            db.session.add(response)
-        
+        save_screening(current_user.id, responses, total_score, result_category, q10_score,
+                       rule_set=scoring_rules.version)
         db.session.commit()
         
-        # Store in session for results page
-        session['screening_result'] = {
+        # Store server side for results page; the session only holds a token
+        session['screening_result'] = services().result_store.put({
+            'user_id': current_user.id,
             'score': total_score,
             'category': result_category,
             'q10_score': q10_score,
             'date': datetime.utcnow().strftime('%Y-%m-%d %H:%M')
-        }
+        })
         
         # Redirect to results page
-        return redirect(url_for('screening_results'))
+        return redirect(url_for('main.screening_results'))
         
     except Exception as e:
         db.session.rollback()
         flash(f'Error processing screening: {str(e)}', 'error')
-        return redirect(url_for('ppd_screening'))
+        return redirect(url_for('main.ppd_screening'))
 
-@app.route('/screening-results')
+@main.route('/screening-results')
 @login_required
 def screening_results():
     """Display enhanced EPDS screening results"""
-    result = session.get('screening_result')
+    result = load_result('screening_result')
     if not result:
         flash('No screening results found', 'error')
-        return redirect(url_for('ppd_screening'))
+        return redirect(url_for('main.ppd_screening'))
     
     # Get score and date
     score = result.get('score', 15)
@@ -752,42 +1138,313 @@ def screening_results():
     """
 
 
-@app.route('/test-screen')
+@main.route('/test-screen')
 def test_screen():
     """Test PPD screening without login"""
     return "<h1 style='color: green;'>✅ TEST PAGE WORKING!</h1><p>If you see this, it's fixed!</p>"
 
-# Error Handlers (modified to use render_verified)
-@app.errorhandler(404)
-def page_not_found(e):
-    return render_verified('errors/404.html'), 404
-
-@app.errorhandler(500)
-def internal_server_error(e):
-    db.session.rollback()
-    return render_verified('errors/500.html'), 500
-
 # Permanent debug route
-@app.route('/template-info')
+@main.route('/template-info')
 def template_info():
     """Permanent template debugging endpoint"""
     templates = {
         'base_directory': str(TEMPLATE_DIR),
-        'verified_templates': app.config.get('VERIFIED_TEMPLATES', {}),
-        'search_paths': list(app.jinja_loader.searchpath)
+        'verified_templates': dict(services().template_registry.paths),
+        'search_paths': list(current_app.jinja_loader.searchpath)
     }
     return jsonify(templates)
 
-# Initialize database (unchanged)
+@main.route('/cache-info')
+def cache_info():
+    """Hit/miss counters for every in-process cache"""
+    app_services = services()
+    return jsonify({
+        'sentiment': app_services.sentiment_cache.stats(),
+        'dashboard': app_services.dashboard_cache.stats(),
+        'user': app_services.user_cache.stats() if app_services.user_cache is not None else None,
+        'page': app_services.page_cache.stats() if app_services.page_cache is not None else None,
+        'write_behind': app_services.analysis_writer.stats() if app_services.analysis_writer is not None else None
+    })
+
+@main.route('/metrics')
+def metrics_endpoint():
+    """Request metrics in Prometheus text format"""
+    request_metrics = services().request_metrics
+    if request_metrics is None:
+        raise NotFound()
+    return current_app.response_class(request_metrics.render(),
+                                      mimetype='text/plain; version=0.0.4')
+
+@main.route('/sentiment-cache-info')
+def sentiment_cache_info():
+    """Hit/miss/eviction counters for the polarity cache"""
+    sentiment_pool = services().sentiment_pool
+    stats = services().sentiment_cache.stats()
+    stats['offload'] = sentiment_pool.stats() if sentiment_pool is not None else None
+    return jsonify(stats)
+
+def init_services(app):
+    """Build the app's caches and helpers from its config into app.extensions['services']"""
+    # Kept per app, so apps created side by side do not share or rewire them
+    services = app.extensions['services'] = SimpleNamespace()
+
+    # Keyword lexicons are compiled once and shared by every caller
+    services.lexicons = load_lexicons(app.config['LEXICON_DIR'])
+
+    # Polarity scores shared by every request handler in this process
+    services.sentiment_cache = SentimentCache(
+        maxsize=app.config['SENTIMENT_CACHE_SIZE'],
+        ttl=app.config['SENTIMENT_CACHE_TTL'],
+        db_path=app.config['SENTIMENT_CACHE_DB']
+    )
+
+    # Optional worker processes so scoring does not hold the request thread's GIL
+    services.sentiment_pool = SentimentPool(
+        size=app.config['SENTIMENT_POOL_SIZE'],
+        timeout=app.config['SENTIMENT_TIMEOUT']
+    ) if app.config['SENTIMENT_OFFLOAD'] else None
+
+    # Pay the ~0.5 s TextBlob load in the background instead of on the first chat turn
+    if app.config['SENTIMENT_WARMUP']:
+        threading.Thread(target=warm_sentiment, args=(services.sentiment_pool,),
+                         name='sentiment-warmup', daemon=True).start()
+
+    # Per-user dashboard numbers, dropped whenever that user stores an analysis.
+    # Other worker processes may serve a stale copy for up to DASHBOARD_CACHE_TTL.
+    services.dashboard_cache = TTLCache(
+        maxsize=app.config['DASHBOARD_CACHE_SIZE'],
+        ttl=app.config['DASHBOARD_CACHE_TTL']
+    )
+
+    # Each template name is verified once and memoized; with TEMPLATES_AUTO_RELOAD
+    # the registry is rebuilt when files are added, removed or renamed
+    services.template_registry = TemplateRegistry(
+        TEMPLATE_DIR,
+        verify_template,
+        auto_reload=app.config['TEMPLATES_AUTO_RELOAD']
+    )
+
+    # Result page payloads, kept server side and referenced from the session by token
+    services.result_store = create_result_store(app.config['RESULT_STORE'], ttl=app.config['RESULT_STORE_TTL'])
+
+    # Logged-in user principals, so @login_required pages skip the user query
+    services.user_cache = TTLCache(
+        maxsize=app.config['USER_CACHE_SIZE'],
+        ttl=app.config['USER_CACHE_TTL']
+    ) if app.config['USER_CACHE_TTL'] > 0 else None
+
+    # Write-behind for analyses and chat turns; readers wait on their own rows
+    services.analysis_writer = WriteBehindQueue(
+        lambda rows: write_analysis_batch(app, rows),
+        maxsize=app.config['WRITE_BEHIND_QUEUE_SIZE'],
+        batch_size=app.config['WRITE_BEHIND_BATCH_SIZE'],
+        linger=app.config['WRITE_BEHIND_LINGER_MS'] / 1000,
+        put_timeout=app.config['WRITE_BEHIND_PUT_TIMEOUT']
+    ) if app.config['ANALYSIS_WRITE_BEHIND'] or app.config['CHAT_ASYNC_PERSIST'] else None
+
+    # EPDS thresholds for new screenings; raises ValueError for an unknown version
+    services.scoring_rules = get_rule_set(app.config['EPDS_RULE_SET'])
+
+    # Per-endpoint latency, query and render histograms for /metrics
+    services.request_metrics = metrics.RequestMetrics() if app.config['METRICS_ENABLED'] else None
+
+    # Rendered resource pages, keyed by template and user
+    services.page_cache = TTLCache(
+        maxsize=app.config['PAGE_CACHE_SIZE'],
+        ttl=app.config['PAGE_CACHE_TTL']
+    ) if app.config['PAGE_CACHE_TTL'] > 0 else None
+
+# Initialize database
 def create_tables():
-    with app.app_context():
-        db.create_all()
+    db.create_all()
 
 def reset_database():
-    with app.app_context():
-        db.drop_all()
-        db.create_all()
-        print("Database reset complete!")
+    db.drop_all()
+    db.create_all()
+
+@click.command('init-db')
+def init_db_command():
+    """Create any missing database tables."""
+    create_tables()
+    click.echo('Database tables created.')
+
+@click.command('reset-db')
+@click.confirmation_option(prompt='This deletes all data. Continue?')
+def reset_db_command():
+    """Drop and recreate every database table."""
+    reset_database()
+    click.echo('Database reset complete!')
+
+@click.command('import-screenings')
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', type=click.IntRange(min=1), default=None,
+              help='Rows per INSERT/commit (default: IMPORT_BATCH_SIZE).')
+@click.option('--user', 'username', default=None,
+              help='Attach the imported sessions to this user.')
+def import_screenings_command(paths, batch_size, username):
+    """Stream EPDS survey CSV exports (.csv or .csv.gz) into the database."""
+    batch_size = batch_size or current_app.config['IMPORT_BATCH_SIZE']
+    user_id = None
+    if username is not None:
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f'No such user: {username}')
+        user_id = user.id
+
+    for path in paths:
+        try:
+            stats = import_screenings(path, batch_size=batch_size, user_id=user_id, rules=services().scoring_rules)
+        except ValueError as e:
+            raise click.ClickException(f'{path}: {e}')
+        click.echo(
+            f'{path}: imported {stats.imported} of {stats.rows} rows '
+            f'({stats.blank} blank, {stats.invalid} invalid) in {stats.elapsed:.2f}s, '
+            f'{stats.rows_per_second:,.0f} rows/s'
+        )
+
+@click.command('rescore-screenings')
+@click.option('--rules', 'version', default=None,
+              help='Rule set version to apply (default: EPDS_RULE_SET).')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=50000, show_default=True)
+@click.option('--dry-run', is_flag=True, help='Report the changes without writing them.')
+def rescore_screenings_command(version, chunk_size, dry_run):
+    """Recategorise stored screenings under an EPDS rule set."""
+    try:
+        rules = get_rule_set(version or current_app.config['EPDS_RULE_SET'])
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    report = rescore_sessions(rules, chunk_size=chunk_size, dry_run=dry_run)
+    verb = 'would change' if dry_run else 'changed'
+    click.echo(
+        f'{rules.version}: checked {report.checked} sessions, {verb} {report.changed} '
+        f'in {report.elapsed:.2f}s ({report.unscorable} without scores)'
+    )
+    for (old, new), count in sorted(report.transitions.items(), key=lambda item: -item[1]):
+        click.echo(f'  {old or "(none)"} -> {new}: {count}')
+
+@click.command('rebuild-rollups')
+@click.option('--user', 'username', default=None, help='Only rebuild this user.')
+def rebuild_rollups_command(username):
+    """Recompute the chart rollups from the source tables."""
+    user_id = None
+    if username is not None:
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f'No such user: {username}')
+        user_id = user.id
+    rows = rollups.rebuild(user_id)
+    click.echo(f'Rolled up {rows} rows.')
+
+@click.command('backfill-search')
+def backfill_search_command():
+    """Create the journal search index if needed and index every entry."""
+    start = time.perf_counter()
+    try:
+        rows = search.rebuild(db.session.connection())
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    db.session.commit()
+    click.echo(f'Indexed {rows} entries in {time.perf_counter() - start:.1f}s.')
+
+def dataset_snapshot_name(path):
+    """Directory name for a dataset snapshot, e.g. 'post_natal_data'"""
+    stem = Path(path).name.split('.')[0]
+    return ''.join(c if c.isalnum() else '_' for c in stem.lower()).strip('_')
+
+@click.command('cohort-snapshot')
+@click.option('--dataset', 'datasets', multiple=True, type=click.Path(exists=True, dir_okay=False),
+              help='Also snapshot this research CSV (repeatable).')
+def cohort_snapshot_command(datasets):
+    """Write screening data (and research CSVs) as memory-mapped columns."""
+    from cohort import snapshot_dataset, snapshot_screenings
+
+    cohort_dir = Path(current_app.config['COHORT_DIR'])
+    rows = snapshot_screenings(cohort_dir / 'screenings')
+    click.echo(f'screenings: {rows} sessions -> {cohort_dir / "screenings"}')
+    for path in datasets:
+        target = cohort_dir / 'datasets' / dataset_snapshot_name(path)
+        try:
+            rows = snapshot_dataset(path, target)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f'{path}: {rows} rows -> {target}')
+
+@click.command('cohort-stats')
+@click.argument('name', default='screenings')
+def cohort_stats_command(name):
+    """Print aggregates from a snapshot (screenings or datasets/<name>)."""
+    from cohort import CohortSnapshot
+
+    path = Path(current_app.config['COHORT_DIR']) / name
+    if not (path / 'meta.json').exists():
+        raise click.ClickException(f'No snapshot at {path}; run `flask cohort-snapshot` first')
+    snapshot = CohortSnapshot(path)
+    click.echo(f"{name}: {snapshot.rows} rows, written {snapshot.meta['created']}")
+    for prefix in ('epds_', 'hads_', 'cbts_'):
+        for column, mean in snapshot.question_means(prefix).items():
+            click.echo(f"  mean {column:<10} {'-' if mean is None else f'{mean:.2f}'}")
+    if 'category' in snapshot.columns:
+        for month, share in snapshot.monthly_share('ppd').items():
+            click.echo(f'  ppd share {month}  {share:.1%}')
+
+def create_app(config=None):
+    """Application factory
+
+    config may be a mapping or a config class; its values override Config.
+    Importing this module does no I/O; everything happens here.
+    """
+    if not TEMPLATE_DIR.exists():
+        raise RuntimeError(f"Templates folder missing at {TEMPLATE_DIR}")
+
+    app = Flask(__name__, template_folder=str(TEMPLATE_DIR))
+    app.config.from_object(Config)
+    if isinstance(config, dict):
+        app.config.from_mapping(config)
+    elif config is not None:
+        app.config.from_object(config)
+
+    configure_logging(
+        level=app.config['LOG_LEVEL'],
+        levels=parse_levels(app.config['LOG_LEVELS']),
+        json_output=app.config['LOG_JSON'],
+        debug_sample_rate=app.config['LOG_DEBUG_SAMPLE_RATE']
+    )
+
+    # Explicit SQLALCHEMY_ENGINE_OPTIONS win over the DB_PROFILE defaults
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    db.init_app(app)
+    apply_profile(app, db)
+    migrate.init_app(app, db, include_object=search.include_object)
+    login_manager.init_app(app)
+    init_services(app)
+    request_metrics = app.extensions['services'].request_metrics
+    if request_metrics is not None:
+        metrics.install(app, db, request_metrics)
+
+    app.register_blueprint(main)
+
+    if not app.config['TEMPLATES_AUTO_RELOAD']:
+        precompile_templates(app)
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(reset_db_command)
+    app.cli.add_command(import_screenings_command)
+    app.cli.add_command(rescore_screenings_command)
+    app.cli.add_command(cohort_snapshot_command)
+    app.cli.add_command(rebuild_rollups_command)
+    app.cli.add_command(backfill_search_command)
+    app.cli.add_command(cohort_stats_command)
+
+    # Template path details, only gathered when someone is listening
+    if logger.isEnabledFor(logging.DEBUG):
+        resources_dir = TEMPLATE_DIR / 'resources'
+        logger.debug('Template paths', extra={
+            'base_dir': str(BASE_DIR),
+            'template_dir': str(TEMPLATE_DIR),
+            'resource_templates': sorted(f.name for f in resources_dir.glob('*')) if resources_dir.exists() else None
+        })
+
+    return app
 
 if __name__ == '__main__':
     # Validate directory structure
@@ -817,5 +1474,8 @@ if __name__ == '__main__':
                 f.write(content)
             print(f"Created template: {template}")
 
-    create_tables()
+    app = create_app()
+    with app.app_context():
+        create_tables()
+    preload_templates()
     app.run(debug=True)
\ No newline at end of file
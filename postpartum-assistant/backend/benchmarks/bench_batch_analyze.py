@@ -0,0 +1,44 @@
+"""Compare N sequential /api/analyze calls with one /api/analyze/batch call.
+
+Usage: python benchmarks/bench_batch_analyze.py [count]
+"""
+import random
+import sys
+
+from harness import load_app, logged_in_client, timed
+
+SAMPLE_TEXTS = [
+    "I feel happy and excited about the baby today",
+    "Not feeling like myself, tired and anxious all the time",
+    "Had a good walk in the park, the weather was great",
+    "I am so sad and depressed, nothing helps",
+    "Quiet day at home, fed the baby and took a nap",
+]
+
+
+def main(count=1000):
+    flask_app = load_app()
+    client = logged_in_client(flask_app)
+    texts = [random.choice(SAMPLE_TEXTS) for _ in range(count)]
+
+    def sequential():
+        for text in texts:
+            response = client.post('/api/analyze', json={'text': text})
+            assert response.status_code == 200, response.get_json()
+
+    def batch():
+        response = client.post('/api/analyze/batch', json={'texts': texts})
+        assert response.status_code == 200, response.get_json()
+        assert response.get_json()['stored'] == count
+
+    sequential_time, _ = timed(sequential)
+    batch_time, _ = timed(batch)
+
+    print(f"texts:          {count}")
+    print(f"sequential:     {sequential_time:.3f}s ({count / sequential_time:,.0f} texts/s)")
+    print(f"batch:          {batch_time:.3f}s ({count / batch_time:,.0f} texts/s)")
+    print(f"speedup:        {sequential_time / batch_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
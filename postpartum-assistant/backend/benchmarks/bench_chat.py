@@ -0,0 +1,61 @@
+"""Server time per chatbot turn: the old form POST to /analyze (commit,
+then redirect) against /api/chat as JSON and as an event stream, with
+synchronous commits (ANALYSIS_WRITE_BEHIND and CHAT_ASYNC_PERSIST off)
+and with write-behind.
+
+Messages cycle through a small set, as chat turns repeat, so polarity
+comes from the warm cache after the first round.
+
+Usage: python benchmarks/bench_chat.py [turns]
+"""
+import sys
+import time
+
+from harness import load_app, logged_in_client
+
+MESSAGES = (
+    "I feel so tired and sad today",
+    "Had a good walk with the baby this morning",
+    "Not sure how I feel, just checking in",
+    "Nobody seems to understand what I'm going through",
+)
+
+
+def percentiles(client, turns, send):
+    latencies = []
+    for i in range(turns):
+        start = time.perf_counter()
+        response = send(client, MESSAGES[i % len(MESSAGES)])
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code in (200, 302), response.status_code
+    latencies.sort()
+    return latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.95) - 1] * 1000
+
+
+def form_post(client, text):
+    return client.post('/analyze', data={'text': text})
+
+
+def chat_json(client, text):
+    return client.post('/api/chat', json={'text': text})
+
+
+def chat_stream(client, text):
+    response = client.post('/api/chat', json={'text': text}, headers={'Accept': 'text/event-stream'})
+    response.get_data()  # drain the stream
+    return response
+
+
+def main(turns=500):
+    for label, write_behind in (('sync commit', False), ('write-behind', True)):
+        flask_app = load_app(ANALYSIS_WRITE_BEHIND=write_behind, CHAT_ASYNC_PERSIST=write_behind)
+        client = logged_in_client(flask_app, username='chatter')
+        chat_json(client, 'warm up')
+        for name, send in (('POST /analyze', form_post), ('/api/chat json', chat_json),
+                           ('/api/chat sse', chat_stream)):
+            median, p95 = percentiles(client, turns, send)
+            print(f"{label:<13} {name:<15} median {median:5.2f} ms  p95 {p95:5.2f} ms")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
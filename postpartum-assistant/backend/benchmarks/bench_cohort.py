@@ -0,0 +1,107 @@
+"""Cohort aggregates: ORM row walking vs the memory-mapped snapshot.
+
+Part 1 seeds a scratch database, times `snapshot_screenings()` and
+compares mean answer per question and monthly `ppd` share computed from
+ORM rows against the same numbers from the snapshot.
+
+Part 2 writes a synthetic snapshot of SESSIONS x 10 answers (10M by
+default) and times the aggregates on it.
+
+Usage: python benchmarks/bench_cohort.py [seed_sessions] [snapshot_sessions]
+"""
+import os
+import shutil
+import sys
+import tempfile
+from collections import defaultdict
+
+import numpy as np
+
+from harness import load_app, timed
+from bench_import import write_export
+from cohort import CATEGORIES, EPDS_COLUMNS, CohortSnapshot, _SnapshotWriter, snapshot_screenings
+from importer import import_screenings
+from models import ScreeningSession, ScreeningResponse
+
+
+def orm_aggregates():
+    """What a population query costs through the ORM today"""
+    sums, counts = defaultdict(int), defaultdict(int)
+    for response in ScreeningResponse.query.yield_per(10000):
+        sums[response.question_number] += response.answer_value
+        counts[response.question_number] += 1
+    means = {f'epds_{q}': sums[q] / counts[q] for q in sorted(sums)}
+
+    months, hits = defaultdict(int), defaultdict(int)
+    for session in ScreeningSession.query.yield_per(10000):
+        month = session.created_at.strftime('%Y-%m')
+        months[month] += 1
+        hits[month] += session.result_category == 'ppd'
+    return means, {month: hits[month] / months[month] for month in sorted(months)}
+
+
+def snapshot_aggregates(path):
+    snapshot = CohortSnapshot(path)
+    return snapshot.question_means(), snapshot.monthly_share('ppd')
+
+
+def compare(seed_sessions, workdir):
+    csv_path = os.path.join(workdir, 'seed.csv')
+    write_export(csv_path, seed_sessions)
+    flask_app = load_app()
+    with flask_app.app_context():
+        import_screenings(csv_path)
+        target = os.path.join(workdir, 'screenings')
+        elapsed, rows = timed(snapshot_screenings, target)
+        print(f"snapshot       {rows:>10,} sessions in {elapsed:6.2f}s")
+
+        orm_time, orm_result = timed(orm_aggregates)
+    snap_time, snap_result = timed(snapshot_aggregates, target)
+    assert orm_result[1] == snap_result[1]
+    assert all(abs(orm_result[0][k] - snap_result[0][k]) < 1e-9 for k in orm_result[0])
+    print(f"orm aggregates {orm_time * 1000:10.1f} ms")
+    print(f"snapshot aggs  {snap_time * 1000:10.1f} ms (cold open, same results)")
+
+
+def synthetic(sessions, workdir):
+    rng = np.random.default_rng(0)
+    dtypes = {'created_at': 'datetime64[s]', 'total_score': np.int16, 'category': np.int8,
+              **{name: np.int8 for name in EPDS_COLUMNS}}
+    target = os.path.join(workdir, 'synthetic')
+    writer = _SnapshotWriter(target, sessions, dtypes, {'source': 'synthetic', 'categories': list(CATEGORIES)})
+    total = np.zeros(sessions, dtype=np.int16)
+    for name in EPDS_COLUMNS:
+        answers = rng.integers(0, 4, sessions, dtype=np.int8)
+        answers[rng.random(sessions) < 0.01] = -1
+        writer.arrays[name][:] = answers
+        total += np.maximum(answers, 0)
+    writer.arrays['total_score'][:] = total
+    writer.arrays['category'][:] = np.where(total >= 10, 1, 0)
+    start = np.datetime64('2023-01-01T00:00:00', 's').astype(np.int64)
+    writer.arrays['created_at'][:] = (start + rng.integers(0, 3 * 365 * 86400, sessions)).astype('datetime64[s]')
+    writer.finish(sessions)
+
+    snapshot = CohortSnapshot(target)
+    for label, fn in (
+        ('question_means', snapshot.question_means),
+        ('monthly_share', lambda: snapshot.monthly_share('ppd')),
+        ('score_distribution', snapshot.score_distribution),
+        ('ppd means in 2024', lambda: snapshot.question_means(
+            mask=snapshot.category_mask('ppd') & snapshot.date_mask('2024-01-01', '2025-01-01'))),
+    ):
+        elapsed, _ = timed(fn)
+        print(f"{label:<20}{elapsed * 1000:8.1f} ms over {sessions * 10:,} answers")
+
+
+def main(seed_sessions=20000, snapshot_sessions=1000000):
+    workdir = tempfile.mkdtemp(prefix='ppd-bench-cohort-')
+    try:
+        compare(seed_sessions, workdir)
+        synthetic(snapshot_sessions, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,56 @@
+"""Concurrent Analysis inserts under the default and production DB profiles.
+
+Several threads each insert and commit rows one at a time, the way
+analyze_form does, against a fresh SQLite file per profile. Reports
+throughput and how many commits failed with "database is locked".
+
+Usage: python benchmarks/bench_db_profile.py [rows_per_thread] [threads]
+"""
+import sys
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from harness import load_app, logged_in_client
+from models import db, Analysis
+
+
+def run(flask_app, per_thread, threads):
+    failures = []
+    lock = threading.Lock()
+
+    def writer():
+        with flask_app.app_context():
+            for i in range(per_thread):
+                db.session.add(Analysis(user_id=1, text=f'entry {i}',
+                                        sentiment='neutral', confidence=0.5))
+                try:
+                    db.session.commit()
+                except OperationalError as e:
+                    db.session.rollback()
+                    with lock:
+                        failures.append(str(e.orig))
+
+    workers = [threading.Thread(target=writer) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start, failures
+
+
+def main(per_thread=300, threads=8):
+    for profile in ('default', 'production'):
+        flask_app = load_app(DB_PROFILE=profile)
+        logged_in_client(flask_app)
+        elapsed, failures = run(flask_app, per_thread, threads)
+        attempted = per_thread * threads
+        print(f"{profile:<11}{(attempted - len(failures)) / elapsed:8,.0f} commits/s  "
+              f"{len(failures)}/{attempted} failed"
+              + (f"  ({failures[0]})" if failures else ''))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,98 @@
+"""Memory and throughput of GET /api/export as one user's history grows.
+
+For each history size the script bulk-inserts that many analyses (plus a
+screening per 20 entries) for a fresh user, then streams the NDJSON and
+gzipped CSV exports through the test client chunk by chunk. It reports
+rows/s, output size and peak traced Python memory, next to the peak for
+the naive Analysis.query.filter_by(user_id=...).all() plus one
+jsonify'd list. The streaming peak should stay flat while the naive one
+grows with the history.
+
+Usage: python benchmarks/bench_export.py [entries,...]
+"""
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from flask import jsonify
+
+from harness import load_app, logged_in_client
+from models import db, User, Analysis, ScreeningResponse
+from importer import insert_session_rows
+
+SIZES = (10000, 100000, 300000)
+
+
+def seed_user(flask_app, username, entries):
+    client = logged_in_client(flask_app, username)
+    end = datetime.utcnow()
+    with flask_app.app_context():
+        user_id = db.session.scalar(db.select(User.id).where(User.username == username))
+        for first in range(0, entries, 10000):
+            db.session.execute(Analysis.__table__.insert(), [
+                {'user_id': user_id, 'text': f'Entry {n}: tired but the baby slept a little longer today.',
+                 'sentiment': 'neutral', 'confidence': 0.5, 'timestamp': end - timedelta(minutes=n)}
+                for n in range(first, min(first + 10000, entries))
+            ])
+        session_ids = insert_session_rows([
+            {'user_id': user_id, 'total_score': 9, 'q10_score': 0, 'result_category': 'minimal',
+             'rule_set': 'epds-10', 'created_at': end - timedelta(hours=n)}
+            for n in range(entries // 20)
+        ])
+        db.session.execute(ScreeningResponse.__table__.insert(), [
+            {'session_id': session_id, 'question_number': q, 'answer_value': 1}
+            for session_id in session_ids for q in range(1, 11)
+        ])
+        db.session.commit()
+    return client, user_id
+
+
+def stream(client, query):
+    response = client.get(f'/api/export?{query}', buffered=False)
+    size = 0
+    for chunk in response.response:
+        size += len(chunk)
+    response.close()
+    return size
+
+
+def naive(flask_app, user_id):
+    with flask_app.test_request_context():
+        rows = Analysis.query.filter_by(user_id=user_id).all()
+        body = jsonify([{'id': row.id, 'timestamp': row.timestamp.isoformat(), 'text': row.text,
+                         'sentiment': row.sentiment, 'confidence': row.confidence} for row in rows])
+        size = len(body.get_data())
+        db.session.remove()
+    return size
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = fn(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, size, peak
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1].split(',')] if len(sys.argv) > 1 else SIZES
+    flask_app = load_app()
+
+    for entries in sizes:
+        client, user_id = seed_user(flask_app, f'export{entries}', entries)
+        records = entries + entries // 20
+        for label, fn, args in (
+            ('ndjson', stream, (client, 'format=ndjson')),
+            ('csv+gzip', stream, (client, 'format=csv&gzip=1')),
+            ('naive .all()', naive, (flask_app, user_id)),
+        ):
+            elapsed, size, peak = measure(fn, *args)
+            print(f'{entries:>8,} entries  {label:<13} {records / elapsed:>9,.0f} rows/s  '
+                  f'{size / 1e6:7.1f} MB out  peak {peak / 1e6:7.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
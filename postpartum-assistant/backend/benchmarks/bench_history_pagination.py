@@ -0,0 +1,63 @@
+"""OFFSET vs keyset pagination of /api/history for one heavy user.
+
+Usage: python benchmarks/bench_history_pagination.py [analyses]
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+
+from harness import load_app, logged_in_client
+from models import db, Analysis
+
+
+def seed(flask_app, user_id, count):
+    start = datetime(2020, 1, 1)
+    rows = [{
+        'user_id': user_id,
+        'text': f'seeded entry {i}',
+        'sentiment': 'neutral',
+        'confidence': 0.5,
+        'timestamp': start + timedelta(minutes=i)
+    } for i in range(count)]
+    with flask_app.app_context():
+        db.session.execute(db.insert(Analysis), rows)
+        db.session.commit()
+
+
+def time_get(client, url):
+    start = time.perf_counter()
+    response = client.get(url)
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, response.get_json()
+    return elapsed, response.get_json()
+
+
+def main(count=200_000):
+    flask_app = load_app()
+    client = logged_in_client(flask_app)
+    seed(flask_app, 1, count)
+    per_page = 50
+    pages = count // per_page
+
+    print(f"{count:,} analyses, {per_page} per page\n")
+    for page in (1, pages // 2, pages):
+        elapsed, _ = time_get(client, f'/api/history?page={page}&per_page={per_page}')
+        print(f"offset page {page:>6}: {elapsed * 1000:8.2f}ms")
+
+    # Walk the keyset pages, timing the first, middle and last
+    after, page = None, 1
+    start = time.perf_counter()
+    while True:
+        url = f'/api/history?per_page={per_page}' + (f'&after={after}' if after else '')
+        elapsed, body = time_get(client, url)
+        if page in (1, pages // 2, pages):
+            print(f"keyset page {page:>6}: {elapsed * 1000:8.2f}ms")
+        if not body['has_next']:
+            break
+        after, page = body['next_cursor'], page + 1
+    total = time.perf_counter() - start
+    print(f"\nkeyset full walk: {page} pages in {total:.2f}s ({total / page * 1000:.2f}ms/page)")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
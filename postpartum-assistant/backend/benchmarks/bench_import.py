@@ -0,0 +1,63 @@
+"""Throughput and memory of `flask import-screenings` on synthetic EPDS
+exports shaped like the bundled datasets (extra columns, blank padding
+rows, the odd unanswered question).
+
+Peak Python memory is measured in a second, tracemalloc-enabled pass; it
+should stay flat as the file grows.
+
+Usage: python benchmarks/bench_import.py [rows]
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+
+from harness import load_app, timed
+from importer import import_screenings
+
+
+def write_export(path, rows, seed=0):
+    rng = random.Random(seed)
+    header = ['Participant_number', 'Age'] + [f'EPDS_{q}' for q in range(1, 11)] + ['HADS_1', 'HADS_3']
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for n in range(rows):
+            if n % 7 == 0:
+                writer.writerow([''] * len(header))
+                continue
+            answers = [rng.randint(0, 3) for _ in range(10)]
+            if n % 101 == 0:
+                answers[rng.randrange(10)] = ''
+            writer.writerow([n, rng.randint(18, 45)] + answers + [rng.randint(0, 3), rng.randint(0, 3)])
+
+
+def run(rows, batch_size):
+    fd, path = tempfile.mkstemp(suffix='.csv', prefix='ppd-bench-')
+    os.close(fd)
+    try:
+        write_export(path, rows)
+        flask_app = load_app()
+        with flask_app.app_context():
+            elapsed, stats = timed(import_screenings, path, batch_size=batch_size)
+            tracemalloc.start()
+            import_screenings(path, batch_size=batch_size)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    finally:
+        os.remove(path)
+    return rows / elapsed, stats, peak
+
+
+def main(rows=40000):
+    for size in (rows // 4, rows):
+        for batch_size in (500, 5000):
+            per_second, stats, peak = run(size, batch_size)
+            print(f"{size:>9,} rows  batch {batch_size:>5}  {per_second:10,.0f} rows/s  "
+                  f"imported {stats.imported:,}  peak {peak / 2**20:6.1f} MiB")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 40000)
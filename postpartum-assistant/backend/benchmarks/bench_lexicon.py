@@ -0,0 +1,68 @@
+"""Compare the Lexicon matchers with the old per-keyword substring loop.
+
+For each lexicon size: the old loop, the per-term check and the trie
+regex, plus which of the two Lexicon picks at that size
+(lexicon.REGEX_MIN_TERMS).
+
+Usage: python benchmarks/bench_lexicon.py [iterations]
+"""
+import random
+import string
+import sys
+import timeit
+
+from harness import BACKEND_DIR
+import lexicon
+from lexicon import Lexicon, load_lexicons
+
+TEXT = (
+    "Not feeling like myself this week. The baby is lovely and I am happy "
+    "when she sleeps, but I am tired, anxious and a bit sad most evenings. "
+    "My partner has been great and we had a good walk on Sunday."
+) * 4
+
+
+def substring_loop(words):
+    """The matcher analyze_text_sentiment used before lexicons were compiled"""
+    def score(text):
+        text_lower = text.lower()
+        return sum(1 for word in words if word in text_lower)
+    return score
+
+
+def synthetic_terms(count, seed=0):
+    rng = random.Random(seed)
+    terms = set()
+    while len(terms) < count:
+        terms.add(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))))
+    return sorted(terms)
+
+
+def compiled(terms, regex):
+    """Lexicon over terms forced onto the trie regex or the per-term check"""
+    threshold = lexicon.REGEX_MIN_TERMS
+    lexicon.REGEX_MIN_TERMS = 0 if regex else len(terms) + 1
+    try:
+        return Lexicon(dict.fromkeys(terms, 1.0))
+    finally:
+        lexicon.REGEX_MIN_TERMS = threshold
+
+
+def main(iterations=2000):
+    bundled = load_lexicons(BACKEND_DIR / 'lexicons')['negative']
+    cases = [('bundled', list(bundled.weights))]
+    cases += [(f'{n} terms', list(bundled.weights) + synthetic_terms(n)) for n in (50, 100, 200, 500, 1000, 5000)]
+
+    print(f"{'lexicon':<12}{'loop us/call':>14}{'per-term us':>13}{'regex us':>10}  uses")
+    for label, terms in cases:
+        loop = substring_loop(terms)
+        per_term, regex = compiled(terms, regex=False), compiled(terms, regex=True)
+        loop_time, per_term_time, regex_time = (
+            timeit.timeit(lambda: fn(TEXT), number=iterations) / iterations
+            for fn in (loop, per_term.score, regex.score))
+        uses = 'regex' if Lexicon(dict.fromkeys(terms, 1.0)).regex is not None else 'per-term'
+        print(f"{label:<12}{loop_time * 1e6:>14.1f}{per_term_time * 1e6:>13.1f}{regex_time * 1e6:>10.1f}  {uses}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
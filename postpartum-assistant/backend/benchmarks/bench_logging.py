@@ -0,0 +1,71 @@
+"""Throughput of the old print() debugging vs queued JSON logging.
+
+Each of several threads emits the per-analysis debug output the request
+path produces. Output goes to a line-buffered temporary file, which is
+how stdout behaves in a container run with PYTHONUNBUFFERED; the rates
+are what the emitting (request) threads see.
+
+Usage: python benchmarks/bench_logging.py [events_per_thread] [threads]
+"""
+import logging
+import sys
+import tempfile
+import threading
+import time
+
+import harness  # noqa: F401  (puts the backend on sys.path)
+from logging_setup import configure_logging, shutdown_logging
+
+TEXT = "Not feeling like myself today, tired and a bit anxious. " * 5
+
+
+def run_threads(work, threads, per_thread):
+    workers = [threading.Thread(target=work, args=(per_thread,)) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+
+def main(per_thread=5000, threads=8):
+    total = per_thread * threads
+    results = {}
+
+    with tempfile.TemporaryFile('w', buffering=1) as out:
+        def printing(n):
+            for _ in range(n):
+                print("=== DEBUG ===", file=out)
+                print(f"Input text: {TEXT}", file=out)
+                print("TextBlob polarity: -0.25", file=out)
+                print("Determined sentiment: negative", file=out)
+                print("=============", file=out)
+        results['print (old)'] = run_threads(printing, threads, per_thread)
+
+    logger = logging.getLogger('bench')
+
+    def logging_events(n):
+        for _ in range(n):
+            logger.debug('Analyzed journal entry', extra={
+                'text': TEXT, 'polarity': -0.25, 'sentiment': 'negative'})
+
+    for label, rate in (('queue json', 1.0), ('queue json 10%', 0.1)):
+        with tempfile.TemporaryFile('w', buffering=1) as out:
+            configure_logging(level='DEBUG', debug_sample_rate=rate, stream=out)
+            elapsed = run_threads(logging_events, threads, per_thread)
+            shutdown_logging()  # includes draining the queue
+            results[label] = elapsed
+
+    configure_logging(level='INFO', stream=sys.stderr)
+    with tempfile.TemporaryFile('w', buffering=1) as out:
+        results['queue, debug off'] = run_threads(logging_events, threads, per_thread)
+    shutdown_logging()
+
+    print(f"{total:,} events from {threads} threads")
+    for label, elapsed in results.items():
+        print(f"{label:<18}{total / elapsed:12,.0f} events/s")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
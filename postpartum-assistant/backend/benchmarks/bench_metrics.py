@@ -0,0 +1,67 @@
+"""Overhead of the /metrics instrumentation: requests/s for a few pages
+with METRICS_ENABLED off and on, plus the cost of the hooks themselves.
+
+Both apps are built up front and warmed with a discarded pass, then
+timed in alternating rounds (off/on, then on/off, ...) so drift and
+warm-up hit both sides alike; the medians are reported. Test-client
+timings still vary by a few percent, about what the hooks cost.
+
+Usage: python benchmarks/bench_metrics.py [requests]
+"""
+import statistics
+import sys
+import timeit
+
+from harness import load_app, logged_in_client, timed
+import metrics
+
+PAGES = ('/api/history', '/dashboard', '/api/timeline?metrics=mood')
+ROUNDS = 7
+
+
+def setup(enabled):
+    flask_app = load_app(METRICS_ENABLED=enabled)
+    client = logged_in_client(flask_app, username='metrics')
+    client.post('/api/analyze', json={'text': 'A calm afternoon'})
+    return client
+
+
+def run(client, url, requests):
+    def hit():
+        for _ in range(requests):
+            assert client.get(url).status_code == 200
+    return requests / timed(hit)[0]
+
+
+def main(requests=1000):
+    clients = {False: setup(False), True: setup(True)}
+    for client in clients.values():
+        for url in PAGES:
+            run(client, url, requests)  # warm-up, discarded
+
+    rates = {(enabled, url): [] for enabled in clients for url in PAGES}
+    for n in range(ROUNDS):
+        order = (False, True) if n % 2 == 0 else (True, False)
+        for url in PAGES:
+            for enabled in order:
+                rates[enabled, url].append(run(clients[enabled], url, requests))
+
+    for url in PAGES:
+        off = statistics.median(rates[False, url])
+        on = statistics.median(rates[True, url])
+        # Per-round ratios show whether the delta stands out from the noise
+        ratios = sorted(a / b - 1 for a, b in zip(rates[False, url], rates[True, url]))
+        print(f"{url:<28} off {off:7.0f} req/s  on {on:7.0f} req/s  "
+              f"({(off / on - 1) * 100:+.1f}% time, rounds {ratios[0] * 100:+.1f}..{ratios[-1] * 100:+.1f}%)")
+
+    registry = metrics.RequestMetrics()
+    totals = metrics.RequestTotals()
+    token = metrics._current.set(totals)
+    record = timeit.timeit(lambda: registry.record('main.page', 'GET', 200, totals, 0.003, False), number=100000)
+    query = timeit.timeit(lambda: (metrics._before_cursor_execute(*[None] * 6),
+                                   metrics._after_cursor_execute(*[None] * 6)), number=100000)
+    metrics._current.reset(token)
+    print(f"hooks: {record * 10:.2f} us per request recorded, {query * 10:.2f} us per query")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
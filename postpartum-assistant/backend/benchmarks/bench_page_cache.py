@@ -0,0 +1,51 @@
+"""Requests/sec and response bytes on the resource pages with and without
+the rendered-page cache, plus the 304 path for clients that send
+If-None-Match.
+
+Reports the best of RUNS passes to damp scheduler noise.
+
+Usage: python benchmarks/bench_page_cache.py [requests_per_route]
+"""
+import sys
+import time
+
+from harness import load_app, logged_in_client
+
+ROUTES = ('/self-care-guide', '/support-groups', '/emergency-contacts')
+RUNS = 5
+
+
+def run(client, requests, conditional=False):
+    etags = {}
+    if conditional:
+        for route in ROUTES:
+            etags[route] = client.get(route).headers['ETag']
+
+    expected = 304 if conditional else 200
+    sent = 0
+    start = time.perf_counter()
+    for route in ROUTES:
+        headers = {'If-None-Match': etags[route]} if conditional else {}
+        for _ in range(requests):
+            response = client.get(route, headers=headers)
+            assert response.status_code == expected
+            sent += len(response.data)
+    total = requests * len(ROUTES)
+    return total / (time.perf_counter() - start), sent / total
+
+
+def main(requests=1000):
+    cases = (
+        ('render every time', {'PAGE_CACHE_TTL': 0}, False),
+        ('page cache', {'PAGE_CACHE_TTL': 300}, False),
+        ('page cache + 304', {'PAGE_CACHE_TTL': 300}, True),
+    )
+    for label, config, conditional in cases:
+        flask_app = load_app(TEMPLATES_AUTO_RELOAD=False, **config)
+        client = logged_in_client(flask_app)
+        per_second, body_bytes = max(run(client, requests, conditional) for _ in range(RUNS))
+        print(f"{label:<18}{per_second:8,.0f} req/s {body_bytes:8,.0f} body bytes/response")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
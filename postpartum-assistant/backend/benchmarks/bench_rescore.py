@@ -0,0 +1,67 @@
+"""EPDS scoring: scalar loop vs NumPy, and rescoring stored sessions.
+
+Part 1 scores an (n, 10) answer matrix with RuleSet.categorize() in a
+Python loop and with score_answers() + categorize_many().
+
+Part 2 seeds SESSIONS screening_session rows scored under epds-10 and
+times `rescore_sessions()` to epds-13 (dry run, then for real) and back.
+
+Usage: python benchmarks/bench_rescore.py [sessions]
+"""
+import sys
+
+import numpy as np
+
+from harness import load_app, timed
+from models import db, ScreeningSession
+from scoring import get_rule_set, rescore_sessions, score_answers
+
+
+def scalar(rules, answers):
+    return [rules.categorize(sum(row), row[-1]) for row in answers.tolist()]
+
+
+def vectorized(rules, answers):
+    totals, q10 = score_answers(answers)
+    return rules.categorize_many(totals, q10)
+
+
+def seed(rules, answers, chunk=50000):
+    totals, q10 = score_answers(answers)
+    codes = rules.categorize_many(totals, q10)
+    table = ScreeningSession.__table__
+    for start in range(0, len(answers), chunk):
+        db.session.execute(table.insert(), [
+            {'total_score': int(t), 'q10_score': int(q), 'result_category': c, 'rule_set': rules.version}
+            for t, q, c in zip(totals[start:start + chunk], q10[start:start + chunk],
+                               np.array(['baby_blues', 'ppd', 'psychosis_warning'])[codes[start:start + chunk]])
+        ])
+    db.session.commit()
+
+
+def main(sessions=1000000):
+    rng = np.random.default_rng(0)
+    # Skewed towards low answers so the categories are mixed
+    answers = rng.choice(4, size=(sessions, 10), p=[0.45, 0.3, 0.15, 0.1]).astype(np.int8)
+    answers[:, 9] = rng.choice(4, size=sessions, p=[0.9, 0.06, 0.03, 0.01])
+    epds10, epds13 = get_rule_set('epds-10'), get_rule_set('epds-13')
+
+    scalar_time, expected = timed(scalar, epds10, answers)
+    vector_time, codes = timed(vectorized, epds10, answers)
+    assert [('baby_blues', 'ppd', 'psychosis_warning')[c] for c in codes] == expected
+    print(f"scalar loop     {scalar_time:7.2f}s for {sessions:,} sessions")
+    print(f"vectorized      {vector_time:7.2f}s")
+
+    flask_app = load_app()
+    with flask_app.app_context():
+        elapsed, _ = timed(seed, epds10, answers)
+        print(f"seeded          {elapsed:7.2f}s")
+        for label, rules, dry_run in (('dry run 13', epds13, True), ('rescore 13', epds13, False),
+                                      ('rescore 10', epds10, False)):
+            elapsed, report = timed(rescore_sessions, rules, dry_run=dry_run)
+            moves = ', '.join(f'{old}->{new} {count:,}' for (old, new), count in report.transitions.items())
+            print(f"{label:<16}{elapsed:7.2f}s  checked {report.checked:,}  changed {report.changed:,}  {moves}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
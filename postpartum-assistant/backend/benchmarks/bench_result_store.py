@@ -0,0 +1,76 @@
+"""Session cookie size and /results latency with server-side result storage.
+
+For several journal lengths, compares the session cookie the app now sends
+(token only) with the cookie the old code produced (whole payload signed
+into the session), then times /results against each store backend.
+
+Usage: python benchmarks/bench_result_store.py [requests]
+"""
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from harness import load_app, logged_in_client
+
+WORDS = ("baby sleep tired happy calm crying feeding walk partner mother night "
+         "worried grateful anxious morning nap visit doctor lonely hopeful").split()
+
+
+def journal_entry(chars, seed=0):
+    """Varied text; the session serializer compresses, so repetition would flatter it"""
+    rng = random.Random(seed)
+    words = []
+    while sum(len(word) + 1 for word in words) < chars:
+        words.append(rng.choice(WORDS))
+    return ' '.join(words)
+
+
+def cookie_size(client):
+    cookie = client.get_cookie('session')
+    return len(cookie.value) if cookie else 0
+
+
+def legacy_cookie_size(flask_app, client, text):
+    """Size of the signed session the old code stored for this result"""
+    with client.session_transaction() as sess:
+        contents = dict(sess)
+    contents['analysis_results'] = {
+        'text': text, 'sentiment': 'positive', 'confidence': 0.5,
+        'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    return len(serializer.dumps(contents))
+
+
+def main(requests=500):
+    scratch = tempfile.mkdtemp(prefix='ppd-results-')
+    stores = {
+        'memory': 'memory',
+        'sqlite': f'sqlite:///{scratch}/results.db',
+        'file': f'file:///{scratch}/files',
+    }
+
+    print(f"{'text chars':>10}{'old cookie':>12}{'new cookie':>12}")
+    flask_app = load_app(RESULT_STORE='memory')
+    client = logged_in_client(flask_app)
+    for chars in (200, 2000, 5000):
+        text = journal_entry(chars)
+        client.post('/analyze', data={'text': text})
+        print(f"{len(text):>10}{legacy_cookie_size(flask_app, client, text):>12}{cookie_size(client):>12}")
+    print("(browsers cap a single cookie at about 4096 bytes)\n")
+
+    for label, url in stores.items():
+        flask_app = load_app(RESULT_STORE=url)
+        client = logged_in_client(flask_app)
+        client.post('/analyze', data={'text': journal_entry(2000)})
+        start = time.perf_counter()
+        for _ in range(requests):
+            assert client.get('/results').status_code == 200
+        elapsed = time.perf_counter() - start
+        print(f"{label:<8}/results {elapsed / requests * 1000:6.2f}ms/request")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,64 @@
+"""Write throughput of EPDS submissions: one ORM object per answer vs the
+bulk insert used by save_screening(), plus end-to-end /submit-screening.
+
+Usage: python benchmarks/bench_screening_submit.py [submissions]
+"""
+import random
+import sys
+
+from harness import load_app, logged_in_client, timed
+from app import save_screening
+from models import db, ScreeningSession, ScreeningResponse
+
+
+def random_answers(rng):
+    return {q: rng.randint(0, 3) for q in range(1, 11)}
+
+
+def per_object_save(user_id, responses):
+    """How submit_screening stored answers before the bulk path"""
+    record = ScreeningSession(
+        user_id=user_id, total_score=sum(responses.values()),
+        result_category='ppd', q10_score=responses[10])
+    db.session.add(record)
+    db.session.flush()
+    for q_num, answer in responses.items():
+        db.session.add(ScreeningResponse(
+            session_id=record.id, question_number=q_num, answer_value=answer))
+
+
+def bulk_save(user_id, responses):
+    save_screening(
+        user_id, responses, sum(responses.values()), 'ppd', responses[10])
+
+
+def run(flask_app, save, count, seed=0):
+    rng = random.Random(seed)
+    with flask_app.app_context():
+        for _ in range(count):
+            save(1, random_answers(rng))
+            db.session.commit()
+
+
+def main(count=2000):
+    flask_app = load_app()
+    client = logged_in_client(flask_app)
+
+    for label, save in (('per-object', per_object_save), ('bulk', bulk_save)):
+        elapsed, _ = timed(run, flask_app, save, count)
+        print(f"{label:<12}{count / elapsed:10,.0f} submissions/s")
+
+    rng = random.Random(1)
+    forms = [{f'q{q}': str(a) for q, a in random_answers(rng).items()} for _ in range(count // 4)]
+
+    def submit_all():
+        for form in forms:
+            response = client.post('/submit-screening', data=form)
+            assert response.status_code == 302
+
+    elapsed, _ = timed(submit_all)
+    print(f"{'http':<12}{len(forms) / elapsed:10,.0f} submissions/s (/submit-screening)")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
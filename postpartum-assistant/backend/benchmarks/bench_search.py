@@ -0,0 +1,82 @@
+"""Journal search latency over a large analysis table: FTS5 against the
+LIKE scan it replaces.
+
+Seeds ENTRIES journal entries (text built like seed.py's, plus an
+activity word so both common and rare terms exist) for USERS users with
+the search triggers off, then times `flask backfill-search`'s rebuild.
+Each query runs for a sample of users through search.search(), which is
+what /api/search calls; p50/p95 are over those calls.
+
+Usage: python benchmarks/bench_search.py [entries] [users]
+"""
+import random
+import sys
+import time
+
+from harness import load_app, timed
+from models import db, User, Analysis
+from importer import chunked
+from seed import Survey, journal_text
+import search
+
+ACTIVITIES = ('walk', 'bath', 'feeding', 'nap', 'doctor', 'visitors', 'pharmacy', 'swaddle',
+              'pumping', 'park', 'grandma', 'midwife', 'laundry', 'checkup', 'vaccination')
+
+QUERIES = ('sleeping', 'midwife', 'anxious baby', 'vacc*', 'tearful pharmacy')
+SAMPLE_USERS = 50
+
+
+def seed(flask_app, entries, users, seed=0):
+    rng = random.Random(seed)
+    survey = Survey()
+    with flask_app.app_context():
+        connection = db.session.connection()
+        search.uninstall(connection)  # bulk load first, index afterwards
+        db.session.execute(User.__table__.insert(), [
+            {'username': f'search{n}', 'email': f'search{n}@example.com', 'password_hash': 'x'}
+            for n in range(users)
+        ])
+        rows = ({'user_id': rng.randrange(users) + 1, 'sentiment': 'neutral', 'confidence': 0.5,
+                 'text': f"{journal_text(survey.respondent(rng), rng)} After the {rng.choice(ACTIVITIES)}."}
+                for _ in range(entries))
+        for chunk in chunked(rows, 50000):
+            db.session.execute(Analysis.__table__.insert(), chunk)
+        db.session.commit()
+
+        elapsed, indexed = timed(search.rebuild, db.session.connection())
+        db.session.commit()
+    return indexed, elapsed
+
+
+def latencies(flask_app, backend_fn, query, user_ids):
+    with flask_app.app_context():
+        samples = []
+        for user_id in user_ids:
+            start = time.perf_counter()
+            backend_fn(user_id, query)
+            samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.95) - 1] * 1000
+
+
+def like_search(user_id, query):
+    connection = db.session.connection()
+    return search._search_like(connection, user_id, search.parse_terms(query), 21, 0)
+
+
+def main(entries=1000000, users=500):
+    flask_app = load_app()
+    indexed, elapsed = seed(flask_app, entries, users)
+    print(f"{indexed:,} entries, {users} users; backfill {elapsed:.1f} s ({indexed / elapsed:,.0f} rows/s)")
+
+    user_ids = random.Random(1).sample(range(1, users + 1), min(SAMPLE_USERS, users))
+    for query in QUERIES:
+        fts = latencies(flask_app, search.search, query, user_ids)
+        like = latencies(flask_app, like_search, query, user_ids[:10])
+        print(f"{query!r:<20} fts5 p50 {fts[0]:6.2f} ms  p95 {fts[1]:6.2f} ms"
+              f"  | LIKE p50 {like[0]:7.1f} ms  p95 {like[1]:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 500)
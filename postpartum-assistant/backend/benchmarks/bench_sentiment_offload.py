@@ -0,0 +1,89 @@
+"""Concurrent load test for inline vs process-pool sentiment scoring.
+
+Several threads post long, unique journal entries to /analyze while
+others hit a cheap page; the cheap page's p99 shows how much scoring
+stalls unrelated requests.
+
+Usage: python benchmarks/bench_sentiment_offload.py [requests_per_thread]
+"""
+import itertools
+import statistics
+import sys
+import threading
+import time
+
+from harness import load_app, logged_in_client
+
+LONG_ENTRY = (
+    "Today was long. The baby woke up four times and I felt exhausted, "
+    "a little hopeless but also grateful for my mother's help. "
+) * 40
+
+# Shared across runs so every posted entry misses the polarity cache
+_entry_numbers = itertools.count()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_load(flask_app, per_thread, writers=4, readers=4):
+    latencies = {'analyze': [], 'page': []}
+    lock = threading.Lock()
+
+    def writer():
+        client = logged_in_client(flask_app)
+        for _ in range(per_thread):
+            text = f"{LONG_ENTRY} entry {next(_entry_numbers)}"  # unique, so never cached
+            start = time.perf_counter()
+            client.post('/analyze', data={'text': text})
+            with lock:
+                latencies['analyze'].append(time.perf_counter() - start)
+
+    def reader():
+        client = logged_in_client(flask_app)
+        for _ in range(per_thread * 4):
+            start = time.perf_counter()
+            client.get('/self-care-guide')
+            with lock:
+                latencies['page'].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies
+
+
+def report(label, elapsed, latencies):
+    for kind, samples in latencies.items():
+        print(f"{label:<8}{kind:<9}n={len(samples):<5}"
+              f"p50={statistics.median(samples) * 1000:7.1f}ms  "
+              f"p99={percentile(samples, 99) * 1000:7.1f}ms")
+    print(f"{label:<8}wall     {elapsed:.2f}s")
+
+
+def main(per_thread=10):
+    import sentiment_worker
+
+    flask_app = load_app()
+    logged_in_client(flask_app)  # create the benchmark user up front
+
+    services = flask_app.extensions['services']
+    services.sentiment_pool = None
+    report('inline', *run_load(flask_app, per_thread))
+
+    pool = sentiment_worker.SentimentPool(size=4, timeout=5.0)
+    pool.polarity('start the workers')
+    services.sentiment_pool = pool
+    report('pool', *run_load(flask_app, per_thread))
+    print(pool.stats())
+    pool.shutdown()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,85 @@
+"""Cold-start cost of the backend: importing app.py and calling create_app().
+
+Each sample runs in a fresh interpreter. Import time comes from
+`python -X importtime`; create_app() is timed inside the same process.
+Results are printed as JSON; with --baseline the run fails (exit 1) when
+the median is more than --tolerance slower than the recorded baseline,
+so the script can gate a CI job.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N] [--baseline FILE]
+                                       [--tolerance 0.25] [--write-baseline]
+"""
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+
+from harness import BACKEND_DIR
+
+PROBE = (
+    "import time\n"
+    "import app\n"
+    "start = time.perf_counter()\n"
+    "app.create_app()\n"
+    "print('create_app_us', int((time.perf_counter() - start) * 1e6))\n"
+)
+
+# "import time:  self [us] | cumulative | imported package"
+IMPORT_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def sample():
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2))
+    create_app_us = int(result.stdout.split('create_app_us')[-1])
+    return modules, create_app_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--write-baseline', action='store_true')
+    args = parser.parse_args()
+
+    samples = [sample() for _ in range(args.runs)]
+    import_ms = statistics.median(modules['app'] for modules, _ in samples) / 1000
+    create_ms = statistics.median(create_us for _, create_us in samples) / 1000
+    heavy = {name: name in samples[0][0] for name in ('textblob', 'nltk', 'numpy')}
+
+    report = {
+        'runs': args.runs,
+        'import_app_ms': round(import_ms, 1),
+        'create_app_ms': round(create_ms, 1),
+        'total_ms': round(import_ms + create_ms, 1),
+        'heavy_modules_loaded': heavy,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.baseline and args.write_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        limit = baseline['total_ms'] * (1 + args.tolerance)
+        if report['total_ms'] > limit:
+            print(f"startup regression: {report['total_ms']}ms > {limit:.1f}ms "
+                  f"(baseline {baseline['total_ms']}ms + {args.tolerance:.0%})", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
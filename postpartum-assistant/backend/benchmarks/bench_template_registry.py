@@ -0,0 +1,49 @@
+"""Per-request template verification cost before and after the registry.
+
+The old before_request hook called verify_template() for nine templates
+on every request; render_verified now does one memoized registry lookup.
+
+Usage: python benchmarks/bench_template_registry.py [iterations]
+"""
+import contextlib
+import io
+import sys
+import timeit
+
+from harness import load_app
+
+
+def main(iterations=2000):
+    import app as app_module
+
+    load_app()
+    names = app_module.REQUIRED_TEMPLATES
+
+    def old_hook():
+        # verify_template prints its progress; keep that out of the timing output
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name in names:
+                app_module.verify_template(name)
+
+    def registry_lookup(registry):
+        return lambda: registry.resolve('dashboard.html')
+
+    static_registry = app_module.TemplateRegistry(
+        app_module.TEMPLATE_DIR, app_module.verify_template, auto_reload=False)
+    reload_registry = app_module.TemplateRegistry(
+        app_module.TEMPLATE_DIR, app_module.verify_template, auto_reload=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        static_registry.preload(names)
+        reload_registry.preload(names)
+
+    old = timeit.timeit(old_hook, number=iterations // 10) / (iterations // 10)
+    static = timeit.timeit(registry_lookup(static_registry), number=iterations) / iterations
+    reload = timeit.timeit(registry_lookup(reload_registry), number=iterations) / iterations
+
+    print(f"before_request verify x{len(names)}: {old * 1e6:10.1f} us/request")
+    print(f"registry (auto reload off):   {static * 1e6:10.2f} us/request")
+    print(f"registry (auto reload on):    {reload * 1e6:10.2f} us/request")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
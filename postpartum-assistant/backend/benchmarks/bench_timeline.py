@@ -0,0 +1,90 @@
+"""/api/timeline latency for users with 1, 3 and 10 years of entries,
+against bucketing the raw rows on every request.
+
+Each user gets ENTRIES_PER_DAY analyses and one mood/sleep entry per
+day; the rollups are filled with rollups.rebuild(). Two queries: the
+last 90 days (cost independent of history length) and the user's whole
+history at 120 points (cost grows with the range, ~52 rollup rows/year,
+not with the number of entries).
+
+Usage: python benchmarks/bench_timeline.py [requests]
+"""
+import random
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from harness import load_app, logged_in_client, timed
+from models import db, User, Analysis, PostpartumSupportHistory
+import rollups
+
+ENTRIES_PER_DAY = 3
+YEARS = (1, 3, 10)
+
+
+def seed(flask_app, years, seed=0):
+    rng = random.Random(seed)
+    username = f'years{years}'
+    end = datetime(2026, 10, 1)
+    with flask_app.app_context():
+        user = User(username=username, email=f'{username}@example.com')
+        user.set_password('bench-password')
+        db.session.add(user)
+        db.session.commit()
+
+        days = years * 365
+        analyses, entries = [], []
+        for day in range(days):
+            when = end - timedelta(days=day)
+            for n in range(ENTRIES_PER_DAY):
+                analyses.append({'user_id': user.id, 'text': f'entry {day}-{n}',
+                                 'sentiment': rng.choice(('positive', 'negative', 'neutral')),
+                                 'confidence': rng.random(), 'timestamp': when + timedelta(hours=n)})
+            entries.append({'user_id': user.id, 'mood_score': rng.randint(1, 10),
+                            'sleep_hours': rng.uniform(3, 9), 'entry_date': when})
+        db.session.execute(Analysis.__table__.insert(), analyses)
+        db.session.execute(PostpartumSupportHistory.__table__.insert(), entries)
+        db.session.commit()
+        rollups.rebuild(user.id)
+    return username, (end - timedelta(days=days)).date(), end.date()
+
+
+def scan_and_bucket(user_id, start, end):
+    """The per-request approach the rollups replace"""
+    weeks = defaultdict(lambda: [0, 0, 0, 0.0])
+    for entry in PostpartumSupportHistory.query.filter_by(user_id=user_id):
+        week = rollups.bucket_start(entry.entry_date.date(), 'week')
+        weeks[week][0] += entry.mood_score
+        weeks[week][1] += 1
+    for analysis in Analysis.query.filter_by(user_id=user_id):
+        week = rollups.bucket_start(analysis.timestamp.date(), 'week')
+        weeks[week][2] += 1
+        weeks[week][3] += analysis.confidence
+    return [{'date': week.isoformat(), 'score': mood / count} for week, (mood, count, _, _) in sorted(weeks.items())]
+
+
+def main(requests=50):
+    flask_app = load_app()
+    for years in YEARS:
+        username, start, end = seed(flask_app, years)
+        client = logged_in_client(flask_app, username=username)
+        recent = f'/api/timeline?metrics=mood,sleep,sentiment&start={end - timedelta(days=89)}&end={end}'
+        everything = f'/api/timeline?metrics=mood,sleep,sentiment&start={start}&end={end}&points=120'
+
+        def hit(url):
+            for _ in range(requests):
+                assert client.get(url).status_code == 200
+
+        recent_time, _ = timed(hit, recent)
+        full_time, _ = timed(hit, everything)
+        with flask_app.app_context():
+            user_id = User.query.filter_by(username=username).one().id
+            scan_time, _ = timed(scan_and_bucket, user_id, start, end)
+        rows = years * 365 * (ENTRIES_PER_DAY + 1)
+        print(f"{years:>2} years ({rows:>6,} rows)  90 days {recent_time / requests * 1000:5.1f} ms"
+              f"  full history {full_time / requests * 1000:5.1f} ms"
+              f"  | scan+bucket per request {scan_time * 1000:6.1f} ms")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
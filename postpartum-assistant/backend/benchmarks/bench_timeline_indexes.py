@@ -0,0 +1,122 @@
+"""Query plans and latency of the per-user timeline queries with and without
+the composite indexes on analysis and screening_session.
+
+Seeds a scratch SQLite database with synthetic rows spread over many users,
+then runs the history, dashboard and screening-history queries twice: once
+with the indexes dropped and once with them created.
+
+Usage: python benchmarks/bench_timeline_indexes.py [analyses] [users]
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from harness import load_app
+from models import db
+
+INDEXES = {
+    'ix_analysis_user_id_timestamp': 'analysis (user_id, timestamp)',
+    'ix_analysis_user_id_sentiment': 'analysis (user_id, sentiment)',
+    'ix_screening_session_user_id_created_at': 'screening_session (user_id, created_at)',
+}
+
+QUERIES = {
+    'history page': (
+        'SELECT * FROM analysis WHERE user_id = :user_id '
+        'ORDER BY timestamp DESC LIMIT 10 OFFSET 0'
+    ),
+    'dashboard counts': (
+        'SELECT sentiment, COUNT(id) FROM analysis WHERE user_id = :user_id '
+        'GROUP BY sentiment'
+    ),
+    'dashboard recent': (
+        'SELECT * FROM analysis WHERE user_id = :user_id '
+        'ORDER BY timestamp DESC LIMIT 5'
+    ),
+    'screening history': (
+        'SELECT * FROM screening_session WHERE user_id = :user_id '
+        'ORDER BY created_at DESC LIMIT 10 OFFSET 0'
+    ),
+}
+
+
+def seed(conn, analyses, users, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    sentiments = ['positive', 'neutral', 'negative']
+
+    conn.executemany(
+        'INSERT INTO user (id, username, email, password_hash) VALUES (?, ?, ?, ?)',
+        [(i, f'user{i}', f'user{i}@example.com', 'x') for i in range(1, users + 1)]
+    )
+    batch = []
+    for i in range(analyses):
+        batch.append((
+            'seeded entry', rng.choice(sentiments), rng.random(),
+            start + timedelta(minutes=rng.randrange(60 * 24 * 700)),
+            rng.randint(1, users)
+        ))
+        if len(batch) == 50000:
+            conn.executemany(
+                'INSERT INTO analysis (text, sentiment, confidence, timestamp, user_id) '
+                'VALUES (?, ?, ?, ?, ?)', batch)
+            batch = []
+    if batch:
+        conn.executemany(
+            'INSERT INTO analysis (text, sentiment, confidence, timestamp, user_id) '
+            'VALUES (?, ?, ?, ?, ?)', batch)
+
+    conn.executemany(
+        'INSERT INTO screening_session (user_id, total_score, result_category, created_at) '
+        'VALUES (?, ?, ?, ?)',
+        [(rng.randint(1, users), rng.randint(0, 30), 'baby_blues',
+          start + timedelta(minutes=rng.randrange(60 * 24 * 700)))
+         for _ in range(analyses // 10)]
+    )
+    conn.commit()
+
+
+def run_queries(conn, users, repeats=50):
+    results = {}
+    user_ids = [random.randint(1, users) for _ in range(repeats)]
+    for label, sql in QUERIES.items():
+        plan = ' / '.join(row[3] for row in conn.execute(
+            'EXPLAIN QUERY PLAN ' + sql, {'user_id': 1}))
+        start = time.perf_counter()
+        for user_id in user_ids:
+            conn.execute(sql, {'user_id': user_id}).fetchall()
+        results[label] = ((time.perf_counter() - start) / repeats, plan)
+    return results
+
+
+def main(analyses=1_000_000, users=1000):
+    flask_app = load_app()
+    with flask_app.app_context():
+        conn = db.engine.raw_connection()
+        cursor = conn.cursor()
+
+        print(f"seeding {analyses:,} analyses for {users:,} users...")
+        start = time.perf_counter()
+        for name in INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS {name}')
+        seed(conn, analyses, users)
+        print(f"seeded in {time.perf_counter() - start:.1f}s\n")
+
+        before = run_queries(conn, users)
+        for name, target in INDEXES.items():
+            cursor.execute(f'CREATE INDEX {name} ON {target}')
+        cursor.execute('ANALYZE')
+        after = run_queries(conn, users)
+        conn.close()
+
+    for label in QUERIES:
+        (before_time, before_plan), (after_time, after_plan) = before[label], after[label]
+        print(f"{label}: {before_time * 1000:.2f}ms -> {after_time * 1000:.2f}ms "
+              f"({before_time / after_time:.0f}x)")
+        print(f"    before: {before_plan}")
+        print(f"    after:  {after_plan}")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,50 @@
+"""Queries and latency of @login_required resource pages with and without
+the user principal cache.
+
+Usage: python benchmarks/bench_user_loader.py [requests_per_route]
+"""
+import sys
+import time
+
+from sqlalchemy import event
+
+from harness import load_app, logged_in_client
+from models import db
+
+ROUTES = ('/self-care-guide', '/support-groups', '/emergency-contacts')
+
+
+def measure(flask_app, client, requests):
+    queries = []
+    with flask_app.app_context():
+        engine = db.engine
+
+    def count(*args):
+        queries.append(1)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        start = time.perf_counter()
+        for route in ROUTES:
+            for _ in range(requests):
+                assert client.get(route).status_code == 200
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    total = requests * len(ROUTES)
+    return total / elapsed, len(queries) / total
+
+
+def main(requests=500):
+    for label, ttl in (('no cache', 0), ('cached', 60)):
+        flask_app = load_app(USER_CACHE_TTL=ttl)
+        client = logged_in_client(flask_app)
+        rate, per_request = measure(flask_app, client, requests)
+        print(f"{label:<10}{rate:8,.0f} req/s  {per_request:.2f} queries/request")
+        user_cache = flask_app.extensions['services'].user_cache
+        if user_cache is not None:
+            print(f"{'':<10}{user_cache.stats()}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
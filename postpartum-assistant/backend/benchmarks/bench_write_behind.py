@@ -0,0 +1,82 @@
+"""POST /api/analyze throughput at a fixed p95 latency, synchronous
+commits against ANALYSIS_WRITE_BEHIND.
+
+Each worker thread has its own logged-in client (its own user) and posts
+journal entries back to back for DURATION seconds. For every concurrency
+level the script reports requests/s and p95 latency, then the best
+throughput each mode reached with p95 under the target. Afterwards it
+checks that every posted row reached the database.
+
+Usage: python benchmarks/bench_write_behind.py [p95_target_ms] [duration_s]
+"""
+import sys
+import threading
+import time
+
+from harness import load_app, logged_in_client
+from models import db, Analysis
+
+CONCURRENCY = (1, 2, 4, 8, 16)
+
+
+def run(flask_app, clients, duration):
+    latencies = [[] for _ in clients]
+    deadline = time.perf_counter() + duration
+
+    def worker(n, client):
+        sample = latencies[n]
+        i = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = client.post('/api/analyze', json={'text': f'Slept badly again, entry {n}-{i}'})
+            sample.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.get_data(as_text=True)
+            i += 1
+
+    threads = [threading.Thread(target=worker, args=(n, client)) for n, client in enumerate(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    merged = sorted(latency for sample in latencies for latency in sample)
+    p95 = merged[int(len(merged) * 0.95) - 1] if merged else 0.0
+    return len(merged), len(merged) / duration, p95
+
+
+def bench(label, write_behind, target, duration):
+    flask_app = load_app(ANALYSIS_WRITE_BEHIND=write_behind)
+    clients = [logged_in_client(flask_app, username=f'writer{n}') for n in range(max(CONCURRENCY))]
+    best = None
+    posted = 0
+    for concurrency in CONCURRENCY:
+        requests, throughput, p95 = run(flask_app, clients[:concurrency], duration)
+        posted += requests
+        print(f"{label:<13} {concurrency:>2} threads  {throughput:7.0f} req/s  p95 {p95 * 1000:6.1f} ms")
+        if p95 * 1000 <= target and (best is None or throughput > best[1]):
+            best = (concurrency, throughput)
+
+    writer = flask_app.extensions['services'].analysis_writer
+    if writer is not None:
+        writer.close()
+    with flask_app.app_context():
+        stored = db.session.scalar(db.select(db.func.count()).select_from(Analysis))
+    assert stored == posted, f'{label}: posted {posted}, stored {stored}'
+    return best
+
+
+def main(target=50.0, duration=3.0):
+    results = {}
+    for label, write_behind in (('synchronous', False), ('write-behind', True)):
+        results[label] = bench(label, write_behind, target, duration)
+    print(f"\nBest throughput with p95 <= {target:g} ms:")
+    for label, best in results.items():
+        if best is None:
+            print(f"  {label:<13} none")
+        else:
+            print(f"  {label:<13} {best[1]:7.0f} req/s at {best[0]} threads")
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 50.0,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 3.0)
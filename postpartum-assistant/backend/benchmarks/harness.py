@@ -0,0 +1,57 @@
+"""Shared setup for the benchmark scripts.
+
+Every benchmark runs against a throwaway SQLite database so the tracked
+instance databases are never touched.
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def load_app(database_url=None, **config):
+    """Create the Flask app bound to a scratch database with tables created"""
+    if database_url is None:
+        fd, path = tempfile.mkstemp(suffix='.db', prefix='ppd-bench-')
+        os.close(fd)
+        database_url = f'sqlite:///{path}'
+
+    from app import create_app, create_tables
+    flask_app = create_app({
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'SECRET_KEY': 'benchmark',
+        **config
+    })
+    with flask_app.app_context():
+        create_tables()
+    return flask_app
+
+
+def logged_in_client(flask_app, username='bench', password='bench-password'):
+    """Create (or reuse) a user and return a test client logged in as them"""
+    from models import db, User
+
+    with flask_app.app_context():
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            user = User(username=username, email=f'{username}@example.com')
+            user.set_password(password)
+            db.session.add(user)
+            db.session.commit()
+
+    client = flask_app.test_client()
+    response = client.post('/login', data={'username': username, 'password': password})
+    assert response.status_code == 302, 'benchmark login failed'
+    return client
+
+
+def timed(fn, *args, **kwargs):
+    """Run fn once and return (elapsed_seconds, result)"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
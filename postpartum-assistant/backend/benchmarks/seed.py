@@ -0,0 +1,214 @@
+"""Seed a synthetic database for the benchmark suite.
+
+N users, each with M journal analyses and K EPDS screenings spread over
+the last DAYS days. The bundled EPDS research exports have blank answer
+columns, so the distributions come from the post-natal symptom survey
+(data/Postpartum Datset1/post natal data.csv, ~1,500 responses): every
+screening and journal entry borrows the answers of a randomly drawn
+respondent, and entry times follow the survey's hour-of-day mix.
+
+- Survey answers map to a 0-3 severity. Each EPDS item takes the
+  severity of the closest survey question, plus occasional noise.
+- Journal text is built from the respondent's symptoms and labelled
+  with the app's own polarity rules.
+- Rows go in through Core bulk inserts and the rollups are rebuilt at
+  the end.
+
+For a given seed the rows are the same from run to run; dates are laid
+out backwards from the current time. All users share the password
+SEED_PASSWORD.
+
+Usage: python benchmarks/seed.py DATABASE_URL [--users N] [--analyses M] [--screenings K] [--seed S]
+"""
+import argparse
+import csv
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from harness import BACKEND_DIR, load_app
+from models import db, User, Analysis, ScreeningResponse
+from importer import chunked, insert_session_rows
+from scoring import get_rule_set
+from sentiment_worker import polarity
+import rollups
+
+SURVEY_CSV = BACKEND_DIR.parent / 'data' / 'Postpartum Datset1' / 'post natal data.csv'
+SEED_PASSWORD = 'bench-password'
+
+SEVERITY = {
+    'no': 0, 'not at all': 0, 'not interested to say': 0,
+    'sometimes': 1, 'maybe': 1,
+    'yes': 2, 'often': 2,
+    'two or more days a week': 3,
+}
+
+# Survey question standing in for each EPDS item, in question order
+EPDS_SOURCES = (
+    'Feeling sad or Tearful',                      # 1 able to laugh
+    'Problems of bonding with baby',               # 2 looked forward with enjoyment
+    'Feeling of guilt',                            # 3 blamed myself
+    'Feeling anxious',                             # 4 anxious or worried
+    'Feeling anxious',                             # 5 scared or panicky
+    'Problems concentrating or making decision',   # 6 things getting on top of me
+    'Trouble sleeping at night',                   # 7 difficulty sleeping
+    'Feeling sad or Tearful',                      # 8 sad or miserable
+    'Feeling sad or Tearful',                      # 9 crying
+    'Suicide attempt',                             # 10 thoughts of self-harm
+)
+
+SYMPTOM_PHRASES = {
+    'Feeling sad or Tearful': 'feeling sad and tearful',
+    'Irritable towards baby & partner': 'snapping at my partner and the baby',
+    'Trouble sleeping at night': 'barely sleeping at night',
+    'Problems concentrating or making decision': 'struggling to concentrate on anything',
+    'Overeating or loss of appetite': 'not eating properly',
+    'Feeling anxious': 'anxious about everything',
+    'Feeling of guilt': 'guilty that I am not doing enough',
+    'Problems of bonding with baby': 'not feeling close to the baby',
+}
+
+CALM_ENTRIES = (
+    'Had a good day with the baby and feel happy.',
+    'We went for a lovely walk and I feel great.',
+    'Slept well last night, feeling much better today.',
+    'The baby smiled at me today, a really good moment.',
+)
+
+
+class Survey:
+    """Respondent answers and hour-of-day weights from the survey CSV"""
+
+    def __init__(self, path=SURVEY_CSV):
+        with open(path, encoding='utf-8', errors='replace', newline='') as f:
+            rows = list(csv.DictReader(f))
+        if not rows:
+            raise ValueError(f'{path}: no survey responses')
+        self.respondents = [
+            {column: SEVERITY.get(value.strip().lower(), 0) for column, value in row.items() if column}
+            for row in rows
+        ]
+        hours = Counter()
+        for row in rows:
+            try:
+                hours[datetime.strptime(row['Timestamp'].strip(), '%m/%d/%Y %H:%M').hour] += 1
+            except (KeyError, ValueError):
+                continue
+        self.hours = list(hours) or [12]
+        self.hour_weights = [hours[hour] for hour in self.hours] or [1]
+
+    def respondent(self, rng):
+        return rng.choice(self.respondents)
+
+    def moment(self, rng, end, days):
+        """A time in the last `days` days, at a survey-weighted hour"""
+        day = end - timedelta(days=rng.randrange(days))
+        hour = rng.choices(self.hours, self.hour_weights)[0]
+        return day.replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60), microsecond=0)
+
+
+def epds_answers(respondent, rng):
+    answers = []
+    for column in EPDS_SOURCES:
+        answer = respondent.get(column, 0)
+        if rng.random() < 0.2:
+            answer += rng.choice((-1, 1))
+        answers.append(min(3, max(0, answer)))
+    # Item 10 only uses the bottom of the scale, as in clinical data
+    answers[-1] = min(answers[-1], 1)
+    return answers
+
+
+def journal_text(respondent, rng):
+    symptoms = [phrase for column, phrase in SYMPTOM_PHRASES.items() if respondent.get(column, 0) >= 2]
+    # The more symptoms a respondent reports, the fewer good days they write about
+    if rng.random() >= len(symptoms) / len(SYMPTOM_PHRASES):
+        return rng.choice(CALM_ENTRIES)
+    picked = rng.sample(symptoms, min(2, len(symptoms)))
+    return f"Today I have been {' and '.join(picked)}."
+
+
+def seed_database(flask_app, users=50, analyses=200, screenings=5, days=180, seed=0, survey=None):
+    """Fill flask_app's (empty) database; returns row counts and timing"""
+    from app import determine_sentiment
+
+    rng = random.Random(seed)
+    survey = survey or Survey()
+    rules = get_rule_set()
+    end = datetime.utcnow()
+    scored = {}
+    start = time.perf_counter()
+
+    with flask_app.app_context():
+        template = User(username='template', email='template@example.com')
+        template.set_password(SEED_PASSWORD)  # one hash shared by every user
+        db.session.execute(User.__table__.insert(), [
+            {'username': f'bench{n:04d}', 'email': f'bench{n:04d}@example.com',
+             'password_hash': template.password_hash, 'created_at': end - timedelta(days=days)}
+            for n in range(users)
+        ])
+        user_ids = db.session.scalars(db.select(User.id).order_by(User.id)).all()
+
+        entries = (
+            (user_id, survey.respondent(rng), survey.moment(rng, end, days))
+            for user_id in user_ids for _ in range(analyses)
+        )
+        for chunk in chunked(entries, 5000):
+            rows = []
+            for user_id, respondent, when in chunk:
+                text = journal_text(respondent, rng)
+                if text not in scored:
+                    scored[text] = determine_sentiment(text, polarity(text))
+                sentiment, confidence = scored[text]
+                rows.append({'user_id': user_id, 'text': text, 'sentiment': sentiment,
+                             'confidence': confidence, 'timestamp': when})
+            db.session.execute(Analysis.__table__.insert(), rows)
+
+        sessions = (
+            (user_id, epds_answers(survey.respondent(rng), rng), survey.moment(rng, end, days))
+            for user_id in user_ids for _ in range(screenings)
+        )
+        for chunk in chunked(sessions, 5000):
+            session_ids = insert_session_rows([
+                {'user_id': user_id, 'total_score': sum(answers), 'q10_score': answers[-1],
+                 'result_category': rules.categorize(sum(answers), answers[-1]),
+                 'rule_set': rules.version, 'created_at': when}
+                for user_id, answers, when in chunk
+            ])
+            db.session.execute(ScreeningResponse.__table__.insert(), [
+                {'session_id': session_id, 'question_number': q_num, 'answer_value': answer}
+                for session_id, (_, answers, _) in zip(session_ids, chunk)
+                for q_num, answer in enumerate(answers, start=1)
+            ])
+        db.session.commit()
+        rollups.rebuild()
+
+    return {
+        'users': users,
+        'analyses': users * analyses,
+        'screenings': users * screenings,
+        'seconds': round(time.perf_counter() - start, 2),
+    }
+
+
+def usernames(users):
+    return [f'bench{n:04d}' for n in range(users)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database_url')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--analyses', type=int, default=200)
+    parser.add_argument('--screenings', type=int, default=5)
+    parser.add_argument('--days', type=int, default=180)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    flask_app = load_app(args.database_url)
+    print(seed_database(flask_app, args.users, args.analyses, args.screenings, args.days, args.seed))
+
+
+if __name__ == '__main__':
+    main()
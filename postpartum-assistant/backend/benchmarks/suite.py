@@ -0,0 +1,291 @@
+"""Benchmark every main route against a seeded database.
+
+Seeds a scratch SQLite database (see seed.py), then drives each scenario
+with T threads, each logged in as a different seeded user, through one
+or both drivers:
+
+client  Flask test client, in process: the cost of the app itself
+http    the app served by Werkzeug's threaded server on localhost, hit
+        over keep-alive HTTP connections: adds sockets, parsing and
+        cookies
+
+For every scenario and driver the suite reports throughput and
+p50/p95/p99 latency after one untimed warm-up request per thread.
+Redirects are not followed, so /login and /submit-screening measure the
+POST handler alone.
+
+--save writes the results to a JSON baseline. --compare checks the run
+against a baseline and exits with status 1 when a scenario's p95 rose,
+or its throughput fell, by more than --tolerance. Baselines are only
+comparable on the same machine with the same seeding parameters, which
+the file records.
+
+Usage:
+  python benchmarks/suite.py [--driver client|http|both] [--threads T] [--requests R]
+                             [--users N --analyses M --screenings K --seed S]
+                             [--only name,...] [--save FILE] [--compare FILE --tolerance 0.2]
+"""
+import argparse
+import http.client
+import json
+import platform
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from harness import load_app
+from seed import SEED_PASSWORD, Survey, epds_answers, journal_text, seed_database, usernames
+
+
+# name -> (method, path, body kind, share of --requests); bodies are built per
+# request by Payloads. Login runs fewer requests: each one is a deliberately
+# slow password hash check.
+SCENARIOS = {
+    'login': ('POST', '/login', 'login', 0.1),
+    'dashboard': ('GET', '/dashboard', None, 1),
+    'history': ('GET', '/history', None, 1),
+    'api_history': ('GET', '/api/history', None, 1),
+    'api_analyze': ('POST', '/api/analyze', 'analysis', 1),
+    'submit_screening': ('POST', '/submit-screening', 'screening', 1),
+    'self_care_guide': ('GET', '/self-care-guide', None, 1),
+    'support_groups': ('GET', '/support-groups', None, 1),
+    'emergency_contacts': ('GET', '/emergency-contacts', None, 1),
+}
+
+
+class Payloads:
+    """Request bodies drawn from the same survey as the seed data"""
+
+    def __init__(self, survey, seed):
+        self.survey = survey
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def build(self, kind, username):
+        """(form dict or None, json dict or None) for one request"""
+        if kind == 'login':
+            return {'username': username, 'password': SEED_PASSWORD}, None
+        with self.lock:
+            respondent = self.survey.respondent(self.rng)
+            if kind == 'analysis':
+                return None, {'text': journal_text(respondent, self.rng)}
+            answers = epds_answers(respondent, self.rng)
+        return {f'q{n}': answer for n, answer in enumerate(answers, start=1)}, None
+
+
+class ClientDriver:
+    name = 'client'
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+
+    def session(self, username, logged_in=True):
+        client = self.flask_app.test_client()
+        if logged_in:
+            response = client.post('/login', data={'username': username, 'password': SEED_PASSWORD})
+            assert response.status_code == 302, f'login failed for {username}'
+
+        def send(method, path, form=None, body=None):
+            # Anonymous requests get a fresh cookie jar every time
+            response = (client if logged_in else self.flask_app.test_client()).open(
+                path, method=method, data=form, json=body)
+            response.get_data()
+            return response.status_code
+        return send
+
+    def close(self):
+        pass
+
+
+class _KeepAliveHandler(WSGIRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class HttpDriver:
+    name = 'http'
+
+    def __init__(self, flask_app):
+        self.server = make_server('127.0.0.1', 0, flask_app, threaded=True, request_handler=_KeepAliveHandler)
+        self.port = self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def session(self, username, logged_in=True):
+        connection = http.client.HTTPConnection('127.0.0.1', self.port)
+        cookies = {}
+
+        def send(method, path, form=None, body=None):
+            headers = {}
+            payload = None
+            if form is not None:
+                payload = urlencode(form)
+                headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            elif body is not None:
+                payload = json.dumps(body)
+                headers['Content-Type'] = 'application/json'
+            if cookies:
+                headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in cookies.items())
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if logged_in:
+                for header in response.headers.get_all('Set-Cookie') or ():
+                    cookies.update({name: morsel.value for name, morsel in SimpleCookie(header).items()})
+            return response.status
+
+        if logged_in:
+            status = send('POST', '/login', form={'username': username, 'password': SEED_PASSWORD})
+            assert status == 302, f'login failed for {username}'
+        return send
+
+    def close(self):
+        self.server.shutdown()
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def run_scenario(driver, name, users, threads, requests, payloads):
+    method, path, kind, share = SCENARIOS[name]
+    per_thread = max(1, int(requests * share) // threads)
+    latencies = [[] for _ in range(threads)]
+    errors = [0] * threads
+    senders = [driver.session(users[n % len(users)], logged_in=kind != 'login') for n in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(n):
+        send = senders[n]
+        username = users[n % len(users)]
+        sample = latencies[n]
+        if kind != 'login':
+            # Untimed first request: template compiles, cold caches
+            send(method, path, *(payloads.build(kind, username) if kind else (None, None)))
+        barrier.wait()
+        for _ in range(per_thread):
+            form, body = payloads.build(kind, username) if kind else (None, None)
+            start = time.perf_counter()
+            status = send(method, path, form, body)
+            sample.append(time.perf_counter() - start)
+            if status >= 400:
+                errors[n] += 1
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    ordered = sorted(latency for sample in latencies for latency in sample)
+    return {
+        'requests': len(ordered),
+        'errors': sum(errors),
+        'rps': round(len(ordered) / elapsed, 1),
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 2),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Lines describing regressions against a baseline's results"""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get('results', {}).get(key)
+        if previous is None:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+        if current['rps'] < previous['rps'] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {previous['rps']} -> {current['rps']} req/s")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the main routes against a seeded database')
+    parser.add_argument('--driver', choices=('client', 'http', 'both'), default='both')
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=400, help='requests per scenario and driver')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--analyses', type=int, default=200)
+    parser.add_argument('--screenings', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', help='comma-separated scenario names')
+    parser.add_argument('--save', metavar='FILE', help='write results as a JSON baseline')
+    parser.add_argument('--compare', metavar='FILE', help='fail on regressions against a baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    names = args.only.split(',') if args.only else list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    flask_app = load_app()
+    survey = Survey()
+    seeded = seed_database(flask_app, args.users, args.analyses, args.screenings, seed=args.seed, survey=survey)
+    print(f"seeded {seeded['users']} users, {seeded['analyses']} analyses, "
+          f"{seeded['screenings']} screenings in {seeded['seconds']} s")
+
+    users = usernames(args.users)
+    payloads = Payloads(survey, args.seed)
+    drivers = ('client', 'http') if args.driver == 'both' else (args.driver,)
+    results = {}
+    for driver_name in drivers:
+        driver = (ClientDriver if driver_name == 'client' else HttpDriver)(flask_app)
+        try:
+            for name in names:
+                result = run_scenario(driver, name, users, args.threads, args.requests, payloads)
+                results[f'{driver_name}:{name}'] = result
+                print(f"{driver_name:<6} {name:<19} {result['rps']:8.1f} req/s  p50 {result['p50_ms']:7.2f}"
+                      f"  p95 {result['p95_ms']:7.2f}  p99 {result['p99_ms']:7.2f} ms"
+                      + (f"  {result['errors']} errors" if result['errors'] else ''))
+        finally:
+            driver.close()
+
+    meta = {
+        'created': datetime.utcnow().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'threads': args.threads,
+        'requests': args.requests,
+        'users': args.users,
+        'analyses': args.analyses,
+        'screenings': args.screenings,
+        'seed': args.seed,
+    }
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'baseline written to {args.save}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        if regressions:
+            return 1
+        print(f'no regressions beyond {args.tolerance:.0%} against {args.compare}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""Chatbot turns for the React chatbot (src/ActionProvider.js).
+
+A turn is scored with the same cached polarity as journal entries and
+answered from canned reply parts, so nothing on the reply path touches a
+template or waits for the database. The parts are also the chunks of the
+event-stream response: the client can show the first sentence while the
+rest (for a negative turn, the crisis lines) is still arriving.
+"""
+import json
+
+EMERGENCY_WIDGET = 'emergencyOptions'
+
+ACKNOWLEDGEMENTS = {
+    'positive': "I'm glad to hear that!",
+    'neutral': "Thanks for checking in.",
+    'negative': "I'm sorry you're going through a hard time. Thank you for telling me.",
+}
+
+FOLLOW_UPS = {
+    'positive': "What has been helping you feel this way?",
+    'neutral': "How have you been sleeping, and is there anything on your mind?",
+    'negative': "You don't have to handle this alone. Would you like to talk to someone now?",
+}
+
+# Crisis lines listed in a negative reply; the widget offers the rest
+REPLY_CONTACTS = 2
+
+
+def compose_reply(sentiment, contacts=()):
+    """(reply parts, widget name or None) for a turn scored as sentiment"""
+    parts = [ACKNOWLEDGEMENTS[sentiment], FOLLOW_UPS[sentiment]]
+    if sentiment != 'negative':
+        return parts, None
+    parts.extend(f"{contact['name']}: {contact['number']} ({contact['description']})."
+                 for contact in contacts[:REPLY_CONTACTS])
+    return parts, EMERGENCY_WIDGET
+
+
+def sse_event(event, data):
+    """One server-sent event with a JSON payload"""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
@@ -0,0 +1,317 @@
+"""Columnar, memory-mapped snapshots of screening data for cohort analytics.
+
+Population questions (mean answer per EPDS item, share of `ppd` results
+per month) used to mean walking ScreeningResponse rows through the ORM,
+and the bundled research CSVs were re-parsed from text every time. A
+snapshot writes each column once as a NumPy .npy file; opening one
+memory-maps the files, so aggregates run as vectorized NumPy over pages
+the OS already has cached.
+
+Layout of a snapshot directory:
+    meta.json       row count, column dtypes, category labels, source
+    <column>.npy    one 1-D array per column
+
+Questionnaire answers are int8 with MISSING (-1) for a blank answer.
+Screening snapshots also carry session_id, user_id (-1 when unset),
+created_at (datetime64[s]), total_score, q10_score and category (int8
+code into meta['categories']).
+
+Snapshots are written into a temporary directory next to the target and
+swapped in with a rename, so readers never see a half-written one.
+"""
+import csv
+import json
+import os
+import re
+import shutil
+import tempfile
+from datetime import datetime
+from itertools import chain
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import func, select
+
+from importer import open_csv
+from models import db, ScreeningSession, ScreeningResponse
+from scoring import CATEGORIES, EPDS_QUESTION_COUNT
+
+MISSING = -1
+
+# Questionnaire item columns in the bundled research datasets
+INSTRUMENT_COLUMN = re.compile(r'^(EPDS|HADS|CBTS|CBTS_M)_\d+$', re.IGNORECASE)
+
+EPDS_COLUMNS = tuple(f'epds_{q}' for q in range(1, EPDS_QUESTION_COUNT + 1))
+
+
+class CohortSnapshot:
+    """Read-only view over one snapshot directory
+
+    Columns are memory-mapped on first access and shared by every query.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / 'meta.json', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.rows = self.meta['rows']
+        self._columns = {}
+
+    @property
+    def columns(self):
+        return tuple(self.meta['columns'])
+
+    def column(self, name):
+        """The named column as a read-only memory-mapped array"""
+        if name not in self.meta['columns']:
+            raise KeyError(f"No column {name!r} in snapshot {self.path}")
+        array = self._columns.get(name)
+        if array is None:
+            array = np.load(self.path / f'{name}.npy', mmap_mode='r')[:self.rows]
+            self._columns[name] = array
+        return array
+
+    def question_columns(self, prefix='epds_'):
+        """Answer column names for one instrument, in question order"""
+        names = [name for name in self.columns if name.startswith(prefix) and name[len(prefix):].isdigit()]
+        return sorted(names, key=lambda name: int(name[len(prefix):]))
+
+    def question_means(self, prefix='epds_', mask=None):
+        """Mean answer per question, ignoring blanks; None for an empty column
+
+        mask optionally selects rows (a boolean array of length rows).
+        """
+        means = {}
+        for name in self.question_columns(prefix):
+            values = self.column(name)
+            if mask is not None:
+                values = values[mask]
+            missing = np.count_nonzero(values == MISSING)
+            answered = len(values) - missing
+            # Every blank contributes MISSING (-1) to the raw sum; add it back
+            total = int(values.sum(dtype=np.int64)) + missing
+            means[name] = total / answered if answered else None
+        return means
+
+    def score_distribution(self, mask=None):
+        """Number of sessions per EPDS total score (index = score)"""
+        scores = self.column('total_score')
+        if mask is not None:
+            scores = scores[mask]
+        return np.bincount(scores[scores >= 0], minlength=EPDS_QUESTION_COUNT * 3 + 1)
+
+    def category_mask(self, category):
+        """Boolean mask of sessions whose result is category"""
+        code = self.meta['categories'].index(category)
+        return self.column('category') == code
+
+    def date_mask(self, since=None, until=None):
+        """Boolean mask of sessions created in [since, until)"""
+        created = self.column('created_at')
+        mask = np.ones(self.rows, dtype=bool)
+        if since is not None:
+            mask &= created >= np.datetime64(since, 's')
+        if until is not None:
+            mask &= created < np.datetime64(until, 's')
+        return mask
+
+    def monthly_share(self, category='ppd', mask=None):
+        """{'YYYY-MM': fraction of that month's sessions in category}"""
+        months = self.column('created_at').astype('datetime64[M]').astype(np.int64)
+        hits = self.category_mask(category)
+        if mask is not None:
+            months, hits = months[mask], hits[mask]
+        if not len(months):
+            return {}
+
+        # Month numbers are dense small integers, so bincount beats np.unique
+        first = months.min()
+        index = months - first
+        totals = np.bincount(index)
+        matches = np.bincount(index[hits], minlength=len(totals))
+        return {
+            str(np.datetime64(int(first + offset), 'M')): float(matches[offset] / totals[offset])
+            for offset in np.flatnonzero(totals)
+        }
+
+
+class _SnapshotWriter:
+    """Pre-sized .npy files filled in place, then renamed into position"""
+
+    def __init__(self, target, rows, dtypes, meta):
+        self.target = Path(target)
+        self.target.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp = Path(tempfile.mkdtemp(prefix=f'.{self.target.name}-', dir=self.target.parent))
+        self.rows = rows
+        self.meta = {**meta, 'columns': {name: np.dtype(dtype).str for name, dtype in dtypes.items()}}
+        self.arrays = {
+            name: np.lib.format.open_memmap(self.tmp / f'{name}.npy', mode='w+', dtype=dtype, shape=(rows,))
+            for name, dtype in dtypes.items()
+        }
+
+    def finish(self, rows):
+        """Flush, record the final row count and swap the snapshot in"""
+        for array in self.arrays.values():
+            array.flush()
+        self.arrays.clear()
+        self.meta.update(rows=rows, created=datetime.utcnow().isoformat(timespec='seconds'))
+        with open(self.tmp / 'meta.json', 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, indent=2)
+
+        os.chmod(self.tmp, 0o755)  # mkdtemp creates it owner-only
+        old = None
+        if self.target.exists():
+            old = self.target.with_name(f'.{self.target.name}-old-{os.getpid()}')
+            os.replace(self.target, old)
+        os.replace(self.tmp, self.target)
+        if old is not None:
+            shutil.rmtree(old, ignore_errors=True)
+
+    def abort(self):
+        self.arrays.clear()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+def snapshot_screenings(target, chunk_size=50000):
+    """Write every ScreeningSession and its answers to a snapshot at target
+
+    Must run inside an app context. Sessions are read in id order in
+    chunks; the answers for each chunk come from one range query and are
+    pivoted into the per-question columns with NumPy. Returns the number
+    of sessions written.
+    """
+    max_id = db.session.scalar(select(func.max(ScreeningSession.id))) or 0
+    rows = db.session.scalar(
+        select(func.count()).select_from(ScreeningSession).where(ScreeningSession.id <= max_id))
+
+    dtypes = {
+        'session_id': np.int64,
+        'user_id': np.int64,
+        'created_at': 'datetime64[s]',
+        'total_score': np.int16,
+        'q10_score': np.int8,
+        'category': np.int8,
+        **{name: np.int8 for name in EPDS_COLUMNS},
+    }
+    writer = _SnapshotWriter(target, rows, dtypes, {'source': 'screening_session', 'categories': list(CATEGORIES)})
+    arrays = writer.arrays
+    codes = {category: code for code, category in enumerate(CATEGORIES)}
+
+    connection = db.session.connection()
+    try:
+        filled = 0
+        last_id = 0
+        while filled < rows:
+            sessions = connection.execute(
+                select(ScreeningSession.id, ScreeningSession.user_id, ScreeningSession.created_at,
+                       ScreeningSession.total_score, ScreeningSession.q10_score,
+                       ScreeningSession.result_category)
+                .where(ScreeningSession.id > last_id, ScreeningSession.id <= max_id)
+                .order_by(ScreeningSession.id)
+                .limit(min(chunk_size, rows - filled))
+            ).all()
+            if not sessions:
+                break  # rows deleted since the count
+
+            ids = np.fromiter((s.id for s in sessions), dtype=np.int64, count=len(sessions))
+            end = filled + len(sessions)
+            arrays['session_id'][filled:end] = ids
+            arrays['user_id'][filled:end] = [MISSING if s.user_id is None else s.user_id for s in sessions]
+            arrays['created_at'][filled:end] = np.array(
+                [s.created_at or datetime(1970, 1, 1) for s in sessions], dtype='datetime64[s]')
+            arrays['total_score'][filled:end] = [MISSING if s.total_score is None else s.total_score for s in sessions]
+            arrays['q10_score'][filled:end] = [MISSING if s.q10_score is None else s.q10_score for s in sessions]
+            arrays['category'][filled:end] = [codes.get(s.result_category, MISSING) for s in sessions]
+
+            answers = np.full((len(sessions), EPDS_QUESTION_COUNT), MISSING, dtype=np.int8)
+            responses = connection.execute(
+                select(ScreeningResponse.session_id, ScreeningResponse.question_number,
+                       ScreeningResponse.answer_value)
+                .where(ScreeningResponse.session_id.between(int(ids[0]), int(ids[-1])),
+                       ScreeningResponse.question_number.isnot(None),
+                       ScreeningResponse.answer_value.isnot(None))
+            ).all()
+            if responses:
+                # Flatten the Row tuples; np.array() on Row objects is far slower
+                pivot = np.fromiter(chain.from_iterable(responses), dtype=np.int64,
+                                    count=3 * len(responses)).reshape(-1, 3)
+                questions = pivot[:, 1] - 1
+                valid = (questions >= 0) & (questions < EPDS_QUESTION_COUNT)
+                pivot, questions = pivot[valid], questions[valid]
+                positions = np.searchsorted(ids, pivot[:, 0])
+                known = ids[np.minimum(positions, len(ids) - 1)] == pivot[:, 0]
+                answers[positions[known], questions[known]] = pivot[known, 2]
+            for q, name in enumerate(EPDS_COLUMNS):
+                arrays[name][filled:end] = answers[:, q]
+
+            filled = end
+            last_id = int(ids[-1])
+    except BaseException:
+        writer.abort()
+        raise
+
+    writer.finish(filled)
+    return filled
+
+
+def snapshot_dataset(csv_path, target, chunk_size=50000):
+    """Write the questionnaire columns of a research CSV to a snapshot
+
+    EPDS, HADS and CBTS item columns become int8 (names lower-cased);
+    blank or non-integer cells are MISSING, and fully blank rows are
+    dropped. The file is read twice (count, then fill) so memory stays
+    flat. Returns the number of rows written.
+    """
+    with open_csv(csv_path) as stream:
+        reader = csv.reader(stream)
+        header = [name.strip() for name in next(reader, [])]
+        rows = sum(1 for row in reader if any(field.strip() for field in row))
+
+    picked = [(i, name.lower()) for i, name in enumerate(header) if INSTRUMENT_COLUMN.match(name)]
+    if not picked:
+        raise ValueError(f'{csv_path}: no EPDS, HADS or CBTS columns')
+
+    writer = _SnapshotWriter(target, rows, {name: np.int8 for _, name in picked},
+                             {'source': str(csv_path)})
+    positions = [i for i, _ in picked]
+
+    def flush(chunk, start):
+        block = np.array(chunk, dtype=np.int8).reshape(len(chunk), len(picked))
+        for column, (_, name) in enumerate(picked):
+            writer.arrays[name][start:start + len(chunk)] = block[:, column]
+
+    try:
+        filled = 0
+        chunk = []
+        with open_csv(csv_path) as stream:
+            reader = csv.reader(stream)
+            next(reader, None)
+            for row in reader:
+                if filled + len(chunk) == rows:
+                    break
+                if not any(field.strip() for field in row):
+                    continue
+                chunk.append([_int8(row[i]) if i < len(row) else MISSING for i in positions])
+                if len(chunk) == chunk_size:
+                    flush(chunk, filled)
+                    filled += len(chunk)
+                    chunk = []
+        if chunk:
+            flush(chunk, filled)
+            filled += len(chunk)
+    except BaseException:
+        writer.abort()
+        raise
+
+    writer.finish(filled)
+    return filled
+
+
+def _int8(field):
+    try:
+        value = float(field)
+    except ValueError:
+        return MISSING
+    if not value.is_integer() or not 0 <= value <= 127:
+        return MISSING
+    return int(value)
@@ -0,0 +1,101 @@
+"""Application settings, read from the environment when the module loads.
+
+create_app() starts from Config; pass a mapping or another config class to
+override individual values (tests, benchmarks, one-off scripts).
+"""
+import os
+import secrets
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.resolve()
+
+
+def _flag(name, default=''):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes')
+
+
+class Config:
+    SECRET_KEY = os.environ.get('SECRET_KEY') or secrets.token_hex(24)
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///app.db'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Turn off in production: templates are then compiled once at startup
+    TEMPLATES_AUTO_RELOAD = _flag('TEMPLATES_AUTO_RELOAD', '1')
+
+    # 'default' or 'production'; see db_profiles.py
+    DB_PROFILE = os.environ.get('DB_PROFILE', 'default')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -64000))  # negative = KiB
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+
+    ANALYZE_BATCH_LIMIT = int(os.environ.get('ANALYZE_BATCH_LIMIT', 5000))
+    # Queue analysis INSERTs and commit them in batches on a background
+    # thread (see write_behind.py). Off by default.
+    ANALYSIS_WRITE_BEHIND = _flag('ANALYSIS_WRITE_BEHIND', '0')
+    WRITE_BEHIND_QUEUE_SIZE = int(os.environ.get('WRITE_BEHIND_QUEUE_SIZE', 10000))
+    WRITE_BEHIND_BATCH_SIZE = int(os.environ.get('WRITE_BEHIND_BATCH_SIZE', 500))
+    WRITE_BEHIND_LINGER_MS = float(os.environ.get('WRITE_BEHIND_LINGER_MS', 20))
+    # Seconds a request waits on a full queue before writing inline
+    WRITE_BEHIND_PUT_TIMEOUT = float(os.environ.get('WRITE_BEHIND_PUT_TIMEOUT', 1.0))
+    # Seconds a user's own history/dashboard read waits for their queued rows
+    WRITE_BEHIND_READ_TIMEOUT = float(os.environ.get('WRITE_BEHIND_READ_TIMEOUT', 5.0))
+
+    # Rows fetched per round trip while streaming /api/export
+    EXPORT_CHUNK_ROWS = int(os.environ.get('EXPORT_CHUNK_ROWS', 1000))
+
+    # EPDS category thresholds for new screenings; see scoring.RULE_SETS
+    EPDS_RULE_SET = os.environ.get('EPDS_RULE_SET', 'epds-10')
+    # Rows per INSERT/commit for `flask import-screenings`
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 5000))
+    # Where `flask cohort-snapshot` writes its columnar snapshots
+    COHORT_DIR = os.environ.get('COHORT_DIR') or str(BASE_DIR / 'instance' / 'cohort')
+    LEXICON_DIR = os.environ.get('LEXICON_DIR') or str(BASE_DIR / 'lexicons')
+
+    SENTIMENT_CACHE_SIZE = int(os.environ.get('SENTIMENT_CACHE_SIZE', 4096))
+    SENTIMENT_CACHE_TTL = int(os.environ.get('SENTIMENT_CACHE_TTL', 3600))
+    SENTIMENT_CACHE_DB = os.environ.get('SENTIMENT_CACHE_DB')  # optional cross-worker tier
+    SENTIMENT_OFFLOAD = _flag('SENTIMENT_OFFLOAD')
+    SENTIMENT_POOL_SIZE = int(os.environ.get('SENTIMENT_POOL_SIZE', 2))
+    SENTIMENT_TIMEOUT = float(os.environ.get('SENTIMENT_TIMEOUT', 2.0))
+    # Load the sentiment analyzer at startup (in the background) rather than
+    # on the first request that needs it
+    SENTIMENT_WARMUP = _flag('SENTIMENT_WARMUP')
+    # Longest chatbot message /api/chat accepts
+    CHAT_MAX_LENGTH = int(os.environ.get('CHAT_MAX_LENGTH', 2000))
+    # Store chat turns through the write-behind queue even with
+    # ANALYSIS_WRITE_BEHIND off; the turn's id is then null
+    CHAT_ASYNC_PERSIST = _flag('CHAT_ASYNC_PERSIST', '1')
+
+    # Per-endpoint request histograms served at /metrics
+    METRICS_ENABLED = _flag('METRICS_ENABLED', '1')
+    # Add X-Query-Count/Server-Timing headers and log requests over QUERY_BUDGET
+    METRICS_DEBUG = _flag('METRICS_DEBUG')
+    # Queries per request before a request counts as over budget; 0 disables
+    QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', 10))
+
+    DASHBOARD_CACHE_SIZE = int(os.environ.get('DASHBOARD_CACHE_SIZE', 10000))
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 30))
+
+    # Where result pages' payloads live; the session only holds a token.
+    # The default SQLite file is shared by every worker on the host; use
+    # file:////path/to/dir likewise, or 'memory' for a single process only.
+    RESULT_STORE = os.environ.get('RESULT_STORE') or f"sqlite:///{BASE_DIR / 'instance' / 'results.db'}"
+    RESULT_STORE_TTL = int(os.environ.get('RESULT_STORE_TTL', 3600))
+
+    # Seconds a logged-in user's principal is reused without a DB query; 0 disables
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 10000))
+
+    # Rendered resource pages; 0 disables. Browsers may reuse a page for
+    # PAGE_CACHE_MAX_AGE seconds and revalidate with its ETag after that.
+    PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', 300))
+    PAGE_CACHE_SIZE = int(os.environ.get('PAGE_CACHE_SIZE', 10000))
+    PAGE_CACHE_MAX_AGE = int(os.environ.get('PAGE_CACHE_MAX_AGE', 300))
+
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    LOG_LEVELS = os.environ.get('LOG_LEVELS', '')  # e.g. "app=DEBUG,sqlalchemy.engine=WARNING"
+    LOG_JSON = _flag('LOG_JSON', '1')
+    LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', 1.0))
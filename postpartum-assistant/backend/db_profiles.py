@@ -0,0 +1,77 @@
+"""Database engine profiles selected with the DB_PROFILE setting.
+
+'default' leaves Flask-SQLAlchemy's engine options alone. 'production'
+tunes the engine for concurrent writers:
+
+SQLite
+    WAL journal so readers never block the writer, synchronous=NORMAL
+    (safe with WAL, far fewer fsyncs), a busy timeout so writers wait for
+    the lock instead of failing with "database is locked", plus mmap and
+    page-cache sizing. Pragmas are applied on every new connection.
+PostgreSQL and others
+    A sized QueuePool with pre-ping and connection recycling.
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+PROFILES = ('default', 'production')
+
+
+def is_sqlite(database_uri):
+    return make_url(database_uri).get_backend_name() == 'sqlite'
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured profile"""
+    profile = config['DB_PROFILE']
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {profile!r}; expected one of {PROFILES}")
+    if profile == 'default':
+        return {}
+
+    if is_sqlite(config['SQLALCHEMY_DATABASE_URI']):
+        return {
+            'connect_args': {
+                # sqlite3's own lock wait, in seconds; matches busy_timeout below
+                'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000,
+                'check_same_thread': False,
+            },
+        }
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+    }
+
+
+def sqlite_pragmas(config):
+    return (
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('busy_timeout', config['SQLITE_BUSY_TIMEOUT_MS']),
+        ('mmap_size', config['SQLITE_MMAP_SIZE']),
+        ('cache_size', config['SQLITE_CACHE_SIZE']),
+        ('temp_store', 'MEMORY'),
+    )
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    """Run the PRAGMA statements on every connection the engine opens"""
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def apply_profile(app, db):
+    """Finish engine setup after db.init_app(app)"""
+    if app.config['DB_PROFILE'] == 'production' and is_sqlite(app.config['SQLALCHEMY_DATABASE_URI']):
+        with app.app_context():
+            install_sqlite_pragmas(db.engine, sqlite_pragmas(app.config))
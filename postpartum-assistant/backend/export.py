@@ -0,0 +1,218 @@
+"""Streaming export of one user's analyses, screenings and support history.
+
+Rows are read with yield_per (a server-side cursor on drivers that have
+one) and written out as they arrive in BUFFER_BYTES chunks, so memory
+stays flat however long the history is. Screenings come from a single
+join of sessions to their answers, grouped per session as it streams.
+
+Sections go out in SECTIONS order, each oldest first by (timestamp, id)
+over the per-user indexes. Every record carries its type and id, and a
+download that broke off resumes with resume=<type>:<id> of the last
+record received: the export restarts just after it, without the CSV
+header the first part already has. start/end limit every section to a
+range of days.
+
+NDJSON is one object per line. CSV is one row per record over the union
+of the sections' columns, with a screening's answers in q1..q10. With
+compress the output is a gzip file, flushed at every chunk so the client
+gets data as it is produced.
+"""
+import csv
+import io
+import json
+import zlib
+from itertools import groupby
+
+from sqlalchemy import tuple_
+
+from models import db, Analysis, ScreeningSession, ScreeningResponse, PostpartumSupportHistory
+from scoring import EPDS_QUESTION_COUNT
+
+SECTIONS = ('analysis', 'screening', 'support')
+FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+BUFFER_BYTES = 64 * 1024
+
+# json.dumps() with options builds a new encoder per call
+_to_json = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+CSV_COLUMNS = (
+    ('type', 'id', 'timestamp', 'text', 'sentiment', 'confidence',
+     'total_score', 'q10_score', 'result_category', 'rule_set')
+    + tuple(f'q{q}' for q in range(1, EPDS_QUESTION_COUNT + 1))
+    + ('mood_score', 'sleep_hours', 'support_activities', 'notes')
+)
+
+# section -> (model, column records are ordered and ranged by)
+_TIME_COLUMNS = {
+    'analysis': (Analysis, Analysis.timestamp),
+    'screening': (ScreeningSession, ScreeningSession.created_at),
+    'support': (PostpartumSupportHistory, PostpartumSupportHistory.entry_date),
+}
+
+
+def resume_position(user_id, token):
+    """(section, timestamp, id) to restart after, from 'screening:42'
+
+    Raises ValueError for malformed tokens, for records the user does not
+    have (any more) and for records without a timestamp, which no
+    (timestamp, id) comparison can resume after.
+    """
+    section, _, row_id = token.partition(':')
+    if section not in SECTIONS or not row_id.isdigit():
+        raise ValueError(f'Invalid resume position: {token!r}')
+    model, time_column = _TIME_COLUMNS[section]
+    row = db.session.execute(
+        db.select(time_column).where(model.id == int(row_id), model.user_id == user_id)).first()
+    if row is None:
+        raise ValueError(f'No {section} {row_id} to resume after')
+    if row[0] is None:
+        raise ValueError(f'Cannot resume after {section} {row_id}: it has no timestamp')
+    return section, row[0], int(row_id)
+
+
+def records(user_id, start=None, end=None, after=None, chunk_rows=1000):
+    """Every exported record of user_id as a dict, in export order
+
+    start/end are datetimes (end exclusive); after is a resume_position().
+    """
+    first = SECTIONS.index(after[0]) if after else 0
+    for section in SECTIONS[first:]:
+        position = after[1:] if after and after[0] == section else None
+        yield from _READERS[section](user_id, start, end, position, chunk_rows)
+
+
+def _ranged(query, section, start, end, position):
+    model, time_column = _TIME_COLUMNS[section]
+    if start is not None:
+        query = query.where(time_column >= start)
+    if end is not None:
+        query = query.where(time_column < end)
+    if position is not None:
+        query = query.where(tuple_(time_column, model.id) > position)
+    return query.order_by(time_column, model.id)
+
+
+def _stream(query, chunk_rows):
+    return db.session.execute(query.execution_options(yield_per=chunk_rows))
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _analyses(user_id, start, end, position, chunk_rows):
+    query = db.select(Analysis.id, Analysis.timestamp, Analysis.text, Analysis.sentiment,
+                      Analysis.confidence).where(Analysis.user_id == user_id)
+    for row in _stream(_ranged(query, 'analysis', start, end, position), chunk_rows):
+        yield {
+            'type': 'analysis',
+            'id': row.id,
+            'timestamp': _iso(row.timestamp),
+            'text': row.text,
+            'sentiment': row.sentiment,
+            'confidence': row.confidence,
+        }
+
+
+def _screenings(user_id, start, end, position, chunk_rows):
+    # One row per answer, sessions kept together by the ordering
+    query = (
+        db.select(ScreeningSession.id, ScreeningSession.created_at, ScreeningSession.total_score,
+                  ScreeningSession.q10_score, ScreeningSession.result_category, ScreeningSession.rule_set,
+                  ScreeningResponse.question_number, ScreeningResponse.answer_value)
+        .outerjoin(ScreeningResponse, ScreeningResponse.session_id == ScreeningSession.id)
+        .where(ScreeningSession.user_id == user_id)
+    )
+    query = _ranged(query, 'screening', start, end, position).order_by(ScreeningResponse.question_number)
+    for _, rows in groupby(_stream(query, chunk_rows), key=lambda row: row.id):
+        answers = [None] * EPDS_QUESTION_COUNT
+        for row in rows:
+            if row.question_number is not None and 1 <= row.question_number <= EPDS_QUESTION_COUNT:
+                answers[row.question_number - 1] = row.answer_value
+        yield {
+            'type': 'screening',
+            'id': row.id,
+            'timestamp': _iso(row.created_at),
+            'total_score': row.total_score,
+            'q10_score': row.q10_score,
+            'result_category': row.result_category,
+            'rule_set': row.rule_set,
+            'answers': answers,
+        }
+
+
+def _support(user_id, start, end, position, chunk_rows):
+    query = db.select(PostpartumSupportHistory.id, PostpartumSupportHistory.entry_date,
+                      PostpartumSupportHistory.mood_score, PostpartumSupportHistory.sleep_hours,
+                      PostpartumSupportHistory.support_activities, PostpartumSupportHistory.notes
+                      ).where(PostpartumSupportHistory.user_id == user_id)
+    for row in _stream(_ranged(query, 'support', start, end, position), chunk_rows):
+        yield {
+            'type': 'support',
+            'id': row.id,
+            'timestamp': _iso(row.entry_date),
+            'mood_score': row.mood_score,
+            'sleep_hours': row.sleep_hours,
+            'support_activities': row.support_activities,
+            'notes': row.notes,
+        }
+
+
+_READERS = {'analysis': _analyses, 'screening': _screenings, 'support': _support}
+
+
+def ndjson_lines(records):
+    for record in records:
+        yield _to_json(record) + '\n'
+
+
+def csv_lines(records, header=True):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, CSV_COLUMNS, extrasaction='ignore')
+    if header:
+        writer.writeheader()
+    for record in records:
+        answers = record.get('answers')
+        if answers is not None:
+            record = {**record, **{f'q{q}': answer for q, answer in enumerate(answers, start=1)}}
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Only the header, for an empty export
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def encode(lines, compress=False):
+    """UTF-8 (optionally gzip) byte chunks of about BUFFER_BYTES from lines"""
+    compressor = zlib.compressobj(wbits=31) if compress else None  # 31: gzip header and trailer
+    pending = []
+    size = 0
+
+    def chunk(final=False):
+        data = ''.join(pending).encode('utf-8')
+        pending.clear()
+        if compressor is None:
+            return data
+        # A sync flush makes each chunk decodable as soon as it arrives
+        return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+    for line in lines:
+        pending.append(line)
+        size += len(line)
+        if size >= BUFFER_BYTES:
+            yield chunk()
+            size = 0
+    last = chunk(final=True)
+    if last:
+        yield last
+
+
+def export(user_id, fmt='ndjson', compress=False, start=None, end=None, after=None, chunk_rows=1000):
+    """Byte chunks of user_id's export; must be consumed in an app context"""
+    rows = records(user_id, start, end, after, chunk_rows)
+    if fmt == 'ndjson':
+        return encode(ndjson_lines(rows), compress)
+    # A resumed download is appended to the first part, which has the header
+    return encode(csv_lines(rows, header=after is None), compress)
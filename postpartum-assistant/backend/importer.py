@@ -0,0 +1,185 @@
+"""Streaming import of EPDS survey exports into ScreeningSession rows.
+
+Files are read one row at a time with the csv module and written in
+fixed-size batches, so memory stays flat no matter how long the export
+is. Each batch is a multi-row INSERT for the sessions (RETURNING their
+ids), another for their answers, then a commit.
+
+A file must have EPDS_1 .. EPDS_10 columns; any other columns are
+ignored. Rows with every field blank are skipped silently (the bundled
+datasets are padded with them), and rows with a missing or out-of-range
+answer are counted as invalid and skipped. `.csv.gz` files are read
+without unpacking them first.
+"""
+import csv
+import gzip
+import io
+import logging
+import time
+from datetime import datetime
+from itertools import islice
+
+from models import db, ScreeningSession, ScreeningResponse
+from rollups import record as record_rollups, screening_delta
+from scoring import EPDS_MAX_ANSWER, EPDS_QUESTION_COUNT, get_rule_set
+
+logger = logging.getLogger('app.importer')
+
+EPDS_COLUMNS = tuple(f'EPDS_{q}' for q in range(1, EPDS_QUESTION_COUNT + 1))
+
+
+class ImportStats:
+    """Counters for one import run"""
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.blank = 0
+        self.invalid = 0
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def open_csv(path):
+    """Text stream for a .csv or .csv.gz file"""
+    if str(path).endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8-sig', newline='')
+    return open(path, encoding='utf-8-sig', newline='')
+
+
+def iter_rows(stream):
+    """Yield the EPDS fields of each data row; blank rows become None
+
+    Raises ValueError if the header lacks any EPDS column.
+    """
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        raise ValueError('file is empty')
+
+    columns = [name.strip() for name in header]
+    missing = [name for name in EPDS_COLUMNS if name not in columns]
+    if missing:
+        raise ValueError(f"missing EPDS columns: {', '.join(missing)}")
+
+    positions = [columns.index(name) for name in EPDS_COLUMNS]
+    for row in reader:
+        if not any(field.strip() for field in row):
+            yield None
+        else:
+            yield [row[i] if i < len(row) else '' for i in positions]
+
+
+def parse_answers(fields):
+    """Answer values 0-3 for one row, or None if any is missing or invalid"""
+    answers = []
+    for field in fields:
+        try:
+            value = float(field)
+        except ValueError:
+            return None
+        if not value.is_integer() or not 0 <= value <= EPDS_MAX_ANSWER:
+            return None
+        answers.append(int(value))
+    return answers
+
+
+def iter_screenings(rows, stats):
+    """Turn EPDS rows into answer lists, counting what gets skipped"""
+    for fields in rows:
+        stats.rows += 1
+        if fields is None:
+            stats.blank += 1
+            continue
+        answers = parse_answers(fields)
+        if answers is None:
+            stats.invalid += 1
+            continue
+        yield answers
+
+
+def chunked(iterable, size):
+    """Yield lists of up to size items without materialising the input"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def insert_session_rows(rows):
+    """Insert screening_session rows; returns their ids in parameter order"""
+    table = ScreeningSession.__table__
+    if db.engine.dialect.name == 'sqlite':
+        # SQLAlchemy can only guarantee RETURNING order on SQLite by going
+        # row at a time. The transaction holds SQLite's write lock and every
+        # new rowid is max(rowid) + 1, so sorting the ids gives the same
+        # order at full multi-row INSERT speed.
+        return sorted(db.session.execute(table.insert().returning(table.c.id), rows).scalars())
+    return db.session.execute(
+        table.insert().returning(table.c.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+
+
+def insert_batch(batch, rules, user_id=None):
+    """Insert one batch of answer lists as sessions plus responses
+
+    Uses Core table inserts; the ORM bulk path spends most of its time
+    building per-row state that plain dict rows do not need.
+    """
+    now = datetime.utcnow()
+    sessions = []
+    for answers in batch:
+        total_score = sum(answers)
+        q10_score = answers[-1]
+        sessions.append({
+            'user_id': user_id,
+            'total_score': total_score,
+            'result_category': rules.categorize(total_score, q10_score),
+            'q10_score': q10_score,
+            'rule_set': rules.version,
+            'created_at': now,
+        })
+
+    session_ids = insert_session_rows(sessions)
+    db.session.execute(ScreeningResponse.__table__.insert(), [
+        {'session_id': session_id, 'question_number': q_num, 'answer_value': answer}
+        for session_id, answers in zip(session_ids, batch)
+        for q_num, answer in enumerate(answers, start=1)
+    ])
+    if user_id is not None:
+        record_rollups(db.session.connection(),
+                       (screening_delta(user_id, now, row['total_score']) for row in sessions))
+    db.session.commit()
+
+
+def import_screenings(path, batch_size=5000, user_id=None, rules=None):
+    """Stream one EPDS export into the database; returns ImportStats
+
+    Must run inside an app context. Each committed batch stays committed
+    if a later one fails. rules is the scoring.RuleSet to categorise with
+    (default: scoring.DEFAULT_RULE_SET).
+    """
+    rules = rules or get_rule_set()
+    stats = ImportStats()
+    start = time.perf_counter()
+    with open_csv(path) as stream:
+        screenings = iter_screenings(iter_rows(stream), stats)
+        for batch in chunked(screenings, batch_size):
+            insert_batch(batch, rules, user_id)
+            stats.imported += len(batch)
+    stats.elapsed = time.perf_counter() - start
+
+    logger.info('Imported screenings', extra={
+        'path': str(path),
+        'rows': stats.rows,
+        'imported': stats.imported,
+        'blank': stats.blank,
+        'invalid': stats.invalid,
+        'rows_per_second': round(stats.rows_per_second),
+    })
+    return stats
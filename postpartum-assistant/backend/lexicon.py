@@ -0,0 +1,136 @@
+"""Keyword lexicons matched on whole words.
+
+A lexicon file has one term per line, optionally followed by a tab and a
+weight (default 1.0). Blank lines and lines starting with '#' are ignored.
+Multi-word terms match across any run of whitespace.
+
+Lexicons of REGEX_MIN_TERMS terms or more, and any whose terms can
+overlap ("sad" and "sad day"), are folded into a trie and compiled into
+a single regex, so the regex engine walks shared prefixes once and the
+cost of a lookup grows with the text length rather than with the number
+of terms. Smaller ones, like the bundled lexicons, are cheaper to check
+term by term: a substring test rules most terms out and only the rest
+get a word-boundary check.
+"""
+import re
+from pathlib import Path
+
+_END = ''
+
+# Below this many terms the per-term check beats the trie regex (see
+# benchmarks/bench_lexicon.py)
+REGEX_MIN_TERMS = 100
+
+
+def _normalize(term):
+    return ' '.join(term.lower().split())
+
+
+def _trie_pattern(node):
+    """Turn a nested dict trie into an equivalent regex fragment"""
+    branches = []
+    for char in sorted(key for key in node if key != _END):
+        token = r'\s+' if char == ' ' else re.escape(char)
+        branches.append(token + _trie_pattern(node[char]))
+
+    if not branches:
+        return ''
+    pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if _END in node:
+        # A term ends here but longer ones continue; prefer the longer match
+        pattern = '(?:' + pattern + ')?'
+    return pattern
+
+
+def _whole_word(text, word):
+    """Whether word occurs in text other than inside a longer word"""
+    start = text.find(word)
+    while start != -1:
+        end = start + len(word)
+        if ((start == 0 or not _word_char(text[start - 1]))
+                and (end == len(text) or not _word_char(text[end]))):
+            return True
+        start = text.find(word, start + 1)
+    return False
+
+
+def _word_char(char):
+    return char.isalnum() or char == '_'
+
+
+def _can_overlap(a, b):
+    """Whether matches of terms a and b can share a word
+
+    The regex takes the longer of two such matches and drops the other,
+    which checking term by term would not.
+    """
+    a, b = a.split(), b.split()
+    return any(all(x == y for x, y in zip(a[max(0, k):], b[max(0, -k):]))
+               for k in range(1 - len(b), len(a)))
+
+
+class Lexicon:
+    """Weighted set of terms matched on whole words"""
+
+    def __init__(self, weights):
+        self.weights = {_normalize(term): float(weight) for term, weight in weights.items()}
+        self.weights.pop('', None)
+
+        self.regex = None
+        self._checks = []
+        multi_word = [term for term in self.weights if ' ' in term]
+        if len(self.weights) >= REGEX_MIN_TERMS or any(
+                _can_overlap(a, b) for a in multi_word for b in self.weights if a != b):
+            trie = {}
+            for term in self.weights:
+                node = trie
+                for char in term:
+                    node = node.setdefault(char, {})
+                node[_END] = True
+            self.regex = re.compile(r'\b' + _trie_pattern(trie) + r'\b')
+        else:
+            # (term, its first word, regex for multi-word terms)
+            self._checks = [
+                (term, term.split()[0],
+                 re.compile(r'\b' + r'\s+'.join(map(re.escape, term.split())) + r'\b') if ' ' in term else None)
+                for term in self.weights
+            ]
+
+    @classmethod
+    def from_file(cls, path):
+        weights = {}
+        with open(path, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                term, _, weight = line.partition('\t')
+                try:
+                    weights[term] = float(weight) if weight.strip() else 1.0
+                except ValueError:
+                    raise ValueError(f"{path}:{line_number}: invalid weight {weight!r}")
+        return cls(weights)
+
+    def __len__(self):
+        return len(self.weights)
+
+    def matches(self, text):
+        """Set of distinct lexicon terms found in text"""
+        text = text.lower()
+        if self.regex is not None:
+            return {_normalize(match) for match in self.regex.findall(text)}
+        found = set()
+        for term, first, pattern in self._checks:
+            # A plain substring test rules most terms out
+            if first in text and (_whole_word(text, term) if pattern is None else pattern.search(text)):
+                found.add(term)
+        return found
+
+    def score(self, text):
+        """Sum of weights of the distinct terms found in text"""
+        return sum(self.weights[term] for term in self.matches(text))
+
+
+def load_lexicons(directory):
+    """Load every *.txt lexicon in a directory, keyed by file stem"""
+    return {path.stem: Lexicon.from_file(path) for path in sorted(Path(directory).glob('*.txt'))}
@@ -0,0 +1,134 @@
+"""Non-blocking, structured logging for the app.
+
+Request threads only put records on an in-memory queue; a single
+QueueListener thread formats them as JSON lines and does the actual I/O.
+Journal text never reaches the output: any `text` attribute passed via
+`extra=` is replaced with its length and a short hash.
+"""
+import atexit
+import hashlib
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+# Field names whose values are user-written journal content
+REDACTED_FIELDS = ('text', 'full_text', 'journal_text')
+
+_listener = None
+
+
+def redact(value):
+    """Length and short digest of a sensitive string, safe to log"""
+    digest = hashlib.sha256(str(value).encode('utf-8')).hexdigest()[:12]
+    return f"<redacted len={len(str(value))} sha256={digest}>"
+
+
+class RedactFilter(logging.Filter):
+    def filter(self, record):
+        for field in REDACTED_FIELDS:
+            if hasattr(record, field):
+                setattr(record, field, redact(getattr(record, field)))
+        return True
+
+
+class DebugSampleFilter(logging.Filter):
+    """Pass only a fraction of DEBUG records; other levels always pass"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _LocalQueueHandler(QueueHandler):
+    """QueueHandler for an in-process queue
+
+    The stock handler formats every record in the calling thread so it
+    can be pickled; records here never leave the process, so formatting
+    is left to the listener thread.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def parse_levels(spec):
+    """'app=INFO,sentiment_worker=DEBUG' -> {'app': 'INFO', ...}"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        name, _, level = item.partition('=')
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level='INFO', levels=None, json_output=True,
+                      debug_sample_rate=1.0, stream=None):
+    """Route the root logger through a queue to one background writer
+
+    Safe to call more than once; later calls replace the earlier setup.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JSONFormatter() if json_output else
+                        logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    # Filters run in the caller's thread before the record is queued, so
+    # sampled-out debug records cost almost nothing and raw text never
+    # sits on the queue
+    queue_handler = _LocalQueueHandler(queue.SimpleQueue())
+    if debug_sample_rate < 1.0:
+        queue_handler.addFilter(DebugSampleFilter(debug_sample_rate))
+    queue_handler.addFilter(RedactFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    for name, module_level in (levels or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = QueueListener(queue_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
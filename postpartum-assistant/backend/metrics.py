@@ -0,0 +1,221 @@
+"""Per-endpoint request metrics in Prometheus text format.
+
+For every request the app records wall time, time spent in database
+cursors, the number of queries and time spent rendering templates, into
+per-endpoint histograms served at /metrics.
+
+Collection is cheap enough to leave on:
+- A context variable holds the running totals of the current request.
+  The SQLAlchemy cursor hooks and Flask's template signals add to it with
+  two perf_counter() calls and no locking.
+- The registry lock is taken once per request, when the totals go into
+  the histograms.
+- Queries made outside a request (the write-behind thread, CLI
+  commands) see no active request and return immediately.
+
+With METRICS_DEBUG on, responses carry X-Query-Count and Server-Timing
+headers, and requests running more than QUERY_BUDGET queries are logged
+as warnings. Requests over the budget are always counted.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from flask import before_render_template, request, template_rendered
+from sqlalchemy import event
+
+logger = logging.getLogger('app.metrics')
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+# Endpoint label for requests that matched no route, so 404 probes do not
+# create a series per URL
+UNMATCHED = '<unmatched>'
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestTotals:
+    """Running totals for the request being served"""
+
+    __slots__ = ('start', 'db_time', 'queries', 'render_time', 'query_start', 'render_start')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.render_time = 0.0
+        self.query_start = None
+        self.render_start = None
+
+
+class Histogram:
+    """Bucket counts, sum and count; callers hold the registry lock"""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.bounds + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.sum:.6f}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class _EndpointStats:
+    __slots__ = ('wall', 'db', 'queries', 'render', 'statuses', 'over_budget')
+
+    def __init__(self):
+        self.wall = Histogram(SECONDS_BUCKETS)
+        self.db = Histogram(SECONDS_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.render = Histogram(SECONDS_BUCKETS)
+        self.statuses = {}
+        self.over_budget = 0
+
+
+# (metric suffix, attribute, help text) for the per-endpoint histograms
+HISTOGRAMS = (
+    ('duration_seconds', 'wall', 'Wall time per request'),
+    ('db_seconds', 'db', 'Time spent in database cursors per request'),
+    ('queries', 'queries', 'Database queries per request'),
+    ('render_seconds', 'render', 'Template render time per request'),
+)
+
+
+class RequestMetrics:
+    """Per (endpoint, method) histograms and status counters"""
+
+    def __init__(self, prefix='ppd_http_request'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, method, status, totals, wall, over_budget):
+        with self._lock:
+            stats = self._endpoints.get((endpoint, method))
+            if stats is None:
+                stats = self._endpoints[(endpoint, method)] = _EndpointStats()
+            stats.wall.observe(wall)
+            stats.db.observe(totals.db_time)
+            stats.queries.observe(totals.queries)
+            stats.render.observe(totals.render_time)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            if over_budget:
+                stats.over_budget += 1
+
+    def render(self):
+        """Everything recorded so far, in Prometheus text exposition format"""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = []
+            for suffix, attribute, help_text in HISTOGRAMS:
+                name = f'{self.prefix}_{suffix}'
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for (endpoint, method), stats in endpoints:
+                    lines.extend(getattr(stats, attribute).samples(name, _labels(endpoint, method)))
+
+            name = f'{self.prefix}s_total'
+            lines += [f'# HELP {name} Requests by status code', f'# TYPE {name} counter']
+            for (endpoint, method), stats in endpoints:
+                labels = _labels(endpoint, method)
+                lines.extend(f'{name}{{{labels},status="{status}"}} {count}'
+                             for status, count in sorted(stats.statuses.items()))
+
+            name = f'{self.prefix}_query_budget_exceeded_total'
+            lines += [f'# HELP {name} Requests that ran more queries than QUERY_BUDGET',
+                      f'# TYPE {name} counter']
+            lines.extend(f'{name}{{{_labels(endpoint, method)}}} {stats.over_budget}'
+                         for (endpoint, method), stats in endpoints)
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(endpoint, method):
+    return f'endpoint="{_escape(endpoint)}",method="{method}"'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    totals = _current.get()
+    if totals is not None:
+        totals.query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    totals = _current.get()
+    if totals is not None and totals.query_start is not None:
+        totals.db_time += time.perf_counter() - totals.query_start
+        totals.queries += 1
+        totals.query_start = None
+
+
+def _before_render(sender, template, context, **extra):
+    totals = _current.get()
+    if totals is not None:
+        totals.render_start = time.perf_counter()
+
+
+def _rendered(sender, template, context, **extra):
+    totals = _current.get()
+    if totals is not None and totals.render_start is not None:
+        totals.render_time += time.perf_counter() - totals.render_start
+        totals.render_start = None
+
+
+def install(app, db, registry):
+    """Hook request timing, cursor events and template signals into app"""
+    budget = app.config['QUERY_BUDGET']
+    debug = app.config['METRICS_DEBUG']
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_rendered, app)
+
+    @app.before_request
+    def start_request_metrics():
+        _current.set(RequestTotals())
+
+    @app.after_request
+    def record_request_metrics(response):
+        totals = _current.get()
+        if totals is None:
+            return response
+        wall = time.perf_counter() - totals.start
+        endpoint = request.endpoint or UNMATCHED
+        over_budget = 0 < budget < totals.queries
+        registry.record(endpoint, request.method, response.status_code, totals, wall, over_budget)
+
+        if debug:
+            response.headers['X-Query-Count'] = str(totals.queries)
+            response.headers['Server-Timing'] = (
+                f'db;dur={totals.db_time * 1000:.2f}, render;dur={totals.render_time * 1000:.2f}, '
+                f'total;dur={wall * 1000:.2f}')
+            if over_budget:
+                logger.warning('Request exceeded query budget', extra={
+                    'endpoint': endpoint, 'method': request.method,
+                    'queries': totals.queries, 'budget': budget})
+        return response
+
+    @app.teardown_request
+    def clear_request_metrics(exc):
+        _current.set(None)
@@ -0,0 +1,26 @@
+"""Add rule_set to screening_session
+
+Revision ID: 5e9b2d7c1a43
+Revises: c4d1e8a27f90
+Create Date: 2026-10-17 13:02:17.448215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e9b2d7c1a43'
+down_revision = 'c4d1e8a27f90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('screening_session', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rule_set', sa.String(length=20), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('screening_session', schema=None) as batch_op:
+        batch_op.drop_column('rule_set')
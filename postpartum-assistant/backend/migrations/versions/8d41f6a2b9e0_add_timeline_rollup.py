@@ -0,0 +1,42 @@
+"""Add timeline_rollup
+
+Revision ID: 8d41f6a2b9e0
+Revises: 5e9b2d7c1a43
+Create Date: 2026-10-17 13:21:05.772410
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41f6a2b9e0'
+down_revision = '5e9b2d7c1a43'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('timeline_rollup',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.String(length=4), nullable=False),
+    sa.Column('bucket_start', sa.Date(), nullable=False),
+    sa.Column('analysis_count', sa.Integer(), nullable=False),
+    sa.Column('positive_count', sa.Integer(), nullable=False),
+    sa.Column('negative_count', sa.Integer(), nullable=False),
+    sa.Column('neutral_count', sa.Integer(), nullable=False),
+    sa.Column('confidence_sum', sa.Float(), nullable=False),
+    sa.Column('screening_count', sa.Integer(), nullable=False),
+    sa.Column('epds_sum', sa.Integer(), nullable=False),
+    sa.Column('mood_count', sa.Integer(), nullable=False),
+    sa.Column('mood_sum', sa.Integer(), nullable=False),
+    sa.Column('sleep_count', sa.Integer(), nullable=False),
+    sa.Column('sleep_sum', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'bucket', 'bucket_start')
+    )
+    # Existing data is not rolled up here; run `flask rebuild-rollups`
+
+
+def downgrade():
+    op.drop_table('timeline_rollup')
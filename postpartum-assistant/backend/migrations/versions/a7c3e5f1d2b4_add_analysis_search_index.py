@@ -0,0 +1,62 @@
+"""Add full-text search index over analysis.text
+
+Revision ID: a7c3e5f1d2b4
+Revises: 8d41f6a2b9e0
+Create Date: 2026-10-17 14:02:41.518230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e5f1d2b4'
+down_revision = '8d41f6a2b9e0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        # FTS rowids are (user_id << 32) + id so each user's entries are
+        # contiguous in the index; see search.py
+        op.execute("CREATE INDEX IF NOT EXISTS ix_analysis_search_rowid "
+                   "ON analysis(((user_id << 32) + id))")
+        op.execute("CREATE VIEW IF NOT EXISTS analysis_fts_source AS "
+                   "SELECT (user_id << 32) + id AS search_rowid, text FROM analysis")
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS analysis_fts USING fts5("
+                   "text, content='analysis_fts_source', content_rowid='search_rowid', "
+                   "tokenize='porter unicode61')")
+        op.execute("CREATE TRIGGER IF NOT EXISTS analysis_fts_ai AFTER INSERT ON analysis BEGIN "
+                   "INSERT INTO analysis_fts(rowid, text) "
+                   "VALUES ((new.user_id << 32) + new.id, new.text); END")
+        op.execute("CREATE TRIGGER IF NOT EXISTS analysis_fts_ad AFTER DELETE ON analysis BEGIN "
+                   "INSERT INTO analysis_fts(analysis_fts, rowid, text) "
+                   "VALUES ('delete', (old.user_id << 32) + old.id, old.text); END")
+        op.execute("CREATE TRIGGER IF NOT EXISTS analysis_fts_au AFTER UPDATE OF text, user_id ON analysis BEGIN "
+                   "INSERT INTO analysis_fts(analysis_fts, rowid, text) "
+                   "VALUES ('delete', (old.user_id << 32) + old.id, old.text); "
+                   "INSERT INTO analysis_fts(rowid, text) "
+                   "VALUES ((new.user_id << 32) + new.id, new.text); END")
+        # Existing entries are not indexed here; run `flask backfill-search`
+    elif dialect == 'postgresql':
+        # The generated column is filled for existing rows as it is added
+        op.execute("ALTER TABLE analysis ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                   "GENERATED ALWAYS AS (to_tsvector('english', coalesce(text, ''))) STORED")
+        op.create_index('ix_analysis_search_vector', 'analysis', [sa.text('search_vector')],
+                        postgresql_using='gin', if_not_exists=True)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS analysis_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS analysis_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS analysis_fts_ai")
+        op.execute("DROP TABLE IF EXISTS analysis_fts")
+        op.execute("DROP VIEW IF EXISTS analysis_fts_source")
+        op.execute("DROP INDEX IF EXISTS ix_analysis_search_rowid")
+    elif dialect == 'postgresql':
+        op.drop_index('ix_analysis_search_vector', table_name='analysis', if_exists=True)
+        op.execute("ALTER TABLE analysis DROP COLUMN IF EXISTS search_vector")
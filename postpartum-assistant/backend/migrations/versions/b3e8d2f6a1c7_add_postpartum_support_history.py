@@ -0,0 +1,35 @@
+"""Add postpartum_support_history
+
+Revision ID: b3e8d2f6a1c7
+Revises: a7c3e5f1d2b4
+Create Date: 2026-10-17 16:05:12.447019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8d2f6a1c7'
+down_revision = 'a7c3e5f1d2b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('postpartum_support_history',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('entry_date', sa.DateTime(), nullable=True),
+    sa.Column('mood_score', sa.Integer(), nullable=False),
+    sa.Column('sleep_hours', sa.Float(), nullable=True),
+    sa.Column('support_activities', sa.Text(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('postpartum_support_history')
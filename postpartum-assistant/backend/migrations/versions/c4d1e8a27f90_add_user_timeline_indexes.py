@@ -0,0 +1,33 @@
+"""Add per-user timeline indexes to analysis and screening_session
+
+Revision ID: c4d1e8a27f90
+Revises: 6b3ae507b16c
+Create Date: 2026-10-17 09:12:41.305118
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d1e8a27f90'
+down_revision = '6b3ae507b16c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('analysis', schema=None) as batch_op:
+        batch_op.create_index('ix_analysis_user_id_timestamp', ['user_id', 'timestamp'], unique=False)
+        batch_op.create_index('ix_analysis_user_id_sentiment', ['user_id', 'sentiment'], unique=False)
+
+    with op.batch_alter_table('screening_session', schema=None) as batch_op:
+        batch_op.create_index('ix_screening_session_user_id_created_at', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('screening_session', schema=None) as batch_op:
+        batch_op.drop_index('ix_screening_session_user_id_created_at')
+
+    with op.batch_alter_table('analysis', schema=None) as batch_op:
+        batch_op.drop_index('ix_analysis_user_id_sentiment')
+        batch_op.drop_index('ix_analysis_user_id_timestamp')
@@ -0,0 +1,33 @@
+"""Add indexes for per-user exports to screening_response and postpartum_support_history
+
+Revision ID: e2f6b8c4a913
+Revises: b3e8d2f6a1c7
+Create Date: 2026-10-17 15:37:08.614902
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2f6b8c4a913'
+down_revision = 'b3e8d2f6a1c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('screening_response', schema=None) as batch_op:
+        batch_op.create_index('ix_screening_response_session_id_question_number',
+                              ['session_id', 'question_number'], unique=False)
+
+    with op.batch_alter_table('postpartum_support_history', schema=None) as batch_op:
+        batch_op.create_index('ix_postpartum_support_history_user_id_entry_date',
+                              ['user_id', 'entry_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('postpartum_support_history', schema=None) as batch_op:
+        batch_op.drop_index('ix_postpartum_support_history_user_id_entry_date')
+
+    with op.batch_alter_table('screening_response', schema=None) as batch_op:
+        batch_op.drop_index('ix_screening_response_session_id_question_number')
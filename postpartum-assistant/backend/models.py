@@ -1,35 +1,78 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from flask_login import UserMixin
+from werkzeug.security import generate_password_hash, check_password_hash
 
 # Initialize SQLAlchemy without binding to app
 db = SQLAlchemy()
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(50))
-    email = db.Column(db.String(100), unique=True)
-    password = db.Column(db.String(100))  # Added password field
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)  # Added created_at
+    username = db.Column(db.String(50), unique=True, nullable=False)
+    email = db.Column(db.String(100), unique=True, nullable=False)
+    password_hash = db.Column(db.String(128), nullable=False)
     analyses = db.relationship('Analysis', backref='user', lazy=True)
-    postpartum_entries = db.relationship('PostpartumSupportHistory', backref='user', lazy=True)  # New relationship
+    postpartum_entries = db.relationship('PostpartumSupportHistory', backref='user', lazy=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def set_password(self, password):
+        self.password_hash = generate_password_hash(password)
+
+    def check_password(self, password):
+        return check_password_hash(self.password_hash, password)
 
     def __repr__(self):
-        return f'<User {self.name}>'
+        return f'<User {self.username}>'
+
+class ScreeningSession(db.Model):
+    __table_args__ = (
+        # screening_history() lists a user's sessions newest first
+        db.Index('ix_screening_session_user_id_created_at', 'user_id', 'created_at'),
+    )
 
-class Analysis(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
-    sentiment = db.Column(db.String(50))
-    confidence = db.Column(db.Float)
-    text = db.Column(db.Text)
-    timestamp = db.Column(db.DateTime, default=db.func.current_timestamp())
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)  # Added created_at
-    
+    total_score = db.Column(db.Integer)
+    result_category = db.Column(db.String(50))
+    q10_score = db.Column(db.Integer)
+    rule_set = db.Column(db.String(20))  # scoring.RuleSet version behind result_category
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ScreeningResponse(db.Model):
+    __table_args__ = (
+        # Exports join a session to its answers in question order
+        db.Index('ix_screening_response_session_id_question_number', 'session_id', 'question_number'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.Integer, db.ForeignKey('screening_session.id'))
+    question_number = db.Column(db.Integer)
+    answer_value = db.Column(db.Integer)
+
+class Analysis(db.Model):
+    __table_args__ = (
+        # History pages and the dashboard read one user's rows newest first
+        db.Index('ix_analysis_user_id_timestamp', 'user_id', 'timestamp'),
+        # Dashboard sentiment counts group a user's rows by sentiment
+        db.Index('ix_analysis_user_id_sentiment', 'user_id', 'sentiment'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    text = db.Column(db.String(500), nullable=False)
+    sentiment = db.Column(db.String(20), nullable=False)
+    confidence = db.Column(db.Float, nullable=False)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
     def __repr__(self):
         return f'<Analysis {self.id} - {self.sentiment}>'
 
 class PostpartumSupportHistory(db.Model):
+    __table_args__ = (
+        # Exports read one user's entries oldest first
+        db.Index('ix_postpartum_support_history_user_id_entry_date', 'user_id', 'entry_date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     entry_date = db.Column(db.DateTime, default=datetime.utcnow)
@@ -40,4 +83,22 @@ class PostpartumSupportHistory(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
-        return f'<PostpartumEntry {self.id} - Mood: {self.mood_score}>'
\ No newline at end of file
+        return f'<PostpartumEntry {self.id} - Mood: {self.mood_score}>'
+
+class TimelineRollup(db.Model):
+    """Per-user sums for one day or week, maintained by rollups.py"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    bucket = db.Column(db.String(4), primary_key=True)  # 'day' or 'week'
+    bucket_start = db.Column(db.Date, primary_key=True)
+
+    analysis_count = db.Column(db.Integer, nullable=False, default=0)
+    positive_count = db.Column(db.Integer, nullable=False, default=0)
+    negative_count = db.Column(db.Integer, nullable=False, default=0)
+    neutral_count = db.Column(db.Integer, nullable=False, default=0)
+    confidence_sum = db.Column(db.Float, nullable=False, default=0.0)
+    screening_count = db.Column(db.Integer, nullable=False, default=0)
+    epds_sum = db.Column(db.Integer, nullable=False, default=0)
+    mood_count = db.Column(db.Integer, nullable=False, default=0)
+    mood_sum = db.Column(db.Integer, nullable=False, default=0)
+    sleep_count = db.Column(db.Integer, nullable=False, default=0)
+    sleep_sum = db.Column(db.Float, nullable=False, default=0.0)
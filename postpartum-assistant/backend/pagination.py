@@ -0,0 +1,67 @@
+"""Keyset (cursor) pagination for newest-first timelines.
+
+OFFSET pagination makes the database walk and discard every earlier row,
+and page counts need a separate COUNT(*). A keyset page instead seeks
+straight to the last row the client saw, using the (user_id, timestamp)
+index, so every page costs the same no matter how deep it is.
+"""
+import base64
+from datetime import datetime
+
+
+def encode_cursor(timestamp, row_id):
+    """Opaque token for the position just after (timestamp, row_id)"""
+    raw = f"{timestamp.isoformat()},{row_id}".encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Inverse of encode_cursor; raises ValueError for malformed tokens"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('ascii')
+        timestamp, row_id = raw.rsplit(',', 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
+
+
+class KeysetPage:
+    """One page of rows plus the cursor for the next one"""
+
+    def __init__(self, items, has_next, next_cursor, total=None):
+        self.items = items
+        self.has_next = has_next
+        self.next_cursor = next_cursor
+        self.total = total
+
+
+def keyset_paginate(query, sort_column, id_column, after=None, per_page=10, count=False):
+    """Return the page of query (newest first) following the cursor `after`
+
+    sort_column and id_column together must identify a row; id breaks ties
+    between rows sharing a timestamp. Pass count=True to also run the
+    (linear) COUNT(*) for clients that want an exact total. Raises
+    ValueError if per_page is less than 1.
+    """
+    from sqlalchemy import tuple_
+
+    if per_page < 1:
+        raise ValueError(f"per_page must be at least 1, not {per_page}")
+
+    total = query.order_by(None).count() if count else None
+
+    if after:
+        after_sort, after_id = decode_cursor(after)
+        query = query.filter(tuple_(sort_column, id_column) < (after_sort, after_id))
+
+    # Fetch one extra row to learn whether another page exists
+    rows = query.order_by(sort_column.desc(), id_column.desc()).limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return KeysetPage(items, has_next, next_cursor, total)
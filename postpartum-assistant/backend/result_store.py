@@ -0,0 +1,152 @@
+"""Server-side storage for one-off result payloads.
+
+The analysis and screening result pages used to receive their data
+through Flask's cookie session, which ships the whole payload (journal
+text included) back and forth on every later request. Now the payload
+stays on the server and the session only carries a short random token.
+
+Backends are chosen with a URL-like setting:
+    memory                       per-process; fine for a single worker
+    sqlite:////path/results.db   shared by every worker on the host
+    file:////path/to/dir         one JSON file per result
+"""
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from cache import TTLCache
+
+
+def new_token():
+    return secrets.token_urlsafe(16)
+
+
+class MemoryResultStore:
+    def __init__(self, ttl=3600, maxsize=10000):
+        self.ttl = ttl
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def put(self, payload):
+        token = new_token()
+        self._cache.set(token, payload)
+        return token
+
+    def get(self, token):
+        return self._cache.get(token)
+
+    def delete(self, token):
+        self._cache.invalidate(token)
+
+
+class SQLiteResultStore:
+    # Expired rows are purged on roughly one write in this many
+    PURGE_EVERY = 100
+
+    def __init__(self, path, ttl=3600):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS result_store '
+            '(token TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def put(self, payload):
+        token = new_token()
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            'INSERT INTO result_store (token, payload, expires_at) VALUES (?, ?, ?)',
+            (token, json.dumps(payload), now + self.ttl)
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute('DELETE FROM result_store WHERE expires_at <= ?', (now,))
+        return token
+
+    def get(self, token):
+        row = self._connection().execute(
+            'SELECT payload FROM result_store WHERE token = ? AND expires_at > ?',
+            (token, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, token):
+        self._connection().execute('DELETE FROM result_store WHERE token = ?', (token,))
+
+
+class FileResultStore:
+    PURGE_EVERY = 100
+
+    def __init__(self, directory, ttl=3600):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self._writes = 0
+
+    def _path(self, token):
+        # Tokens are urlsafe base64, but never trust them as path components
+        if not token or not token.replace('-', '').replace('_', '').isalnum():
+            return None
+        return self.directory / f'{token}.json'
+
+    def put(self, payload):
+        token = new_token()
+        path = self._path(token)
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(payload), encoding='utf-8')
+        os.replace(tmp, path)  # readers never see a half-written file
+
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self.purge()
+        return token
+
+    def get(self, token):
+        path = self._path(token)
+        try:
+            if path is None or path.stat().st_mtime + self.ttl <= time.time():
+                return None
+            return json.loads(path.read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def delete(self, token):
+        path = self._path(token)
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+    def purge(self):
+        cutoff = time.time() - self.ttl
+        for path in self.directory.glob('*.json'):
+            try:
+                if path.stat().st_mtime <= cutoff:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def create_result_store(url, ttl=3600):
+    """Build a result store from a RESULT_STORE setting"""
+    if url == 'memory':
+        return MemoryResultStore(ttl=ttl)
+    if url.startswith('sqlite:///'):
+        return SQLiteResultStore(url[len('sqlite:///'):], ttl=ttl)
+    if url.startswith('file:///'):
+        return FileResultStore(url[len('file:///'):], ttl=ttl)
+    raise ValueError(f"Unsupported RESULT_STORE: {url!r}")
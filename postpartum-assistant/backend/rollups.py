@@ -0,0 +1,230 @@
+"""Per-user daily and weekly rollups behind the mood/screening charts.
+
+Charting used to mean reading every Analysis, ScreeningSession and
+PostpartumSupportHistory row a user ever wrote and bucketing them per
+request. Instead each write adds its numbers to a timeline_rollup row for
+its day and its week (weeks start on Monday). Rows hold sums and counts,
+never means, so updates are plain additions (INSERT ... ON CONFLICT DO
+UPDATE) and merged buckets still average correctly.
+
+ORM inserts of the three models are picked up by mapper events. Bulk
+inserts that bypass the ORM call record() themselves. Updates and
+deletes are not tracked; `flask rebuild-rollups` recomputes everything
+from the source tables.
+
+series() reads at most one row per bucket in the requested range, so its
+cost depends on the range and never on how many entries a user has.
+"""
+import math
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, event, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, Analysis, ScreeningSession, PostpartumSupportHistory, TimelineRollup
+
+BUCKETS = ('day', 'week')
+BUCKET_DAYS = {'day': 1, 'week': 7}
+
+SUM_COLUMNS = (
+    'analysis_count', 'positive_count', 'negative_count', 'neutral_count', 'confidence_sum',
+    'screening_count', 'epds_sum',
+    'mood_count', 'mood_sum', 'sleep_count', 'sleep_sum',
+)
+
+# metric -> (sum column, count column) for metrics served as a mean
+MEAN_METRICS = {
+    'confidence': ('confidence_sum', 'analysis_count'),
+    'epds': ('epds_sum', 'screening_count'),
+    'mood': ('mood_sum', 'mood_count'),
+    'sleep': ('sleep_sum', 'sleep_count'),
+}
+METRICS = tuple(MEAN_METRICS) + ('sentiment',)
+
+
+def bucket_start(day, bucket):
+    """First day of the bucket holding day"""
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def analysis_delta(user_id, when, sentiment, confidence):
+    # The form stores 'negative', the JSON API 'Negative'
+    label = (sentiment or '').lower()
+    counts = {f'{label}_count': 1} if label in ('positive', 'negative', 'neutral') else {}
+    return user_id, when, {'analysis_count': 1, 'confidence_sum': confidence or 0.0, **counts}
+
+
+def screening_delta(user_id, when, total_score):
+    if total_score is None:
+        return user_id, when, {}
+    return user_id, when, {'screening_count': 1, 'epds_sum': total_score}
+
+
+def support_delta(user_id, when, mood_score, sleep_hours):
+    deltas = {}
+    if mood_score is not None:
+        deltas.update(mood_count=1, mood_sum=mood_score)
+    if sleep_hours is not None:
+        deltas.update(sleep_count=1, sleep_sum=sleep_hours)
+    return user_id, when, deltas
+
+
+def record(connection, deltas):
+    """Add (user_id, datetime, {column: increment}) entries to the rollups
+
+    Entries are merged per bucket in memory first, so a bulk insert costs
+    one upsert per touched day and week, not per row. Entries without a
+    user are skipped.
+    """
+    merged = {}
+    for user_id, when, values in deltas:
+        if user_id is None or not values:
+            continue
+        day = (when or datetime.utcnow()).date()
+        for bucket in BUCKETS:
+            key = (user_id, bucket, bucket_start(day, bucket))
+            row = merged.setdefault(key, dict.fromkeys(SUM_COLUMNS, 0))
+            for column, value in values.items():
+                row[column] += value
+    if not merged:
+        return
+
+    rows = [
+        {'user_id': user_id, 'bucket': bucket, 'bucket_start': start, **sums}
+        for (user_id, bucket, start), sums in merged.items()
+    ]
+    _upsert(connection, rows)
+
+
+def _upsert(connection, rows):
+    table = TimelineRollup.__table__
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = (sqlite if dialect == 'sqlite' else postgresql).insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'bucket', 'bucket_start'],
+            set_={column: table.c[column] + stmt.excluded[column] for column in SUM_COLUMNS}
+        )
+        connection.execute(stmt, rows)
+        return
+
+    # Portable fallback: add to existing rows, insert the rest
+    for row in rows:
+        key = (table.c.user_id == row['user_id']) & (table.c.bucket == row['bucket']) & \
+            (table.c.bucket_start == row['bucket_start'])
+        result = connection.execute(
+            table.update().where(key).values({c: table.c[c] + row[c] for c in SUM_COLUMNS}))
+        if result.rowcount == 0:
+            connection.execute(table.insert(), row)
+
+
+@event.listens_for(Analysis, 'after_insert')
+def _analysis_inserted(mapper, connection, target):
+    record(connection, [analysis_delta(target.user_id, target.timestamp, target.sentiment, target.confidence)])
+
+
+@event.listens_for(ScreeningSession, 'after_insert')
+def _screening_inserted(mapper, connection, target):
+    record(connection, [screening_delta(target.user_id, target.created_at, target.total_score)])
+
+
+@event.listens_for(PostpartumSupportHistory, 'after_insert')
+def _support_entry_inserted(mapper, connection, target):
+    record(connection, [support_delta(target.user_id, target.entry_date, target.mood_score, target.sleep_hours)])
+
+
+def rebuild(user_id=None, chunk_size=50000):
+    """Recompute rollups from the source tables (all users or one)
+
+    Must run inside an app context; commits when done.
+    """
+    connection = db.session.connection()
+    table = TimelineRollup.__table__
+    clear = delete(table)
+    if user_id is not None:
+        clear = clear.where(table.c.user_id == user_id)
+    connection.execute(clear)
+
+    sources = (
+        (Analysis, (Analysis.user_id, Analysis.timestamp, Analysis.sentiment, Analysis.confidence), analysis_delta),
+        (ScreeningSession, (ScreeningSession.user_id, ScreeningSession.created_at, ScreeningSession.total_score),
+         screening_delta),
+        (PostpartumSupportHistory, (PostpartumSupportHistory.user_id, PostpartumSupportHistory.entry_date,
+                                    PostpartumSupportHistory.mood_score, PostpartumSupportHistory.sleep_hours),
+         support_delta),
+    )
+    rows = 0
+    for model, columns, delta in sources:
+        query = select(*columns)
+        if user_id is not None:
+            query = query.where(model.user_id == user_id)
+        result = connection.execution_options(yield_per=chunk_size).execute(query)
+        for chunk in result.partitions():
+            record(connection, (delta(*row) for row in chunk))
+            rows += len(chunk)
+    db.session.commit()
+    return rows
+
+
+def series(user_id, metrics, start, end, points=120, bucket=None):
+    """Downsampled {metric: [points]} for user_id between two dates
+
+    bucket is 'day', 'week' or None to use days when the range fits in
+    `points` and weeks otherwise. If the buckets still outnumber points,
+    consecutive buckets are merged (sums and counts added) so at most
+    `points` come back. Buckets without data are left out. Mean metrics
+    give {'date', 'score', 'count'}; 'sentiment' gives per-label counts.
+    Returns (bucket, step_days, series).
+    """
+    if bucket is None:
+        bucket = 'day' if (end - start).days + 1 <= points else 'week'
+    first = bucket_start(start, bucket)
+    buckets_in_range = (end - first).days // BUCKET_DAYS[bucket] + 1
+    window = max(1, math.ceil(buckets_in_range / points))
+    step_days = window * BUCKET_DAYS[bucket]
+
+    table = TimelineRollup.__table__
+    rows = db.session.execute(
+        select(table)
+        .where(table.c.user_id == user_id, table.c.bucket == bucket,
+               table.c.bucket_start >= first, table.c.bucket_start <= end)
+        .order_by(table.c.bucket_start)
+    ).mappings()
+
+    windows = {}
+    for row in rows:
+        index = (row['bucket_start'] - first).days // step_days
+        sums = windows.setdefault(index, dict.fromkeys(SUM_COLUMNS, 0))
+        for column in SUM_COLUMNS:
+            sums[column] += row[column]
+
+    result = {metric: [] for metric in metrics}
+    for index in sorted(windows):
+        sums = windows[index]
+        day = (first + timedelta(days=index * step_days)).isoformat()
+        for metric in metrics:
+            if metric == 'sentiment':
+                if sums['analysis_count']:
+                    result[metric].append({
+                        'date': day,
+                        'positive': sums['positive_count'],
+                        'negative': sums['negative_count'],
+                        'neutral': sums['neutral_count'],
+                        'count': sums['analysis_count'],
+                    })
+                continue
+            total, count = MEAN_METRICS[metric]
+            if sums[count]:
+                result[metric].append({'date': day, 'score': round(sums[total] / sums[count], 3),
+                                       'count': sums[count]})
+    return bucket, step_days, result
+
+
+def parse_date(value, default):
+    """ISO date from a query parameter; ValueError if malformed"""
+    if not value:
+        return default
+    return date.fromisoformat(value)
@@ -0,0 +1,193 @@
+"""EPDS (Edinburgh Postnatal Depression Scale) scoring rules.
+
+Shared by the web questionnaire, the bulk importer and rescoring so an
+answer set lands in the same result category however it entered the
+database.
+
+Thresholds live in versioned RuleSets. A session records the version
+that categorised it (screening_session.rule_set), and when the clinical
+thresholds change a new version is added here rather than editing an
+old one; `flask rescore-screenings --rules <version>` then brings the
+stored history in line. The vectorized helpers take NumPy arrays; NumPy
+is imported only when they are used.
+"""
+import time
+from itertools import chain
+
+from sqlalchemy import bindparam, case, func, or_, select, update
+
+from models import db, ScreeningSession
+
+EPDS_QUESTION_COUNT = 10
+EPDS_MAX_ANSWER = 3
+
+# Category codes used by the vectorized paths and cohort snapshots
+CATEGORIES = ('baby_blues', 'ppd', 'psychosis_warning')
+BABY_BLUES, PPD, PSYCHOSIS_WARNING = range(len(CATEGORIES))
+
+
+class RuleSet:
+    """One version of the EPDS category thresholds
+
+    Any answer at or above q10_threshold on question 10 (thoughts of
+    self-harm) takes priority over the total score.
+    """
+
+    def __init__(self, version, ppd_threshold, q10_threshold=1, description=''):
+        self.version = version
+        self.ppd_threshold = ppd_threshold
+        self.q10_threshold = q10_threshold
+        self.description = description
+
+    def categorize(self, total_score, q10_score):
+        """Category name for one questionnaire"""
+        if q10_score >= self.q10_threshold:
+            return 'psychosis_warning'
+        if total_score >= self.ppd_threshold:
+            return 'ppd'
+        return 'baby_blues'
+
+    def categorize_many(self, totals, q10_scores):
+        """Category codes (int8 array) for arrays of totals and Q10 answers"""
+        import numpy as np
+
+        codes = np.full(len(totals), BABY_BLUES, dtype=np.int8)
+        codes[np.asarray(totals) >= self.ppd_threshold] = PPD
+        codes[np.asarray(q10_scores) >= self.q10_threshold] = PSYCHOSIS_WARNING
+        return codes
+
+    def __repr__(self):
+        return f'<RuleSet {self.version}>'
+
+
+RULE_SETS = {
+    rules.version: rules for rules in (
+        RuleSet('epds-10', ppd_threshold=10, description='Possible depression at 10+ (original rules)'),
+        RuleSet('epds-13', ppd_threshold=13, description='Probable depression at 13+'),
+    )
+}
+DEFAULT_RULE_SET = 'epds-10'
+
+
+def get_rule_set(version=None):
+    """RuleSet for version (default: DEFAULT_RULE_SET); ValueError if unknown"""
+    version = version or DEFAULT_RULE_SET
+    try:
+        return RULE_SETS[version]
+    except KeyError:
+        raise ValueError(f"Unknown EPDS rule set {version!r}; known: {', '.join(RULE_SETS)}") from None
+
+
+def score_answers(answers):
+    """Totals and Q10 answers for an (n, 10) answer matrix
+
+    Raises ValueError if any answer is outside 0-3.
+    """
+    import numpy as np
+
+    answers = np.asarray(answers)
+    if answers.ndim != 2 or answers.shape[1] != EPDS_QUESTION_COUNT:
+        raise ValueError(f'Expected an (n, {EPDS_QUESTION_COUNT}) answer matrix, got {answers.shape}')
+    if answers.size and (answers.min() < 0 or answers.max() > EPDS_MAX_ANSWER):
+        raise ValueError(f'EPDS answers must be between 0 and {EPDS_MAX_ANSWER}')
+    return answers.sum(axis=1, dtype=np.int16), answers[:, EPDS_QUESTION_COUNT - 1]
+
+
+class RescoreReport:
+    """What a rescoring run did (or would do, for a dry run)"""
+
+    def __init__(self, version, dry_run):
+        self.version = version
+        self.dry_run = dry_run
+        self.checked = 0
+        self.changed = 0
+        self.unscorable = 0
+        self.transitions = {}  # (old category or None, new category) -> count
+        self.elapsed = 0.0
+
+
+def rescore_sessions(rules, chunk_size=50000, dry_run=False):
+    """Recategorise stored sessions under rules, in id-ordered chunks
+
+    Must run inside an app context. Only sessions not already stamped
+    with rules.version are read, so an interrupted run resumes where it
+    stopped. Categories come from the stored total and Q10 scores, which
+    do not depend on the thresholds. Per chunk, rows whose category
+    changes get one executemany UPDATE, the rest of the chunk is
+    stamped with a single ranged UPDATE, and the chunk is committed.
+    """
+    import numpy as np
+
+    report = RescoreReport(rules.version, dry_run)
+    unknown = len(CATEGORIES)  # code for a NULL or unrecognised stored category
+    labels = CATEGORIES + (None,)
+
+    table = ScreeningSession.__table__
+    recategorize = (
+        update(table)
+        .where(table.c.id == bindparam('b_id'))
+        .values(result_category=bindparam('b_category'), rule_set=rules.version)
+    )
+    stale = or_(table.c.rule_set.is_(None), table.c.rule_set != rules.version)
+
+    # Everything comes back as integers so a chunk converts to NumPy in one
+    # pass: NULL scores become -1 and the category becomes its code
+    columns = (
+        table.c.id,
+        func.coalesce(table.c.total_score, -1),
+        func.coalesce(table.c.q10_score, -1),
+        case({category: code for code, category in enumerate(CATEGORIES)},
+             value=table.c.result_category, else_=unknown),
+    )
+
+    start = time.perf_counter()
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(*columns)
+            .where(table.c.id > last_id, stale)
+            .order_by(table.c.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+
+        chunk = np.fromiter(chain.from_iterable(rows), dtype=np.int64,
+                            count=4 * len(rows)).reshape(-1, 4)
+        ids, totals, q10_scores = chunk[:, 0], chunk[:, 1], chunk[:, 2]
+        old = chunk[:, 3]
+        scorable = (totals >= 0) & (q10_scores >= 0)
+
+        new = rules.categorize_many(totals, q10_scores)
+        changed = scorable & (new != old)
+
+        pairs = np.bincount(old[changed] * len(CATEGORIES) + new[changed],
+                            minlength=len(labels) * len(CATEGORIES))
+        for index in np.flatnonzero(pairs):
+            key = (labels[index // len(CATEGORIES)], CATEGORIES[index % len(CATEGORIES)])
+            report.transitions[key] = report.transitions.get(key, 0) + int(pairs[index])
+
+        report.checked += len(rows)
+        report.unscorable += int(np.count_nonzero(~scorable))
+        report.changed += int(np.count_nonzero(changed))
+
+        if not dry_run:
+            if changed.any():
+                db.session.execute(recategorize, [
+                    {'b_id': int(session_id), 'b_category': CATEGORIES[code]}
+                    for session_id, code in zip(ids[changed], new[changed])
+                ])
+            stamp = ids[scorable & ~changed]
+            if len(stamp):
+                db.session.execute(
+                    update(table)
+                    .where(table.c.id.between(int(stamp[0]), int(stamp[-1])), stale,
+                           table.c.total_score.isnot(None), table.c.q10_score.isnot(None))
+                    .values(rule_set=rules.version)
+                )
+            db.session.commit()
+
+        last_id = int(ids[-1])
+
+    report.elapsed = time.perf_counter() - start
+    return report
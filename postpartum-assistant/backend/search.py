@@ -0,0 +1,372 @@
+"""Full-text search over journal entries (Analysis.text).
+
+SQLite
+    An FTS5 index, analysis_fts, over the view analysis_fts_source, so
+    the text itself is stored only once, in analysis. Triggers on
+    analysis keep the index current for every INSERT, UPDATE and DELETE,
+    including Core bulk inserts that skip ORM events (write-behind, the
+    importer).
+
+    FTS rowids are (user_id << 32) + analysis.id, so each user's entries
+    sit together in every term's posting list. A search adds a rowid
+    range for one user, and FTS5 seeks straight to it: the cost follows
+    the user's matches and not the size of the table.
+
+    bm25() is avoided because it counts each term's matches across the
+    whole index on every query. The user's newest MAX_CANDIDATES matches
+    come back with highlight(), and are ranked here with BM25's
+    term-frequency and length terms. Every candidate contains every
+    query term, so the global IDF term adds little. A user with more
+    matches than that gets a truncated search: the ranked candidates
+    come first, then the older matches, newest first, so paging still
+    reaches every match.
+
+    FTS5 answers a prefix query by merging every matching term's
+    postings across the whole index, so prefix words are matched here
+    instead, on the raw words of the entries the other words selected
+    (or of all the user's entries, newest first).
+PostgreSQL
+    A stored generated tsvector column, analysis.search_vector, with a
+    GIN index, ranked with ts_rank.
+Anything else, or SQLite built without FTS5
+    A per-user LIKE scan, newest first.
+
+Words are stemmed (porter on SQLite, 'english' on PostgreSQL), so
+"sleep" also finds "sleeping" and "sleeps". A trailing * makes a word a
+prefix match. The index is created with the analysis table (create_all)
+or by the add_analysis_search_index migration. `flask backfill-search`
+indexes rows that were written before it existed.
+"""
+import re
+
+from markupsafe import escape
+from sqlalchemy import event, text
+
+from models import db, Analysis
+
+FTS_TABLE = 'analysis_fts'
+FTS_SOURCE = 'analysis_fts_source'
+PG_COLUMN = 'search_vector'
+
+# FTS rowid = (user_id << USER_SHIFT) + analysis.id; ids must stay below 2**32
+USER_SHIFT = 32
+SEARCH_ROWID = f'(user_id << {USER_SHIFT}) + id'
+
+MAX_TERMS = 8
+MAX_CANDIDATES = 1000
+SNIPPET_TOKENS = 16
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Markers that cannot occur in escaped text; swapped for <mark> after the
+# snippet has been HTML-escaped
+_OPEN, _CLOSE = '\x02', '\x03'
+
+_TERM = re.compile(r'(\w+)(\*?)')
+
+SQLITE_DDL = (
+    # Lets FTS5 fetch an entry's text by its search rowid
+    f"CREATE INDEX IF NOT EXISTS ix_analysis_search_rowid ON analysis(({SEARCH_ROWID}))",
+    f"CREATE VIEW IF NOT EXISTS {FTS_SOURCE} AS SELECT {SEARCH_ROWID} AS search_rowid, text FROM analysis",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"text, content='{FTS_SOURCE}', content_rowid='search_rowid', tokenize='porter unicode61')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON analysis BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES ((new.user_id << {USER_SHIFT}) + new.id, new.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON analysis BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', (old.user_id << {USER_SHIFT}) + old.id, old.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF text, user_id ON analysis BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', (old.user_id << {USER_SHIFT}) + old.id, old.text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES ((new.user_id << {USER_SHIFT}) + new.id, new.text); END",
+)
+
+SQLITE_DROP = (
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+    f"DROP VIEW IF EXISTS {FTS_SOURCE}",
+    "DROP INDEX IF EXISTS ix_analysis_search_rowid",
+)
+
+POSTGRESQL_DDL = (
+    f"ALTER TABLE analysis ADD COLUMN IF NOT EXISTS {PG_COLUMN} tsvector "
+    f"GENERATED ALWAYS AS (to_tsvector('english', coalesce(text, ''))) STORED",
+    f"CREATE INDEX IF NOT EXISTS ix_analysis_{PG_COLUMN} ON analysis USING gin ({PG_COLUMN})",
+)
+
+POSTGRESQL_DROP = (
+    f"DROP INDEX IF EXISTS ix_analysis_{PG_COLUMN}",
+    f"ALTER TABLE analysis DROP COLUMN IF EXISTS {PG_COLUMN}",
+)
+
+
+def fts5_available(connection):
+    # Compile options do not reliably report FTS5, so try it
+    try:
+        connection.exec_driver_sql("CREATE VIRTUAL TABLE IF NOT EXISTS temp.fts5_probe USING fts5(x)")
+        connection.exec_driver_sql("DROP TABLE temp.fts5_probe")
+        return True
+    except Exception:
+        return False
+
+
+def install(connection):
+    """Create the search index for this database; False if unsupported"""
+    dialect = connection.dialect.name
+    if dialect == 'sqlite' and fts5_available(connection):
+        statements = SQLITE_DDL
+    elif dialect == 'postgresql':
+        statements = POSTGRESQL_DDL
+    else:
+        return False
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+    return True
+
+
+def uninstall(connection):
+    dialect = connection.dialect.name
+    statements = {'sqlite': SQLITE_DROP, 'postgresql': POSTGRESQL_DROP}.get(dialect, ())
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Analysis.__table__, 'after_create')
+def _analysis_created(target, connection, **kw):
+    install(connection)
+
+
+@event.listens_for(Analysis.__table__, 'before_drop')
+def _analysis_dropping(target, connection, **kw):
+    # The FTS table would otherwise outlive analysis with stale rows
+    uninstall(connection)
+
+
+def backend(connection):
+    """'fts5', 'tsvector' or 'like', depending on what this database has"""
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        found = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)).first()
+        return 'fts5' if found else 'like'
+    if dialect == 'postgresql':
+        found = connection.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'analysis' AND column_name = :column"), {'column': PG_COLUMN}).first()
+        return 'tsvector' if found else 'like'
+    return 'like'
+
+
+def rebuild(connection):
+    """Index every existing entry; returns the number of entries indexed
+
+    On SQLite the FTS index is emptied and refilled in user order, which
+    keeps each term's postings sequential and is several times faster
+    than FTS5's own 'rebuild'. On PostgreSQL the generated column is
+    always current, so this only reports.
+    """
+    if not install(connection):
+        raise RuntimeError('This database has no full-text search support; searches fall back to LIKE')
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')")
+        connection.exec_driver_sql(
+            f"INSERT INTO {FTS_TABLE}(rowid, text) "
+            f"SELECT {SEARCH_ROWID}, text FROM analysis ORDER BY user_id, id")
+        connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return connection.execute(db.select(db.func.count()).select_from(Analysis)).scalar()
+
+
+def parse_terms(query):
+    """[(word, is_prefix)] from free text, lower-cased, at most MAX_TERMS"""
+    terms = []
+    for word, star in _TERM.findall(query.lower()):
+        if (word, bool(star)) not in terms:
+            terms.append((word, bool(star)))
+    return terms[:MAX_TERMS]
+
+
+def highlight(snippet):
+    """HTML-escape a marked-up snippet and turn the markers into <mark>"""
+    return str(escape(snippet)).replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>')
+
+
+def search(user_id, query, limit=20, offset=0):
+    """Best-matching entries of one user for query
+
+    Returns (backend, hits, has_more, truncated). Hits are dicts with id,
+    timestamp, sentiment, confidence, score (higher is better) and an
+    HTML snippet with the matched words in <mark>. truncated is True when
+    only the newest MAX_CANDIDATES matches were ranked and the rest
+    follow by date. Must run inside an app context.
+    """
+    terms = parse_terms(query)
+    if not terms:
+        return None, [], False, False
+    connection = db.session.connection()
+    kind = backend(connection)
+    if kind == 'fts5':
+        rows, truncated = _search_fts5(connection, user_id, terms, limit + 1, offset)
+    else:
+        rows = {'tsvector': _search_tsvector, 'like': _search_like}[kind](
+            connection, user_id, terms, limit + 1, offset)
+        truncated = False
+
+    hits = [{
+        'id': row.id,
+        'timestamp': row.timestamp.isoformat() if row.timestamp else None,
+        'sentiment': row.sentiment,
+        'confidence': row.confidence,
+        'score': round(float(row.score), 4),
+        'snippet': highlight(row.snippet),
+    } for row in rows[:limit]]
+    return kind, hits, len(rows) > limit, truncated
+
+
+def _search_fts5(connection, user_id, terms, limit, offset):
+    """(hits, truncated): the newest MAX_CANDIDATES matches ranked here,
+    then any older ones newest first"""
+    first = int(user_id) << USER_SHIFT
+    bounds = (first, first + (1 << USER_SHIFT) - 1)
+    words = [word for word, prefix in terms if not prefix]
+    prefixes = [(word, re.compile(rf'(?<!\w)({_OPEN}?)({re.escape(word)}\w*)', re.IGNORECASE))
+                for word, prefix in terms if prefix]
+    if words:
+        rows = connection.exec_driver_sql(
+            f"SELECT rowid, highlight({FTS_TABLE}, 0, ?, ?) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH ? AND rowid BETWEEN ? AND ? ORDER BY rowid DESC",
+            (_OPEN, _CLOSE, ' AND '.join(f'"{word}"' for word in words), *bounds))
+    else:
+        rows = connection.exec_driver_sql(
+            f"SELECT rowid, text FROM {FTS_TABLE} WHERE rowid BETWEEN ? AND ? ORDER BY rowid DESC", bounds)
+
+    # Read only as far as the candidates and the requested page need;
+    # matches past the candidates are paged by date
+    candidates = []
+    older = []
+    skip = max(0, offset - MAX_CANDIDATES)
+    wanted = max(0, offset + limit - MAX_CANDIDATES) - skip
+    truncated = False
+    for rowid, marked in rows:
+        if prefixes:
+            marked = _mark_prefixes(marked, prefixes)
+            if marked is None:
+                continue
+        if len(candidates) < MAX_CANDIDATES:
+            candidates.append((rowid - first, marked))
+            continue
+        truncated = True
+        if skip:
+            skip -= 1
+        elif len(older) < wanted:
+            older.append((rowid - first, marked))
+        else:
+            break
+    rows.close()
+    if not candidates:
+        return [], False
+
+    # BM25 without IDF: term frequency saturates at K1, longer entries
+    # count for less; ties go to the newer entry (already in that order)
+    lengths = [len(marked.split()) for _, marked in candidates]
+    average = sum(lengths) / len(lengths)
+
+    def scored(entries):
+        for entry_id, marked in entries:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * len(marked.split()) / average)
+            yield sum(tf * (BM25_K1 + 1) / (tf + norm) for tf in _term_counts(marked)), entry_id, marked
+
+    ranked = sorted(scored(candidates), key=lambda hit: -hit[0])
+    page = ranked[offset:offset + limit] + list(scored(older))
+
+    details = {row.id: row for row in connection.execute(
+        db.select(Analysis.id, Analysis.timestamp, Analysis.sentiment, Analysis.confidence)
+        .where(Analysis.id.in_([entry_id for _, entry_id, _ in page])))}
+    return [_Hit(details[entry_id], score, _excerpt(marked))
+            for score, entry_id, marked in page if entry_id in details], truncated
+
+
+def _mark_prefixes(marked, prefixes):
+    """marked with every prefix match marked too; None if one is missing"""
+    lowered = marked.lower()
+    # A plain substring test rules most entries out before any regex runs
+    if not all(word in lowered for word, _ in prefixes):
+        return None
+    for _, pattern in prefixes:
+        # Words the MATCH already marked count but are left alone
+        marked, found = pattern.subn(
+            lambda m: m.group(0) if m.group(1) else _OPEN + m.group(2) + _CLOSE, marked)
+        if not found:
+            return None
+    return marked
+
+
+def _term_counts(marked):
+    """Occurrences of each distinct highlighted word"""
+    counts = {}
+    for chunk in marked.split(_OPEN)[1:]:
+        word = chunk.split(_CLOSE, 1)[0].lower()
+        counts[word] = counts.get(word, 0) + 1
+    return counts.values()
+
+
+def _excerpt(marked):
+    """Roughly SNIPPET_TOKENS words either side of the first match"""
+    first = marked.find(_OPEN)
+    start = max(0, first - SNIPPET_TOKENS * 6)
+    end = start + SNIPPET_TOKENS * 12
+    excerpt = marked[start:end]
+    # The window opens before the first match but may close inside one
+    if excerpt.rfind(_OPEN) > excerpt.rfind(_CLOSE):
+        excerpt += _CLOSE
+    return ('…' if start else '') + excerpt + ('…' if end < len(marked) else '')
+
+
+def _search_tsvector(connection, user_id, terms, limit, offset):
+    tsquery = ' & '.join(word + (':*' if prefix else '') for word, prefix in terms)
+    return connection.execute(text(
+        f"SELECT id, timestamp, sentiment, confidence, "
+        f"ts_rank({PG_COLUMN}, q) AS score, "
+        f"ts_headline('english', text, q, :options) AS snippet "
+        f"FROM analysis, to_tsquery('english', :tsquery) AS q "
+        f"WHERE user_id = :user_id AND {PG_COLUMN} @@ q "
+        f"ORDER BY score DESC, id DESC LIMIT :limit OFFSET :offset"
+    ).columns(timestamp=db.DateTime), {
+        'tsquery': tsquery, 'user_id': user_id, 'limit': limit, 'offset': offset,
+        'options': f'StartSel={_OPEN}, StopSel={_CLOSE}, MaxWords={SNIPPET_TOKENS}, MinWords=5',
+    }).all()
+
+
+class _Hit:
+    __slots__ = ('id', 'timestamp', 'sentiment', 'confidence', 'score', 'snippet')
+
+    def __init__(self, row, score, snippet):
+        self.id, self.timestamp, self.sentiment, self.confidence = row
+        self.score = score
+        self.snippet = snippet
+
+
+def _search_like(connection, user_id, terms, limit, offset):
+    """Newest entries containing every word; no stemming or ranking"""
+    query = db.select(Analysis.id, Analysis.timestamp, Analysis.sentiment, Analysis.confidence,
+                      Analysis.text).where(Analysis.user_id == user_id)
+    for word, _ in terms:
+        query = query.where(Analysis.text.icontains(word, autoescape=True))
+    rows = connection.execute(
+        query.order_by(Analysis.timestamp.desc(), Analysis.id.desc()).limit(limit).offset(offset)).all()
+
+    pattern = re.compile('|'.join(re.escape(word) for word, _ in terms), re.IGNORECASE)
+    return [_Hit(row[:4], 0.0, _excerpt(pattern.sub(lambda m: _OPEN + m.group(0) + _CLOSE, row.text)))
+            for row in rows]
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Alembic autogenerate filter: leave the search index objects alone"""
+    if type_ == 'table' and name.startswith(FTS_TABLE):
+        return False
+    if type_ == 'column' and name == PG_COLUMN:
+        return False
+    if type_ == 'index' and name in (f'ix_analysis_{PG_COLUMN}', 'ix_analysis_search_rowid'):
+        return False
+    return True
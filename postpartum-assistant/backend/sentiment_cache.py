@@ -0,0 +1,102 @@
+"""Bounded LRU/TTL cache for sentiment polarity scores.
+
+Keys are hashes of the normalized text, so resubmitting the same entry
+(or the same entry with different spacing) reuses the earlier score.
+An optional SQLite file acts as a second tier shared by every worker
+process on the host.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from cache import TTLCache
+
+
+def cache_key(text):
+    """Stable hash of text with Unicode form and whitespace normalized"""
+    normalized = ' '.join(unicodedata.normalize('NFC', text).split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class SentimentCache(TTLCache):
+    """In-process polarity cache with an optional SQLite tier shared across workers"""
+
+    # Expired shared rows are purged on roughly one write in this many
+    PURGE_EVERY = 100
+
+    def __init__(self, maxsize=1024, ttl=3600, db_path=None):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.db_path = db_path
+        self._local = threading.local()
+        self._writes = 0
+        self.shared_hits = 0
+
+        if db_path:
+            self._connection().execute(
+                'CREATE TABLE IF NOT EXISTS polarity_cache '
+                '(key TEXT PRIMARY KEY, value REAL NOT NULL, stored_at REAL NOT NULL)'
+            )
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        value = self._fetch(key)
+        if value is None and self.db_path:
+            value = self._shared_get(key)
+            if value is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                super().set(key, value)
+        if value is None:
+            with self._lock:
+                self.misses += 1
+        return value
+
+    def set(self, key, value):
+        super().set(key, value)
+        self._shared_set(key, value)
+
+    def _shared_get(self, key):
+        try:
+            row = self._connection().execute(
+                'SELECT value FROM polarity_cache WHERE key = ? AND stored_at > ?',
+                (key, time.time() - self.ttl)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def _shared_set(self, key, value):
+        if not self.db_path:
+            return
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO polarity_cache (key, value, stored_at) VALUES (?, ?, ?)',
+                (key, value, now)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute('DELETE FROM polarity_cache WHERE stored_at <= ?', (now - self.ttl,))
+        except sqlite3.Error:
+            # The shared tier is best effort; the in-process cache still works
+            pass
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            stats['shared_hits'] = self.shared_hits
+            stats['hit_rate'] = (self.hits + self.shared_hits) / lookups if lookups else 0.0
+        stats['shared_tier'] = bool(self.db_path)
+        return stats
@@ -0,0 +1,80 @@
+"""Process pool that scores TextBlob polarity off the request threads.
+
+TextBlob's pattern analyzer is pure Python and holds the GIL for the
+whole call, so a long journal entry scored inline stalls every other
+request served by that worker. The pool keeps a few warm processes with
+the lexicon already loaded and falls back to inline scoring if a worker
+is slow or the pool breaks.
+"""
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+
+def _warm_up():
+    # Runs once per worker process so the first real request does not pay
+    # for importing TextBlob and loading the pattern lexicon
+    polarity('warm up')
+
+
+def polarity(text):
+    """TextBlob polarity computed in the current process"""
+    from textblob import TextBlob
+    return TextBlob(text).sentiment.polarity
+
+
+class SentimentPool:
+    """Lazily started ProcessPoolExecutor with timeout and inline fallback"""
+
+    def __init__(self, size=2, timeout=2.0):
+        self.size = size
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self.offloaded = 0
+        self.fallbacks = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn avoids forking a multi-threaded server process
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.size,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=_warm_up
+                    )
+                    atexit.register(self.shutdown)
+        return self._executor
+
+    def polarity(self, text):
+        """Score text in a worker process, or inline if that fails"""
+        try:
+            future = self._get_executor().submit(polarity, text)
+            result = future.result(timeout=self.timeout)
+            self.offloaded += 1
+            return result
+        except TimeoutError:
+            future.cancel()
+        except (BrokenProcessPool, RuntimeError, OSError):
+            # Drop the broken executor; the next call starts a fresh one
+            self.shutdown(wait=False)
+        self.fallbacks += 1
+        return polarity(text)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self):
+        return {
+            'size': self.size,
+            'timeout': self.timeout,
+            'running': self._executor is not None,
+            'offloaded': self.offloaded,
+            'fallbacks': self.fallbacks
+        }
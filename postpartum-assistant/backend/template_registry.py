@@ -0,0 +1,79 @@
+"""Memoized template name resolution for render_verified.
+
+Resolving a template name means checking the file exists and, when it
+does not, searching the templates folder for a case-insensitive match.
+That is filesystem work which used to run on every request; here each
+name is resolved once and kept in a read-only mapping. Names that do not
+resolve are remembered too, so a missing template costs one search, not
+one per request.
+"""
+import os
+import threading
+from types import MappingProxyType
+
+
+class TemplateRegistry:
+    """Template name -> verified path, resolved lazily and kept immutable"""
+
+    def __init__(self, template_dir, resolver, auto_reload=False):
+        self.template_dir = str(template_dir)
+        self.resolver = resolver
+        self.auto_reload = auto_reload
+        self._paths = MappingProxyType({})
+        self._missing = MappingProxyType({})  # name -> the resolver's LookupError
+        self._directories = []
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def _scan_directories(self):
+        return [root for root, _, _ in os.walk(self.template_dir)]
+
+    def _directory_signature(self, directories):
+        # Adding, removing or renaming a template changes the mtime of the
+        # directory holding it, so directory mtimes are enough to notice that
+        # a previously resolved name may now resolve differently
+        try:
+            return tuple(os.stat(directory).st_mtime_ns for directory in directories)
+        except FileNotFoundError:
+            return None
+
+    def _check_reload(self):
+        if self._signature is not None and \
+                self._directory_signature(self._directories) == self._signature:
+            return
+        with self._lock:
+            self._directories = self._scan_directories()
+            self._signature = self._directory_signature(self._directories)
+            self._paths = MappingProxyType({})
+            self._missing = MappingProxyType({})
+
+    def resolve(self, template_name):
+        """Return the verified path for template_name (raises TemplateNotFound)"""
+        if self.auto_reload:
+            self._check_reload()
+
+        path = self._paths.get(template_name)
+        if path is None:
+            missing = self._missing.get(template_name)
+            if missing is not None:
+                raise missing.with_traceback(None)
+            try:
+                path = self.resolver(template_name)
+            except LookupError as e:
+                with self._lock:
+                    self._missing = MappingProxyType({**self._missing, template_name: e})
+                raise
+            with self._lock:
+                # Copy-on-write so readers never see a half-updated mapping
+                paths = dict(self._paths)
+                paths[template_name] = path
+                self._paths = MappingProxyType(paths)
+        return path
+
+    def preload(self, template_names):
+        for template_name in template_names:
+            self.resolve(template_name)
+
+    @property
+    def paths(self):
+        return self._paths
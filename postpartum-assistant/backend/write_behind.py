@@ -0,0 +1,166 @@
+"""Write-behind queue: request threads hand rows off, one thread commits them.
+
+A journal analysis is read back only by the history pages, yet storing
+it made every request wait for its own INSERT and COMMIT. With the queue
+the request thread only enqueues the row. A single writer thread drains
+the queue into batches (up to batch_size rows, or whatever arrived within
+`linger` seconds of the first one) and commits each batch in one
+transaction, so concurrent requests share one commit.
+
+- Backpressure: put() blocks for up to put_timeout while the queue is
+  full and then returns False, telling the caller to write the row
+  itself. The queue never grows past maxsize and no row is dropped.
+- Read-your-writes: rows are counted per user until committed, and
+  wait_for(user_id) blocks until that user's rows are in the database,
+  so a user always sees their own entries on the next page load.
+- Shutdown: close() (also run at exit) stops intake and drains the
+  queue before the process ends.
+
+A batch that fails is retried row by row so one bad row cannot sink the
+rest; rows that still fail are logged and counted, not retried forever.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger('app.write_behind')
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """Bounded queue plus a writer thread calling write_batch(rows)
+
+    write_batch receives a list of rows and must write them all in one
+    transaction or raise.
+    """
+
+    def __init__(self, write_batch, maxsize=10000, batch_size=500, linger=0.02, put_timeout=1.0):
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.linger = linger
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._pending = Counter()
+        self._committed = threading.Condition()
+        self._closed = False
+
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.blocked = 0
+        self.rejected = 0
+        self.failed = 0
+
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, user_id, row):
+        """Queue row for user_id; False if the caller must write it itself"""
+        if self._closed:
+            return False
+        with self._committed:
+            self._pending[user_id] += 1
+        try:
+            try:
+                self._queue.put_nowait((user_id, row))
+            except queue.Full:
+                self.blocked += 1
+                self._queue.put((user_id, row), timeout=self.put_timeout)
+        except queue.Full:
+            self.rejected += 1
+            self._done([user_id])
+            return False
+        self.enqueued += 1
+        return True
+
+    def wait_for(self, user_id, timeout=5.0):
+        """Block until user_id has no uncommitted rows; False on timeout"""
+        with self._committed:
+            return self._committed.wait_for(lambda: not self._pending[user_id], timeout)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def close(self, timeout=30.0):
+        """Stop accepting rows, write everything queued, stop the thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            'pending': self.pending(),
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'batches': self.batches,
+            'blocked': self.blocked,
+            'rejected': self.rejected,
+            'failed': self.failed,
+        }
+
+    def _done(self, user_ids):
+        with self._committed:
+            for user_id in user_ids:
+                self._pending[user_id] -= 1
+                if not self._pending[user_id]:
+                    del self._pending[user_id]
+            self._committed.notify_all()
+
+    def _next_batch(self):
+        """Block for the first row, then gather more until full or lingered"""
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._write(batch)
+        # Rows that raced close() are still written
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                self._write([item])
+
+    def _write(self, batch):
+        rows = [row for _, row in batch]
+        try:
+            self.write_batch(rows)
+            self.written += len(rows)
+            self.batches += 1
+        except Exception:
+            logger.warning('Write-behind batch failed; retrying row by row',
+                           extra={'rows': len(rows)}, exc_info=True)
+            for row in rows:
+                try:
+                    self.write_batch([row])
+                    self.written += 1
+                except Exception:
+                    self.failed += 1
+                    logger.exception('Write-behind row dropped')
+        finally:
+            self._done([user_id for user_id, _ in batch])
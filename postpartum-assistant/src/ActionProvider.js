@@ -1,16 +1,54 @@
+const CHAT_URL = "http://localhost:5000/api/chat";
+
+// Parse "event: x\ndata: {...}" blocks from a server-sent event stream
+async function* readEvents(response) {
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) return;
+    buffer += value;
+    let end;
+    while ((end = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      const event = block.match(/^event: (.*)$/m)?.[1] ?? "message";
+      const data = block.match(/^data: (.*)$/m)?.[1];
+      yield { event, data: data ? JSON.parse(data) : {} };
+    }
+  }
+}
+
 class ActionProvider {
   constructor(createChatBotMessage, setStateFunc) {
     this.createChatBotMessage = createChatBotMessage;
     this.setState = setStateFunc;
   }
 
-  async handleUserInput = async (userInput) => {
-    const res = await axios.post("http://localhost:5000/analyze", {
-      text: userInput
-    });
-    
-    if(res.data.sentiment === "NEGATIVE") {
-      this.handleSad();
+  // Each reply part is shown as it arrives; a negative turn ends with
+  // the emergencyOptions widget
+  handleUserInput = async (userInput) => {
+    try {
+      const response = await fetch(CHAT_URL, {
+        method: "POST",
+        credentials: "include",
+        headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
+        body: JSON.stringify({ text: userInput }),
+      });
+      if (!response.ok) throw new Error(`Chat request failed: ${response.status}`);
+
+      let widget = null;
+      for await (const { event, data } of readEvents(response)) {
+        if (event === "turn") {
+          widget = data.widget;
+        } else if (event === "message") {
+          this.updateChatbotState(this.createChatBotMessage(data.text));
+        } else if (event === "done" && widget) {
+          this.handleSad();
+        }
+      }
+    } catch (error) {
+      console.error("API Error:", error);
     }
   };
 
@@ -30,4 +68,4 @@ class ActionProvider {
   };
 }
 
-export default ActionProvider;
\ No newline at end of file
+export default ActionProvider;
@@ -1,18 +1,16 @@
 handleUserMessage = async (userInput) => {
   try {
     const response = await axios.post(
-      "http://localhost:5000/analyze",
+      "http://localhost:5000/api/chat",
       { text: userInput },
-      { headers: { "Content-Type": "application/json" } }
+      { headers: { "Content-Type": "application/json" }, withCredentials: true }
     );
     
-    // Use the response data
-    const botReply = response.data.sentiment === "NEGATIVE"
-      ? `I understand you're feeling down (${(response.data.confidence * 100).toFixed(1)}% certainty). Here are resources: [...]`
-      : "Glad to hear you're doing well!";
+    // The server composes the reply; widget is "emergencyOptions" for a negative turn
+    const botReply = response.data.reply;
     
-    this.setState(/* update chat with botReply */);
+    this.setState(/* update chat with botReply and response.data.widget */);
   } catch (error) {
     console.error("API Error:", error);
   }
-};
\ No newline at end of file
+};